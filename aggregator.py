@@ -0,0 +1,620 @@
+"""
+Agregados parciales de logs de Squid.
+
+Un LogAggregate resume un conjunto de registros con contadores por usuario, dominio,
+hora, código de estado y tipo de contenido, en memoria proporcional al número de
+claves distintas y no al número de líneas. Los agregados de distintos fragmentos del
+log se combinan con merge() en el orden del archivo.
+
+Para cada hora guarda además resúmenes HyperLogLog de los usuarios, IPs y dominios
+distintos, que se unen para obtener esos conteos en cualquier rango de fechas.
+
+Los métodos get_* devuelven los mismos resultados que los de SquidLogAnalyzer, de modo
+que SquidReportGenerator puede generar el informe directamente a partir de un agregado.
+StreamingAggregator construye el agregado registro a registro, sin DataFrame y,
+opcionalmente, con tablas aproximadas de sitios y URLs de memoria acotada.
+"""
+from datetime import datetime
+
+import pandas as pd
+
+from sketches import HyperLogLog, SpaceSaving
+
+# Nombres de los días tal como los devuelve Series.dt.day_name()
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+class LogAggregate:
+    """Contadores combinables que resumen un conjunto de registros de log."""
+
+    def __init__(self):
+        self.total_requests = 0
+        self.total_bytes = 0
+        self.min_timestamp = None  # Segundos de hora local
+        self.max_timestamp = None
+        self.users = {}  # usuario -> [solicitudes, bytes]
+        self.domains = {}  # dominio -> [visitas, bytes]
+        self.hours = {}  # hora (segundos de hora local // 3600) -> [solicitudes, bytes]
+        self.status_codes = {}  # código -> solicitudes, en orden de primera aparición
+        self.content_types = {}  # tipo de contenido -> solicitudes
+        self.client_ips = set()
+        self.user_details = {}  # usuario -> {'domains': {}, 'status_codes': {}, 'content_types': {}, 'urls': {}}
+        self.distinct = {}  # hora -> {'users': HyperLogLog, 'ips': HyperLogLog, 'domains': HyperLogLog}
+
+    @classmethod
+    def from_columns(cls, columns, time_window=None):
+        """
+        Construye un agregado a partir de un LogColumns.
+
+        Args:
+            columns: Registros parseados (LogColumns)
+            time_window: Tupla (inicio, fin) en segundos de hora local; solo se agregan
+                los registros dentro del rango (ambos extremos incluidos)
+
+        Returns:
+            LogAggregate con los contadores de esos registros
+        """
+        if not len(columns):
+            return cls()
+
+        return cls.from_frame(pd.DataFrame({
+            'timestamp': columns.as_numpy('timestamp'),
+            'client_ip': columns.client_ip,
+            'username': columns.username,
+            'url': columns.url,
+            'domain': columns.domain,
+            'status_code': columns.as_numpy('status_code'),
+            'size': columns.as_numpy('size'),
+            'content_type': columns.content_type
+        }), time_window)
+
+    @classmethod
+    def from_frame(cls, df, time_window=None):
+        """
+        Construye un agregado a partir de un DataFrame con las columnas timestamp (segundos
+        de hora local), client_ip, username, url, domain, status_code, size y content_type.
+        """
+        aggregate = cls()
+        if time_window is not None:
+            start, end = time_window
+            if start is not None:
+                df = df[df['timestamp'] >= start]
+            if end is not None:
+                df = df[df['timestamp'] <= end]
+        if df.empty:
+            return aggregate
+        df = df.assign(hour_bucket=df['timestamp'] // 3600)
+
+        aggregate.total_requests = len(df)
+        aggregate.total_bytes = int(df['size'].sum())
+        aggregate.min_timestamp = int(df['timestamp'].min())
+        aggregate.max_timestamp = int(df['timestamp'].max())
+        aggregate.client_ips = set(df['client_ip'].dropna())
+
+        aggregate.users = cls._sum_by(df, 'username')
+        aggregate.domains = cls._sum_by(df, 'domain')
+        aggregate.hours = cls._sum_by(df, 'hour_bucket')
+        aggregate.status_codes = cls._count_by(df, ['status_code'])
+        aggregate.content_types = cls._count_by(df, ['content_type'])
+
+        for field, counter in (('domain', 'domains'), ('status_code', 'status_codes'),
+                               ('content_type', 'content_types'), ('url', 'urls')):
+            for (user, value), count in cls._count_by(df, ['username', field]).items():
+                details = aggregate.user_details.get(user)
+                if details is None:
+                    details = aggregate.user_details[user] = {
+                        'domains': {}, 'status_codes': {}, 'content_types': {}, 'urls': {}
+                    }
+                details[counter][value] = count
+
+        for field, sketch in (('username', 'users'), ('client_ip', 'ips'), ('domain', 'domains')):
+            pairs = df[['hour_bucket', field]].dropna().drop_duplicates()
+            for bucket, value in zip(pairs['hour_bucket'].tolist(), pairs[field]):
+                aggregate._hour_sketches(bucket)[sketch].add(value)
+
+        return aggregate
+
+    @staticmethod
+    def _sum_by(df, key):
+        """Solicitudes y bytes por clave, en orden de primera aparición."""
+        grouped = df.groupby(key, sort=False)['size'].agg(['count', 'sum'])
+        return {k: [int(c), int(b)] for k, c, b in zip(grouped.index, grouped['count'], grouped['sum'])}
+
+    @staticmethod
+    def _count_by(df, keys):
+        """Número de filas por clave, en orden de primera aparición."""
+        counts = df.groupby(keys, sort=False).size()
+        if len(keys) == 1:
+            return {k: int(c) for k, c in zip(counts.index, counts)}
+        return {tuple(k): int(c) for k, c in zip(counts.index, counts)}
+
+    def merge(self, other):
+        """Añade los contadores de otro agregado, que debe corresponder a registros posteriores."""
+        self.total_requests += other.total_requests
+        self.total_bytes += other.total_bytes
+        if other.min_timestamp is not None:
+            self.min_timestamp = other.min_timestamp if self.min_timestamp is None else min(self.min_timestamp, other.min_timestamp)
+            self.max_timestamp = other.max_timestamp if self.max_timestamp is None else max(self.max_timestamp, other.max_timestamp)
+        self.client_ips |= other.client_ips
+
+        for mine, theirs in ((self.users, other.users), (self.domains, other.domains), (self.hours, other.hours)):
+            for key, (requests, traffic) in theirs.items():
+                entry = mine.get(key)
+                if entry is None:
+                    mine[key] = [requests, traffic]
+                else:
+                    entry[0] += requests
+                    entry[1] += traffic
+
+        self._merge_counts(self.status_codes, other.status_codes)
+        self._merge_counts(self.content_types, other.content_types)
+
+        for user, details in other.user_details.items():
+            mine = self.user_details.get(user)
+            if mine is None:
+                mine = self.user_details[user] = self._new_user_details()
+            for counter, counts in details.items():
+                self._merge_counts(mine[counter], counts)
+
+        for bucket, sketches in other.distinct.items():
+            mine = self.distinct.get(bucket)
+            if mine is None:
+                self.distinct[bucket] = {name: sketch.copy() for name, sketch in sketches.items()}
+            else:
+                for name, sketch in sketches.items():
+                    mine[name].update(sketch)
+
+        return self
+
+    def _hour_sketches(self, bucket):
+        """Resúmenes de valores distintos de una hora, creándolos si no existen."""
+        sketches = self.distinct.get(bucket)
+        if sketches is None:
+            sketches = self.distinct[bucket] = {'users': HyperLogLog(), 'ips': HyperLogLog(), 'domains': HyperLogLog()}
+        return sketches
+
+    def _new_user_details(self):
+        return {'domains': {}, 'status_codes': {}, 'content_types': {}, 'urls': {}}
+
+    @staticmethod
+    def _merge_counts(mine, theirs):
+        if isinstance(mine, SpaceSaving):
+            for key, count in theirs.items():
+                mine.add(key, count)
+            return
+        for key, count in theirs.items():
+            mine[key] = mine.get(key, 0) + count
+
+    # Consultas: devuelven los mismos resultados intermedios que las agrupaciones
+    # del DataFrame en SquidLogAnalyzer.
+
+    def grouped_totals(self, counters, key_name, excluded=None):
+        """
+        Equivalente a df.groupby(key).agg({'url': 'count', 'size': 'sum'}).reset_index().
+
+        Args:
+            counters: Diccionario clave -> [solicitudes, bytes]
+            key_name: Nombre de la columna de la clave
+            excluded: Claves a omitir
+        """
+        excluded = set(excluded or [])
+        keys = sorted(k for k in counters if k not in excluded)
+        return pd.DataFrame({
+            key_name: keys,
+            'url': pd.array([counters[k][0] for k in keys], dtype='int64'),
+            'size': pd.array([counters[k][1] for k in keys], dtype='int64')
+        })
+
+    def hourly_totals(self):
+        """Solicitudes y bytes por hora del día (0-23)."""
+        totals = {}
+        for bucket, (requests, traffic) in self.hours.items():
+            entry = totals.setdefault(bucket % 24, [0, 0])
+            entry[0] += requests
+            entry[1] += traffic
+        hourly = self.grouped_totals(totals, 'hour')
+        hourly['hour'] = hourly['hour'].astype('int64')
+        return hourly
+
+    def daily_totals(self):
+        """Solicitudes y bytes por día de la semana."""
+        totals = {}
+        for bucket, (requests, traffic) in self.hours.items():
+            # El 1 de enero de 1970 fue jueves
+            entry = totals.setdefault(DAY_NAMES[(bucket // 24 + 3) % 7], [0, 0])
+            entry[0] += requests
+            entry[1] += traffic
+        return self.grouped_totals(totals, 'day_of_week')
+
+    @staticmethod
+    def value_counts(counts, name):
+        """Equivalente a Series.value_counts() a partir de conteos en orden de primera aparición."""
+        series = pd.Series(list(counts.values()), index=pd.Index(list(counts.keys()), name=name),
+                           dtype='int64', name='count')
+        return series.sort_values(ascending=False, kind='stable')
+
+    def date_range(self):
+        """Primer y último timestamp como pd.Timestamp."""
+        if self.min_timestamp is None:
+            return None, None
+        return pd.Timestamp(self.min_timestamp, unit='s'), pd.Timestamp(self.max_timestamp, unit='s')
+
+    # Interfaz de consulta de SquidLogAnalyzer, usada por SquidReportGenerator
+
+    def get_summary(self):
+        """Obtiene un resumen del análisis."""
+        return {
+            'total_requests': self.total_requests,
+            'total_bytes': self.total_bytes,
+            'unique_users': len(self.users),
+            'unique_ips': len(self.client_ips)
+        }
+
+    def get_top_users(self, limit=10, excluded=None):
+        """Obtiene los usuarios con más tráfico."""
+        user_traffic = self.grouped_totals(self.users, 'user', excluded)
+        if user_traffic.empty:
+            return pd.DataFrame(columns=['user', 'traffic', 'requests', 'traffic_readable'])
+
+        user_traffic = user_traffic[['user', 'size', 'url']]
+        user_traffic.columns = ['user', 'traffic', 'requests']
+        user_traffic = user_traffic.sort_values('traffic', ascending=False).head(limit)
+        user_traffic['traffic_readable'] = user_traffic['traffic'].apply(bytes_to_human_readable)
+        return user_traffic
+
+    def get_top_domains(self, limit=20, excluded=None):
+        """Obtiene los dominios más visitados."""
+        domain_visits = self.grouped_totals(self.domains, 'domain', excluded)
+        if domain_visits.empty:
+            return pd.DataFrame(columns=['domain', 'visits', 'traffic', 'traffic_readable'])
+
+        domain_visits.columns = ['domain', 'visits', 'traffic']
+        domain_visits = domain_visits.sort_values('visits', ascending=False).head(limit)
+        domain_visits['traffic_readable'] = domain_visits['traffic'].apply(bytes_to_human_readable)
+        return domain_visits
+
+    def get_hourly_usage(self):
+        """Obtiene el uso por hora del día, con las 24 horas representadas."""
+        hourly_usage = self.hourly_totals()
+        hourly_usage.columns = ['hour', 'requests', 'traffic']
+        all_hours = pd.DataFrame({'hour': range(24)})
+        return pd.merge(all_hours, hourly_usage, on='hour', how='left').fillna(0)
+
+    def get_daily_usage(self):
+        """Obtiene el uso por día de la semana, ordenado de lunes a domingo."""
+        daily_usage = self.daily_totals()
+        daily_usage.columns = ['day_of_week', 'requests', 'traffic']
+        daily_usage['day_of_week'] = pd.Categorical(daily_usage['day_of_week'], categories=DAY_NAMES, ordered=True)
+        return daily_usage.sort_values('day_of_week')
+
+    def get_status_codes(self):
+        """Obtiene la distribución de códigos de estado HTTP."""
+        from config import HTTP_CODE_DESCRIPTIONS
+
+        status_counts = self.value_counts(self.status_codes, 'status_code').reset_index()
+        status_counts.columns = ['status_code', 'count']
+        status_counts['description'] = status_counts['status_code'].map(
+            lambda x: HTTP_CODE_DESCRIPTIONS.get(x, 'Unknown')
+        )
+        return status_counts
+
+    def get_content_types(self):
+        """Obtiene los 10 tipos de contenido más frecuentes."""
+        return self.value_counts(self.content_types, 'content_type').head(10)
+
+    def get_user_data(self, username):
+        """Obtiene datos específicos para un usuario, o None si no aparece en el log."""
+        details = self.user_details.get(username)
+        if details is None:
+            return None
+
+        total_requests, total_traffic = self.users[username]
+
+        top_domains = self._top_table(details['domains'], 'domain', 10)
+
+        status_codes = self.value_counts(details['status_codes'], 'status_code').reset_index()
+        status_codes.columns = ['status_code', 'count']
+
+        content_types = self.value_counts(details['content_types'], 'content_type').reset_index()
+        content_types.columns = ['content_type', 'count']
+
+        top_urls = self._top_table(details['urls'], 'url', 10)
+
+        avg_response_size = total_traffic / total_requests
+
+        success_requests = sum(count for code, count in details['status_codes'].items() if 200 <= code <= 299)
+        error_requests = sum(count for code, count in details['status_codes'].items() if code >= 400)
+
+        return {
+            'username': username,
+            'total_requests': total_requests,
+            'total_traffic': total_traffic,
+            'traffic_readable': bytes_to_human_readable(total_traffic),
+            'top_domains': top_domains,
+            'status_codes': status_codes,
+            'content_types': content_types,
+            'top_urls': top_urls,
+            'avg_response_size': avg_response_size,
+            'avg_response_readable': bytes_to_human_readable(avg_response_size),
+            'success_rate': (success_requests / total_requests) * 100,
+            'error_rate': (error_requests / total_requests) * 100
+        }
+
+    def get_all_user_data(self, users=None):
+        """
+        Obtiene los datos de get_user_data() de varios usuarios (todos si `users` es None), como
+        diccionario usuario -> datos, sin los usuarios que no aparecen en el log.
+        """
+        users_data = {}
+        for username in (self.users if users is None else users):
+            user_data = self.get_user_data(username)
+            if user_data is not None:
+                users_data[username] = user_data
+        return users_data
+
+    def get_date_range(self):
+        """Obtiene el rango de fechas; la fecha actual si no hay registros."""
+        if self.min_timestamp is None:
+            now = datetime.now()
+            return now, now
+        return self.date_range()
+
+    def get_approximation(self):
+        """Cotas de error de las tablas aproximadas, o None si todos los valores son exactos."""
+        return None
+
+    def get_distinct_usage(self, period='day'):
+        """
+        Usuarios, IPs y sitios distintos por hora o por día, estimados con HyperLogLog.
+
+        Args:
+            period: 'hour' o 'day'
+
+        Returns:
+            DataFrame con las columnas period, unique_users, unique_ips y unique_domains
+        """
+        width = 1 if period == 'hour' else 24
+        periods = {}
+        for bucket, sketches in self.distinct.items():
+            merged = periods.get(bucket // width)
+            if merged is None:
+                periods[bucket // width] = {name: sketch.copy() for name, sketch in sketches.items()}
+            else:
+                for name, sketch in sketches.items():
+                    merged[name].update(sketch)
+
+        keys = sorted(periods)
+        return pd.DataFrame({
+            'period': pd.to_datetime([key * width * 3600 for key in keys], unit='s'),
+            'unique_users': pd.array([periods[key]['users'].count() for key in keys], dtype='int64'),
+            'unique_ips': pd.array([periods[key]['ips'].count() for key in keys], dtype='int64'),
+            'unique_domains': pd.array([periods[key]['domains'].count() for key in keys], dtype='int64')
+        })
+
+    def get_unique_counts(self, start_date=None, end_date=None):
+        """
+        Usuarios, IPs y sitios distintos entre dos fechas, uniendo los resúmenes de cada hora.
+        La resolución es de una hora: se incluyen completas las horas de los extremos.
+        """
+        # Los timestamps se guardan como segundos de hora local
+        first = pd.Timestamp(start_date).value // 10**9 // 3600 if start_date is not None else None
+        last = pd.Timestamp(end_date).value // 10**9 // 3600 if end_date is not None else None
+
+        union = {'users': HyperLogLog(), 'ips': HyperLogLog(), 'domains': HyperLogLog()}
+        for bucket, sketches in self.distinct.items():
+            if (first is not None and bucket < first) or (last is not None and bucket > last):
+                continue
+            for name, sketch in sketches.items():
+                union[name].update(sketch)
+
+        return {
+            'unique_users': union['users'].count(),
+            'unique_ips': union['ips'].count(),
+            'unique_domains': union['domains'].count()
+        }
+
+    def _top_table(self, counts, name, limit):
+        """Las `limit` claves más frecuentes de un contador, con columnas [name, 'visits']."""
+        table = self.value_counts(counts, name).head(limit).reset_index()
+        table.columns = [name, 'visits']
+        return table
+
+
+class StreamingAggregator(LogAggregate):
+    """
+    Agregado que se actualiza con cada registro parseado, sin acumular los registros.
+
+    Sirve como destino de los lectores de SquidLogAnalyzer en lugar de LogColumns
+    (append() y append_columns()), o para consumir cualquier generador de registros
+    con consume(). Tiene log_path y detected_format para pasarlo directamente a
+    SquidReportGenerator.
+
+    Con topk_capacity, los sitios (globales y por usuario) y las URLs por usuario se
+    cuentan con resúmenes SpaceSaving en lugar de un contador por clave distinta; las
+    tablas resultantes incluyen la columna visits_error con la sobrestimación máxima
+    de cada fila y get_approximation() devuelve las cotas globales.
+    """
+
+    def __init__(self, log_path=None, detected_format=None, time_window=None, topk_capacity=None,
+                 user_topk_capacity=None):
+        """
+        Args:
+            log_path: Ruta del log, que se muestra en el informe
+            detected_format: Formato del log, que se muestra en el informe
+            time_window: Tupla (inicio, fin) en segundos de hora local; solo se agregan
+                los registros dentro del rango (ambos extremos incluidos)
+            topk_capacity: Contadores del top-K aproximado de sitios; None para valores exactos
+            user_topk_capacity: Contadores por usuario para sus sitios y URLs (por defecto
+                topk_capacity)
+        """
+        super().__init__()
+        self.log_path = log_path
+        self.detected_format = detected_format
+        self.time_window = time_window
+        self.topk_capacity = topk_capacity
+        self.user_topk_capacity = user_topk_capacity or topk_capacity
+        self.domain_sketch = SpaceSaving(topk_capacity) if topk_capacity else None
+
+    def __len__(self):
+        return self.total_requests
+
+    def consume(self, records):
+        """Agrega todos los registros de un iterable o generador. Devuelve el propio agregado."""
+        for record in records:
+            self.append(record)
+        return self
+
+    def append(self, record):
+        """
+        Agrega un registro en el orden de LOG_COLUMNS. Devuelve False si se descartó, por
+        quedar fuera de time_window o por tener valores numéricos fuera del rango que
+        admite LogColumns (línea corrupta).
+        """
+        (timestamp, client_ip, username, method, url, domain,
+         status_code, size, referer, user_agent, squid_status, content_type) = record
+        if not (-2**63 <= timestamp < 2**63 and -2**31 <= status_code < 2**31 and -2**63 <= size < 2**63):
+            return False
+        if self.time_window is not None:
+            start, end = self.time_window
+            if (start is not None and timestamp < start) or (end is not None and timestamp > end):
+                return False
+
+        self.total_requests += 1
+        self.total_bytes += size
+        if self.min_timestamp is None:
+            self.min_timestamp = self.max_timestamp = timestamp
+        elif timestamp < self.min_timestamp:
+            self.min_timestamp = timestamp
+        elif timestamp > self.max_timestamp:
+            self.max_timestamp = timestamp
+        if client_ip is not None:
+            self.client_ips.add(client_ip)
+
+        hour = timestamp // 3600
+        self._add_traffic(self.hours, hour, size)
+        sketches = self.distinct.get(hour)
+        if sketches is None:
+            sketches = self._hour_sketches(hour)
+        sketches['domains'].add(domain)
+        if client_ip is not None:
+            sketches['ips'].add(client_ip)
+        if self.domain_sketch is None:
+            self._add_traffic(self.domains, domain, size)
+        else:
+            self.domain_sketch.add(domain, 1, size)
+        self.status_codes[status_code] = self.status_codes.get(status_code, 0) + 1
+        self.content_types[content_type] = self.content_types.get(content_type, 0) + 1
+
+        if username is not None:
+            sketches['users'].add(username)
+            self._add_traffic(self.users, username, size)
+            details = self.user_details.get(username)
+            if details is None:
+                details = self.user_details[username] = self._new_user_details()
+            for counter, value in ((details['status_codes'], status_code), (details['content_types'], content_type)):
+                counter[value] = counter.get(value, 0) + 1
+            if self.domain_sketch is None:
+                for counter, value in ((details['domains'], domain), (details['urls'], url)):
+                    counter[value] = counter.get(value, 0) + 1
+            else:
+                details['domains'].add(domain)
+                details['urls'].add(url)
+        return True
+
+    def append_columns(self, columns):
+        """Agrega un bloque de registros ya separado por columnas (modo bulk)."""
+        frame = pd.DataFrame({
+            'timestamp': pd.array(columns['timestamp'], dtype='int64'),
+            'client_ip': columns['client_ip'],
+            'username': columns['username'],
+            'url': columns['url'],
+            'domain': columns['domain'],
+            'status_code': pd.array(columns['status_code'], dtype='int64'),
+            'size': pd.array(columns['size'], dtype='int64'),
+            'content_type': columns['content_type']
+        })
+        self.merge(LogAggregate.from_frame(frame, self.time_window))
+
+    def merge(self, other):
+        """Añade los contadores de otro agregado; en modo aproximado sus sitios pasan al resumen."""
+        super().merge(other)
+        if self.domain_sketch is not None:
+            for domain, (visits, traffic) in self.domains.items():
+                self.domain_sketch.add(domain, visits, traffic)
+            self.domains = {}
+        return self
+
+    def _new_user_details(self):
+        if self.domain_sketch is None:
+            return super()._new_user_details()
+        return {'domains': SpaceSaving(self.user_topk_capacity), 'status_codes': {}, 'content_types': {},
+                'urls': SpaceSaving(self.user_topk_capacity)}
+
+    def get_top_domains(self, limit=20, excluded=None):
+        """Obtiene los dominios más visitados; en modo aproximado, con la columna visits_error."""
+        if self.domain_sketch is None:
+            return super().get_top_domains(limit, excluded)
+
+        domain_visits = pd.DataFrame(self.domain_sketch.top(limit, excluded),
+                                     columns=['domain', 'visits', 'visits_error', 'traffic'])
+        if domain_visits.empty:
+            return pd.DataFrame(columns=['domain', 'visits', 'traffic', 'traffic_readable', 'visits_error'])
+
+        domain_visits['traffic_readable'] = domain_visits['traffic'].apply(bytes_to_human_readable)
+        return domain_visits[['domain', 'visits', 'traffic', 'traffic_readable', 'visits_error']]
+
+    def get_user_data(self, username):
+        """Obtiene datos específicos para un usuario; en modo aproximado incluye sus cotas de error."""
+        user_data = super().get_user_data(username)
+        if user_data is not None and self.domain_sketch is not None:
+            details = self.user_details[username]
+            user_data['approximation'] = {
+                'capacity': self.user_topk_capacity,
+                'domains_max_error': details['domains'].max_error,
+                'urls_max_error': details['urls'].max_error
+            }
+        return user_data
+
+    def get_approximation(self):
+        """Cotas de error de las tablas aproximadas, o None si todos los valores son exactos."""
+        if self.domain_sketch is None:
+            return None
+        return {
+            'method': 'space-saving',
+            'capacity': self.topk_capacity,
+            'user_capacity': self.user_topk_capacity,
+            'total_visits': self.domain_sketch.total,
+            'domains_max_error': self.domain_sketch.max_error,
+            # Con `capacity` contadores ningún error supera total / capacity
+            'error_bound_rate': 1 / self.topk_capacity,
+            'traffic_is_lower_bound': True
+        }
+
+    def _top_table(self, counts, name, limit):
+        if not isinstance(counts, SpaceSaving):
+            return super()._top_table(counts, name, limit)
+        return pd.DataFrame([(key, count, error) for key, count, error, _ in counts.top(limit)],
+                            columns=[name, 'visits', 'visits_error'])
+
+    @staticmethod
+    def _add_traffic(counters, key, size):
+        entry = counters.get(key)
+        if entry is None:
+            counters[key] = [1, size]
+        else:
+            entry[0] += 1
+            entry[1] += size
+
+
+def bytes_to_human_readable(bytes_value):
+    """Convierte bytes a formato legible por humanos."""
+    if bytes_value == 0:
+        return "0 B"
+
+    size_names = ["B", "KB", "MB", "GB", "TB", "PB"]
+    i = 0
+    while bytes_value >= 1024 and i < len(size_names) - 1:
+        bytes_value /= 1024
+        i += 1
+
+    return f"{bytes_value:.2f} {size_names[i]}"
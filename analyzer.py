@@ -1,62 +1,1293 @@
 import pandas as pd
 import re
+import csv
 import os
+import json
+import pickle
+import hashlib
+import inspect
+import io
+import time
+import calendar
+import mmap
+import glob
+import gzip
+import bz2
+import lzma
+from array import array
+from collections import deque
+from functools import lru_cache, wraps
+from itertools import islice, repeat
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from urllib.parse import urlparse
 import numpy as np
 import logging
 from dateutil import parser as date_parser
+from aggregator import LogAggregate, StreamingAggregator, bytes_to_human_readable
+from column_cache import ColumnCache
 
 logger = logging.getLogger('SLAM.Analyzer')
 
+# Patrones de cada formato de log (se aplican con re.match desde el inicio de la línea)
+LOG_PATTERNS = {
+    'detailed': r'(\S+) (\S+) "(.*?)" (\d+) (\d+|-) "(.*?)" (\S+)',
+    'common': r'(\S+) \S+ (\S+) \[(.*?)\] "(.*?)" (\d+) (\d+|-)',
+    'squid_native': r'(\d+\.\d+)\s+\d+\s+(\S+)\s+(\S+)\/(\d+)\s+(\d+)\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\/(\S+)\s+(\S+)',
+    'custom': r'(\S+) (\S+) (\S+) \[(.*?)\] (\d+) (\S+) (\S+) (\S+) "(.*?)"',
+    'custom_new': r'(\S+) (\S+) (\S+) \[(.*?)\] (\d+) (\S+)\/(\d+) (\S+) (\S+) "(.*?)"'
+}
+
+# Los mismos patrones compilados sobre bytes para el lector mmap; el \s* inicial equivale
+# al strip() que se aplica a las líneas decodificadas
+LOG_BYTE_PATTERNS = {
+    name: re.compile(rb'\s*(?:' + pattern.encode() + rb')') for name, pattern in LOG_PATTERNS.items()
+}
+
+# Los mismos patrones compilados para el parser por bloques, que los aplica a las líneas sin recortar
+LOG_CHUNK_PATTERNS = {
+    name: re.compile(r'\s*(?:' + pattern + ')') for name, pattern in LOG_PATTERNS.items()
+}
+
+# Espacios que str.split() separa y el lector C de pandas no (solo separa por ' ' y '\t'), y el
+# carácter nulo: las líneas squid_native que los contienen se parsean con el parser de línea
+_UNSPLIT_ASCII = '\x00\x0b\x0c\r\x1c\x1d\x1e\x1f'
+_UNSPLIT_CHARACTERS = _UNSPLIT_ASCII + ('\x85\xa0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008'
+                                        '\u2009\u200a\u2028\u2029\u202f\u205f\u3000')
+
+# Timestamp epoch del formato squid_native ('1760000000.134')
+_EPOCH_PATTERN = re.compile(r'[0-9]+\.[0-9]+')
+
+# Orden de los campos en las tuplas que devuelven los parsers de línea
+LOG_COLUMNS = (
+    'timestamp', 'client_ip', 'username', 'method', 'url', 'domain',
+    'status_code', 'size', 'referer', 'user_agent', 'squid_status', 'content_type'
+)
+
+# Versión de los parsers: cambiarla invalida las columnas guardadas en la caché
+PARSER_VERSION = 1
+
+# Bytes por debajo de los cuales la búsqueda por timestamp deja de dividir y lee secuencialmente
+SEEK_BLOCK = 64 * 1024
+
+# Columnas de texto con pocos valores distintos que el DataFrame guarda como category
+CATEGORY_COLUMNS = ('username', 'client_ip', 'domain', 'method', 'squid_status', 'content_type', 'user_agent',
+                    'day_of_week')
+
+
+# Extensiones que identifican cada tipo de contenido, en orden de prioridad
+CONTENT_TYPE_EXTENSIONS = (
+    ('image', ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.svg', '.ico')),
+    ('document', ('.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.txt', '.csv')),
+    ('media', ('.mp3', '.mp4', '.avi', '.mov', '.flv', '.wav', '.ogg', '.webm', '.mkv')),
+    ('web', ('.html', '.htm', '.php', '.asp', '.aspx', '.jsp', '.do')),
+    ('web-resource', ('.js', '.css', '.json', '.xml')),
+    ('archive', ('.zip', '.rar', '.7z', '.tar', '.gz', '.bz2')),
+    ('executable', ('.exe', '.msi', '.bin', '.sh', '.bat', '.apk')),
+    ('font', ('.ttf', '.otf', '.woff', '.woff2', '.eot')),
+)
+
+# Tipo de contenido por extensión final de la ruta, sin el punto (si una extensión aparece
+# en varios tipos gana el primero de CONTENT_TYPE_EXTENSIONS)
+EXTENSION_CONTENT_TYPES = {
+    extension[1:]: content_type
+    for content_type, extensions in reversed(CONTENT_TYPE_EXTENSIONS)
+    for extension in extensions
+}
+
+# Tipo de contenido según el tipo MIME que registra Squid: primero se busca el tipo completo
+# y, si no aparece, su prefijo principal (image/, video/, ...)
+MIME_CONTENT_TYPES = {
+    'text/html': 'web',
+    'application/xhtml+xml': 'web',
+    'text/css': 'web-resource',
+    'text/javascript': 'web-resource',
+    'application/javascript': 'web-resource',
+    'application/x-javascript': 'web-resource',
+    'application/json': 'web-resource',
+    'application/xml': 'web-resource',
+    'text/xml': 'web-resource',
+    'application/pdf': 'document',
+    'application/msword': 'document',
+    'application/vnd.ms-excel': 'document',
+    'application/vnd.ms-powerpoint': 'document',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document': 'document',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': 'document',
+    'application/vnd.openxmlformats-officedocument.presentationml.presentation': 'document',
+    'text/plain': 'document',
+    'text/csv': 'document',
+    'application/zip': 'archive',
+    'application/x-rar-compressed': 'archive',
+    'application/vnd.rar': 'archive',
+    'application/x-7z-compressed': 'archive',
+    'application/x-tar': 'archive',
+    'application/gzip': 'archive',
+    'application/x-gzip': 'archive',
+    'application/x-bzip2': 'archive',
+    'application/x-msdownload': 'executable',
+    'application/x-msi': 'executable',
+    'application/x-msdos-program': 'executable',
+    'application/vnd.android.package-archive': 'executable',
+    'application/x-sh': 'executable',
+    'application/x-executable': 'executable',
+    'application/font-woff': 'font',
+    'application/x-font-ttf': 'font',
+    'application/vnd.ms-fontobject': 'font',
+}
+MIME_PREFIX_CONTENT_TYPES = {
+    'image': 'image',
+    'video': 'media',
+    'audio': 'media',
+    'font': 'font',
+}
+
+# Descompresores de los logs rotados, por extensión; se leen en streaming, sin archivos temporales
+COMPRESSED_OPENERS = {
+    '.gz': gzip.open,
+    '.bz2': bz2.open,
+    '.xz': lzma.open
+}
+
+# Meses de los timestamps '%d/%b/%Y:%H:%M:%S %z' de los formatos common, custom y custom_new
+_MONTHS = {
+    'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6,
+    'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12
+}
+
+# Entradas de la caché de dominios (esquema + autoridad -> dominio)
+_DOMAIN_CACHE_SIZE = 65536
+
+# Límites de los arrays tipados de LogColumns
+_INT32_MAX = 2**31 - 1
+_INT64_MAX = 2**63 - 1
+
+
+@lru_cache(maxsize=4096)
+def _wallclock_offset(bucket):
+    """
+    Desfase de la hora local en la franja de 15 minutos `bucket` (epoch // 900); los cambios
+    de horario siempre caen en esos límites, así que basta calcularlo una vez por franja.
+    """
+    return time.localtime(bucket * 900).tm_gmtoff
+
+
+def _wallclock_seconds(epoch):
+    """Convierte un epoch UTC a segundos de la hora local (reloj de pared, sin zona horaria)."""
+    seconds = int(epoch)
+    return seconds + _wallclock_offset(seconds // 900)
+
+
+def _epoch_from_wallclock(seconds):
+    """Inversa de _wallclock_seconds: epoch UTC de unos segundos de hora local."""
+    return time.mktime(time.gmtime(seconds)[:8] + (-1,))
+
+
+def _now_wallclock():
+    """Devuelve la hora local actual en segundos de reloj de pared."""
+    return _wallclock_seconds(time.time())
+
+
+def _wallclock_seconds_array(epoch):
+    """
+    Versión vectorizada de _wallclock_seconds: el desfase se busca una vez por franja de
+    15 minutos del bloque.
+    """
+    seconds = np.trunc(np.asarray(epoch, dtype=np.float64))
+    buckets, inverse = np.unique(seconds // 900, return_inverse=True)
+    offsets = np.empty(len(buckets))
+    for i, bucket in enumerate(buckets):
+        try:
+            offsets[i] = _wallclock_offset(int(bucket))
+        except (OverflowError, OSError, ValueError):
+            offsets[i] = np.nan
+    wallclock = seconds + offsets[inverse.reshape(-1)]
+    return np.where(np.isfinite(wallclock), wallclock, _now_wallclock()).astype(np.int64)
+
+
+def _parse_clf_timestamp(value):
+    """
+    Decodifica un timestamp '%d/%b/%Y:%H:%M:%S %z' (p. ej. '09/Oct/2025:08:53:20 -0400') a
+    segundos de hora local, tal como aparece en el log. El desplazamiento se ignora, igual
+    que hacía dateutil al convertir con timetuple().
+    
+    Returns:
+        Segundos, o None si el texto no tiene exactamente ese formato
+    """
+    if len(value) < 20 or value[2] != '/' or value[6] != '/' or value[11] != ':' \
+            or value[14] != ':' or value[17] != ':' or (len(value) > 20 and value[20] != ' '):
+        return None
+    month = _MONTHS.get(value[3:6])
+    if month is None:
+        return None
+    try:
+        # datetime valida los rangos (día del mes, hora, etc.)
+        moment = datetime(int(value[7:11]), month, int(value[0:2]),
+                          int(value[12:14]), int(value[15:17]), int(value[18:20]))
+    except ValueError:
+        return None
+    return calendar.timegm(moment.timetuple())
+
+
+def _parse_clf_timestamps(values):
+    """
+    Versión vectorizada de _parse_clf_timestamp para una secuencia de textos.
+    
+    Returns:
+        Array float64 de segundos; NaN en los textos que no tienen exactamente ese formato con
+        dígitos ASCII o cuya fecha no es válida (se decodifican uno a uno)
+    """
+    values = list(values)
+    count = len(values)
+    lengths = np.fromiter(map(len, values), dtype=np.int64, count=count)
+    # Código de cada uno de los 21 primeros caracteres (0 a partir del final del texto)
+    chars = np.array(values, dtype='U21').view(np.uint32).reshape(count, 21).astype(np.int64)
+    
+    valid = (lengths >= 20) & ((lengths == 20) | (chars[:, 20] == ord(' ')))
+    for position, separator in ((2, '/'), (6, '/'), (11, ':'), (14, ':'), (17, ':')):
+        valid &= chars[:, position] == ord(separator)
+    
+    def number(start, end):
+        nonlocal valid
+        digits = chars[:, start:end] - ord('0')
+        valid &= ((digits >= 0) & (digits <= 9)).all(axis=1)
+        return digits @ (10 ** np.arange(end - start - 1, -1, -1))
+    
+    day, year = number(0, 2), number(7, 11)
+    hour, minute, second = number(12, 14), number(15, 17), number(18, 20)
+    
+    names = (chars[:, 3] << 42) | (chars[:, 4] << 21) | chars[:, 5]
+    month = np.zeros(count, dtype=np.int64)
+    for name, value in _MONTHS.items():
+        month[names == (ord(name[0]) << 42) | (ord(name[1]) << 21) | ord(name[2])] = value
+    
+    # Los mismos rangos que valida datetime
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    month_days = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])[month] + (leap & (month == 2))
+    valid &= (month > 0) & (year >= 1) & (day >= 1) & (day <= month_days) & (hour < 24) & (minute < 60) & (second < 60)
+    
+    # Días desde 1970-01-01 del calendario gregoriano proléptico
+    shifted_year = year - (month <= 2)
+    era = shifted_year // 400
+    year_of_era = shifted_year - era * 400
+    day_of_year = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    days = era * 146097 + day_of_era - 719468
+    
+    seconds = days * 86400 + hour * 3600 + minute * 60 + second
+    return np.where(valid, seconds.astype(np.float64), np.nan)
+
+
+@lru_cache(maxsize=_DOMAIN_CACHE_SIZE)
+def _domain_from_url(url):
+    """Extrae el dominio de una URL con urlparse; el resultado se guarda en una caché LRU acotada."""
+    try:
+        if url == '-':
+            return '-'
+            
+        # Manejar URLs con y sin protocolo
+        if '://' not in url:
+            url = 'http://' + url
+            
+        parsed_url = urlparse(url)
+        domain = parsed_url.netloc
+        
+        # Si no hay dominio, intentar extraerlo de otra manera
+        if not domain and ':' in url:
+            domain = url.split(':', 1)[0]
+        
+        return domain if domain else url
+    except:
+        return url
+
+
+@lru_cache(maxsize=1024)
+def _content_type_from_mime(mime_type):
+    """Tipo de contenido a partir del tipo MIME registrado, o None si no es concluyente ('-', octet-stream...)."""
+    mime = mime_type.split(';', 1)[0].strip().lower()
+    content_type = MIME_CONTENT_TYPES.get(mime)
+    if content_type is None:
+        content_type = MIME_PREFIX_CONTENT_TYPES.get(mime.partition('/')[0])
+    return content_type
+
+
+def _is_compressed(path):
+    """Indica si el log está comprimido (según su extensión)."""
+    return os.path.splitext(path)[1] in COMPRESSED_OPENERS
+
+
+def _open_log_file(path):
+    """Abre un log en modo binario, descomprimiéndolo al vuelo si hace falta."""
+    opener = COMPRESSED_OPENERS.get(os.path.splitext(path)[1], open)
+    return opener(path, 'rb')
+
+
+def _rotation_index(path):
+    """Número de rotación de logrotate (access.log.2.gz -> 2); 0 para el log activo."""
+    match = re.search(r'\.(\d+)(?:\.(?:gz|bz2|xz))?$', path)
+    return int(match.group(1)) if match else 0
+
+
+def resolve_log_files(log_path):
+    """
+    Devuelve los archivos que corresponden a log_path, del más antiguo al más reciente.
+    
+    Args:
+        log_path: Archivo de log, directorio (se usa DEFAULT_CONFIG['rotated_log_pattern'])
+            o patrón glob como '/var/log/squid/access.log*'
+    
+    Returns:
+        Lista de rutas ordenada por número de rotación (descendente) y fecha de modificación
+    """
+    from config import DEFAULT_CONFIG
+    
+    if os.path.isfile(log_path):
+        return [log_path]
+    if os.path.isdir(log_path):
+        pattern = os.path.join(log_path, DEFAULT_CONFIG['rotated_log_pattern'])
+    else:
+        pattern = log_path
+    
+    files = [path for path in glob.glob(pattern) if os.path.isfile(path)]
+    return sorted(files, key=lambda path: (-_rotation_index(path), os.path.getmtime(path), path))
+
+
+def _safe_int(value):
+    """int() que devuelve NaN en lugar de lanzar una excepción."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _to_int_series(values):
+    """Convierte una serie de cadenas numéricas a números; las inválidas quedan como NaN."""
+    if values.dtype.kind in 'iu':
+        return values
+    numbers = pd.to_numeric(values, errors='coerce')
+    pending = numbers.isna() & values.notna()
+    if pending.any():
+        # Dígitos no ASCII y otras formas que int() acepta pero to_numeric no
+        numbers = numbers.astype(object)
+        numbers[pending] = values[pending].map(_safe_int)
+        numbers = pd.to_numeric(numbers, errors='coerce')
+    return numbers
+
+
+def _is_ascii_number(value):
+    """Indica si el texto es un número entero sin signo escrito solo con dígitos ASCII."""
+    return value.isascii() and value.isdecimal()
+
+
+def _map_distinct(values, func):
+    """Aplica una función vectorizada una sola vez por cada valor distinto de la serie."""
+    codes, uniques = pd.factorize(values)
+    mapped = np.asarray(func(pd.Series(uniques, dtype=object)), dtype=object)
+    return pd.Series(mapped[codes], index=values.index, dtype=object)
+
+
+def _to_object_list(values):
+    """Convierte una serie a lista de Python, usando None para los valores nulos."""
+    return values.astype(object).where(values.notna(), None).tolist()
+
+
+def _value_counts(values):
+    """
+    Series.value_counts() que da el mismo resultado para columnas category que para texto:
+    omite las categorías sin registros y desempata por orden de aparición en la serie.
+    """
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        return values.value_counts()
+    
+    codes = values.cat.codes.to_numpy()
+    codes = codes[codes >= 0]
+    present = pd.unique(codes)
+    counts = np.bincount(codes, minlength=len(values.cat.categories))[present]
+    index = pd.Index(values.cat.categories[present], name=values.name)
+    return pd.Series(counts, index=index, name='count').sort_values(ascending=False, kind='stable')
+
+
+def _hashable(value):
+    """Convierte listas, conjuntos y diccionarios en tuplas para usarlos en una clave de caché."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(_hashable(item) for item in value))
+    if isinstance(value, dict):
+        return tuple(sorted((key, _hashable(item)) for key, item in value.items()))
+    return value
+
+
+def _copy_result(value):
+    """Copia un resultado memorizado para que quien lo reciba pueda modificarlo."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy()
+    if isinstance(value, dict):
+        return {key: _copy_result(item) for key, item in value.items()}
+    return value
+
+
+def _memoized(method):
+    """
+    Memoriza el resultado de una consulta del analizador según sus argumentos (con los valores
+    por defecto aplicados). La caché se vacía cuando cambian self.df o self.aggregate, y cada
+    llamada devuelve una copia del resultado.
+    """
+    signature = inspect.signature(method)
+    
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self._ensure_loaded()
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        key = (method.__name__,) + tuple(_hashable(value) for value in list(bound.arguments.values())[1:])
+        results = self._current_results()
+        if key not in results:
+            results[key] = method(self, *args, **kwargs)
+        return _copy_result(results[key])
+    return wrapper
+
+
+class LogColumns:
+    """
+    Acumula los registros parseados por columnas en lugar de un diccionario por línea.
+    
+    Los campos numéricos se guardan en arrays tipados (los timestamps como segundos
+    de hora local) y el resto en listas de cadenas, de forma que el DataFrame se
+    construye directamente a partir de las columnas.
+    """
+    
+    def __init__(self):
+        self.timestamp = array('q')
+        self.status_code = array('i')
+        self.size = array('q')
+        self.client_ip = []
+        self.username = []
+        self.method = []
+        self.url = []
+        self.domain = []
+        self.referer = []
+        self.user_agent = []
+        self.squid_status = []
+        self.content_type = []
+    
+    def __len__(self):
+        return len(self.timestamp)
+    
+    def append(self, record):
+        """Añade un registro en el orden de LOG_COLUMNS. Devuelve False si se descartó."""
+        (timestamp, client_ip, username, method, url, domain,
+         status_code, size, referer, user_agent, squid_status, content_type) = record
+        try:
+            self.timestamp.append(timestamp)
+            self.status_code.append(status_code)
+            self.size.append(size)
+        except OverflowError:
+            # Valores numéricos fuera de rango (línea corrupta): se descarta el registro
+            del self.timestamp[len(self.size):]
+            del self.status_code[len(self.size):]
+            return False
+        self.client_ip.append(client_ip)
+        self.username.append(username)
+        self.method.append(method)
+        self.url.append(url)
+        self.domain.append(domain)
+        self.referer.append(referer)
+        self.user_agent.append(user_agent)
+        self.squid_status.append(squid_status)
+        self.content_type.append(content_type)
+        return True
+    
+    def append_columns(self, columns):
+        """Añade un bloque de registros ya separado por columnas (listas o arrays de NumPy)."""
+        for column in LOG_COLUMNS:
+            target = getattr(self, column)
+            if isinstance(target, array):
+                target.frombytes(np.asarray(columns[column], dtype=f'i{target.itemsize}').tobytes())
+            else:
+                target.extend(columns[column])
+    
+    def extend(self, other):
+        """Añade al final todos los registros de otro LogColumns."""
+        for column in LOG_COLUMNS:
+            getattr(self, column).extend(getattr(other, column))
+    
+    def tail(self, start):
+        """Devuelve un LogColumns con los registros desde la posición `start`."""
+        columns = LogColumns()
+        for column in LOG_COLUMNS:
+            getattr(columns, column).extend(getattr(self, column)[start:])
+        return columns
+    
+    def as_numpy(self, column):
+        """Devuelve una columna numérica como array int64 de NumPy."""
+        values = getattr(self, column)
+        if not len(values):
+            return np.array([], dtype=np.int64)
+        return np.frombuffer(values, dtype=f'i{values.itemsize}').astype(np.int64)
+    
+    def to_dataframe(self):
+        """Construye un DataFrame a partir de las columnas, sin registros intermedios."""
+        data = {}
+        for column in LOG_COLUMNS:
+            values = getattr(self, column)
+            if isinstance(values, array):
+                values = self.as_numpy(column)
+                data[column] = pd.to_datetime(values, unit='s') if column == 'timestamp' else values
+            else:
+                data[column] = values
+        return pd.DataFrame(data)
+
+
+def _parse_byte_range(log_path, format_name, start, end, bulk, chunk_size, use_mmap, time_window):
+    """
+    Parsea el rango [start, end) del archivo y devuelve su agregado parcial.
+    Se ejecuta en un proceso hijo, por eso es una función de módulo.
+    """
+    analyzer = SquidLogAnalyzer(log_path, format_name, bulk=bulk, chunk_size=chunk_size, use_mmap=use_mmap)
+    analyzer.log_data = LogColumns()
+    with _open_log_file(log_path) as f:
+        analyzer._read_lines(f, format_name, start, end)
+    return LogAggregate.from_columns(analyzer.log_data, time_window)
+
+
 class SquidLogAnalyzer:
     """Clase para analizar logs de Squid."""
     
-    def __init__(self, log_path, log_format='auto'):
+    def __init__(self, log_path, log_format='auto', incremental=False, state_dir=None, bulk=False, chunk_size=None,
+                 workers=1, use_mmap=False, streaming=False, approx_top=None, use_cache=None, cache_dir=None):
         """
         Inicializa el analizador con la ruta al archivo de log y el formato.
         
         Args:
-            log_path: Ruta al archivo de log
+            log_path: Ruta al archivo de log; también admite un directorio, un patrón glob o un
+                log comprimido (.gz, .bz2, .xz), en cuyo caso se leen todos los archivos rotados
             log_format: Formato del log ('auto', 'detailed', 'common', 'squid_native', 'custom', 'custom_new')
+            incremental: Si es True, solo se procesan las líneas añadidas desde la última ejecución
+            state_dir: Directorio donde se guardan los checkpoints (por defecto STATE_DIR)
+            bulk: Si es True, las líneas se parsean por bloques con operaciones vectorizadas de pandas
+            chunk_size: Líneas por bloque en modo bulk (por defecto DEFAULT_CONFIG['bulk_chunk_size'])
+            workers: Número de procesos; con más de uno el archivo se parsea por rangos de bytes
+                en paralelo y solo se conservan los agregados (sin DataFrame de registros)
+            use_mmap: Si es True, el archivo se lee mediante mmap y las líneas se parsean como bytes,
+                decodificando solo los campos que se guardan (no aplica en modo bulk)
+            streaming: Si es True, los registros se agregan a medida que se parsean en un
+                StreamingAggregator y no se construye el DataFrame; la memoria depende del
+                número de usuarios, dominios y URLs distintos, no del número de líneas
+            approx_top: Número de contadores del top-K aproximado de sitios y URLs (SpaceSaving);
+                implica streaming. Con None los valores son exactos
+            use_cache: Si es True, las columnas parseadas se guardan en una caché en disco y en
+                las siguientes ejecuciones solo se parsean las líneas añadidas al final del archivo.
+                Con None se usa DEFAULT_CONFIG['column_cache']. Solo aplica a un archivo sin
+                comprimir leído con un proceso, sin streaming ni lectura incremental
+            cache_dir: Directorio de la caché de columnas (por defecto CACHE_DIR/columns)
         """
+        from config import DEFAULT_CONFIG, CACHE_DIR
+        
         self.log_path = log_path
         self.log_format = log_format
+        self.incremental = incremental
+        self.state_dir = state_dir
+        self.bulk = bulk
+        self.chunk_size = chunk_size or DEFAULT_CONFIG['bulk_chunk_size']
+        self.workers = max(1, workers or 1)
+        self.use_mmap = use_mmap
+        self.approx_top = approx_top
+        self.streaming = streaming or bool(approx_top)
+        if self.workers > 1 and incremental:
+            logger.warning("La lectura incremental no admite varios procesos; se usará un solo proceso")
+            self.workers = 1
+        self.multi_file = not os.path.isfile(log_path) or _is_compressed(log_path)
+        if self.multi_file and incremental:
+            logger.warning("La lectura incremental solo admite un archivo sin comprimir; se leerán los archivos completos")
+            self.incremental = False
+        if use_cache is None:
+            use_cache = DEFAULT_CONFIG['column_cache']
+        use_cache = use_cache and self.workers == 1 and not self.streaming and not self.incremental and not self.multi_file
+        self.column_cache = None
+        if use_cache:
+            self.column_cache = ColumnCache(cache_dir or os.path.join(CACHE_DIR, 'columns'))
+            self.column_cache.prune(DEFAULT_CONFIG['column_cache_max_age_days'] * 86400)
+        self._cached_frame = None  # Registros leídos de la caché, anteriores a los de log_data
+        self._cache_entry = None  # Manifiesto de la caché al que siguen los registros de log_data
+        self._cache_update = None  # Manifiesto con el que se guardará la caché al construir el DataFrame
+        self._sources = []  # (hash de la primera línea, ruta, byte inicial, primera fila) de cada archivo leído
         self.df = None
+        self.aggregate = None  # LogAggregate cuando se procesa con varios procesos o en modo streaming
+        # Resultados memorizados de las consultas y los datos (df, aggregate) de los que salen
+        self._results = {}
+        self._results_source = (None, None)
+        # (inicio, fin) en segundos de hora local: los modos sin DataFrame solo agregan los registros
+        # del rango; en modo DataFrame solo se leen las particiones de la caché que se solapan con
+        # él y se descartan los registros de fuera
+        self.time_window = None
         self.log_lines = 0
         self.detected_format = None
+        self.new_records_start = 0
+        # Último timestamp textual decodificado: muchas líneas seguidas comparten el mismo segundo
+        self._last_timestamp_str = None
+        self._last_timestamp = None
         
     def read_log_file(self):
         """Lee el archivo de log de Squid y lo procesa según el formato especificado."""
-        self.log_data = []
+        if self.workers > 1:
+            return self._read_log_file_parallel()
+        if self.multi_file:
+            return self._read_log_files()
+        
+        self.log_data = self._new_log_data()
+        self.new_records_start = 0
+        self._cached_frame = None
+        self._cache_entry = None
+        self._cache_update = None
+        self._sources = []
+        start_offset = 0
+        checkpoint = None
+        cache_entry = None
         
         try:
-            with open(self.log_path, 'r', encoding='utf-8', errors='ignore') as f:
+            with open(self.log_path, 'rb') as f:
+                # Retomar desde el último checkpoint si el archivo no fue rotado
+                if self.incremental:
+                    checkpoint = self._load_checkpoint(f)
+                    if checkpoint:
+                        self.log_data = self._load_state(checkpoint)
+                        if self.log_data is None:
+                            checkpoint = None
+                            self.log_data = self._new_log_data()
+                        else:
+                            start_offset = checkpoint['offset']
+                            self.new_records_start = len(self.log_data)
+                elif self.column_cache is not None:
+                    cache_entry = self._cache_entry = self._load_cache_entry(f)
+                    if cache_entry:
+                        start_offset = cache_entry['offset']
+                
                 # Leer las primeras líneas para detectar el formato si es 'auto'
-                if self.log_format == 'auto':
-                    sample_lines = [next(f) for _ in range(10) if f]
-                    f.seek(0)  # Volver al inicio del archivo
+                if checkpoint:
+                    format_to_use = checkpoint['format']
+                    self.detected_format = format_to_use
+                elif cache_entry:
+                    format_to_use = cache_entry['format']
+                    self.detected_format = cache_entry['detected_format']
+                elif self.log_format == 'auto':
+                    sample_lines = [line.decode('utf-8', errors='ignore') for line in islice(f, 10)]
                     self.detected_format = self._detect_log_format(sample_lines)
                     logger.info(f"Formato de log detectado: {self.detected_format}")
                     format_to_use = self.detected_format
                 else:
                     format_to_use = self.log_format
                 
-                # Seleccionar el parser adecuado según el formato
-                parser_method = self._get_parser_for_format(format_to_use)
+                # Sin checkpoint ni caché, con una ventana de tiempo basta leer el tramo del archivo que la contiene
+                end_offset = None
+                if not checkpoint and self.column_cache is None:
+                    start_offset, end_offset = self._window_byte_range(f, format_to_use)
+                
+                self._add_source(f, self.log_path, 0, 0)
+                offset, last_line_offset, last_line = self._read_lines(f, format_to_use, start_offset, end_offset)
+                if last_line is None and checkpoint:
+                    last_line_offset = checkpoint['last_line_offset']
                 
-                for line in f:
-                    # Procesar cada línea según el formato detectado/especificado
-                    parsed_line = parser_method(line.strip())
-                    if parsed_line:
-                        self.log_data.append(parsed_line)
+                file_stat = os.fstat(f.fileno())
             
-            self.log_lines = len(self.log_data)
+            if checkpoint:
+                logger.info(f"Lectura incremental: {len(self.log_data) - self.new_records_start} registros nuevos "
+                            f"desde el byte {start_offset}")
+            
+            if self.incremental:
+                if last_line is None and checkpoint:
+                    last_line_hash = checkpoint['last_line_hash']
+                else:
+                    last_line_hash = self._hash_line(last_line) if last_line is not None else None
+                self._save_checkpoint({
+                    'log_path': os.path.abspath(self.log_path),
+                    'format': format_to_use,
+                    'inode': file_stat.st_ino,
+                    'size': file_stat.st_size,
+                    'offset': offset,
+                    'last_line_offset': last_line_offset,
+                    'last_line_hash': last_line_hash
+                }, checkpoint)
+            
+            if cache_entry:
+                cached_rows = len(self._cached_frame) if self._cached_frame is not None else 0
+                logger.info(f"Caché de columnas: {cached_rows} de {cache_entry['rows']} registros hasta el byte "
+                            f"{start_offset}, {len(self.log_data)} registros nuevos")
+            
+            # Sin líneas nuevas la caché ya está al día; con una última línea incompleta (aún se
+            # está escribiendo) no se guarda, porque la siguiente lectura empezaría tras ella
+            if self.column_cache is not None and last_line is not None:
+                if last_line.endswith(b'\n'):
+                    self._cache_update = {
+                        'log_path': os.path.abspath(self.log_path),
+                        'format': format_to_use,
+                        'detected_format': self.detected_format,
+                        'parser_version': PARSER_VERSION,
+                        'inode': file_stat.st_ino,
+                        'size': file_stat.st_size,
+                        'mtime': file_stat.st_mtime_ns,
+                        'offset': offset,
+                        'last_line_offset': last_line_offset,
+                        'last_line_hash': self._hash_line(last_line)
+                    }
+                else:
+                    logger.debug("La última línea del log está incompleta; no se actualiza la caché de columnas")
+            
+            self.log_lines = len(self.log_data) + (len(self._cached_frame) if self._cached_frame is not None else 0)
+            self._publish_stream()
             return True
         except Exception as e:
             logger.error(f"Error al leer el archivo de log: {e}")
             return False
     
+    def _add_source(self, f, path, start, first_row):
+        """
+        Registra un archivo leído desde el byte `start` para el almacén de agregados por hora.
+        Se identifica por el hash de su primera línea, que no depende de dónde empezó la lectura
+        y se conserva cuando logrotate renombra o comprime el archivo.
+        """
+        f.seek(0)
+        first_line = f.readline()
+        if first_line:
+            self._sources.append((self._hash_line(first_line.rstrip(b'\r\n')), os.path.abspath(path), start, first_row))
+    
+    def _new_log_data(self):
+        """Destino de los registros parseados: columnas para el DataFrame o un agregado en modo streaming."""
+        from config import DEFAULT_CONFIG
+        
+        if self.streaming:
+            return StreamingAggregator(self.log_path, time_window=self.time_window, topk_capacity=self.approx_top,
+                                       user_topk_capacity=DEFAULT_CONFIG['topk_user_capacity'])
+        return LogColumns()
+    
+    def _publish_stream(self):
+        """En modo streaming el agregado ya está completo tras la lectura y sustituye al DataFrame."""
+        if self.streaming:
+            self.aggregate = self.log_data
+            self.aggregate.detected_format = self.detected_format
+            self.log_data = None
+    
+    def _read_lines(self, f, format_name, start, end=None):
+        """
+        Parsea las líneas que comienzan en [start, end) y las añade a self.log_data.
+        
+        Returns:
+            Tupla (offset final, offset de la última línea, última línea)
+        """
+        if self.bulk:
+            return self._read_chunks(f, format_name, start, end)
+        if self.use_mmap and isinstance(f, io.BufferedReader):
+            return self._read_lines_mmap(f, format_name, start, end)
+        
+        # Seleccionar el parser adecuado según el formato
+        parser_method = self._get_parser_for_format(format_name)
+        
+        f.seek(start)
+        offset = start
+        last_line_offset = None
+        last_line = None
+        
+        for line in f:
+            if end is not None and offset >= end:
+                break
+            # En modo incremental una línea sin salto final aún se está escribiendo
+            if self.incremental and not line.endswith(b'\n'):
+                break
+            last_line_offset = offset
+            last_line = line
+            offset += len(line)
+            
+            # Procesar cada línea según el formato detectado/especificado
+            parsed_line = parser_method(line.decode('utf-8', errors='ignore').strip())
+            if parsed_line:
+                self.log_data.append(parsed_line)
+        
+        return offset, last_line_offset, last_line
+    
+    def _read_chunks(self, f, format_name, start, end=None):
+        """
+        Variante de _read_lines para el modo bulk: lee bloques de chunk_size líneas de una vez
+        y los parsea con _parse_chunk, sin recorrer las líneas una a una en Python.
+        """
+        f.seek(start)
+        offset = start
+        last_line_offset = None
+        last_line = None
+        
+        while True:
+            lines = list(islice(f, self.chunk_size))
+            if not lines:
+                break
+            lengths = list(map(len, lines))
+            finished = False
+            
+            # Solo se procesan las líneas que empiezan antes de end
+            if end is not None and offset + sum(lengths) - lengths[-1] >= end:
+                starts = offset + np.cumsum([0] + lengths[:-1])
+                kept = int(np.searchsorted(starts, end))
+                lines, lengths = lines[:kept], lengths[:kept]
+                finished = True
+            # En modo incremental una línea sin salto final aún se está escribiendo
+            if self.incremental and lines and not lines[-1].endswith(b'\n'):
+                lines.pop()
+                lengths.pop()
+                finished = True
+            
+            if lines:
+                last_line = lines[-1]
+                offset += sum(lengths)
+                last_line_offset = offset - len(last_line)
+                self._parse_chunk(lines, format_name)
+            if finished:
+                break
+        
+        return offset, last_line_offset, last_line
+    
+    def _read_lines_mmap(self, f, format_name, start, end=None):
+        """
+        Variante de _read_lines sobre un mmap del archivo. Las líneas se procesan como bytes
+        con los patrones de LOG_BYTE_PATTERNS y solo se decodifican los campos capturados,
+        en lugar de decodificar y recortar cada línea completa.
+        """
+        size = os.fstat(f.fileno()).st_size
+        if end is None or end > size:
+            end = size
+        offset = start
+        last_line_offset = None
+        last_line = None
+        
+        # mmap no admite archivos vacíos
+        if start >= end:
+            return offset, last_line_offset, last_line
+        
+        if format_name == 'squid_native':
+            pattern = None
+        else:
+            pattern = LOG_BYTE_PATTERNS.get(format_name, LOG_BYTE_PATTERNS['detailed'])
+            build_record = self._get_record_builder(format_name)
+        
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            mm.seek(start)
+            for line in iter(mm.readline, b''):
+                if offset >= end:
+                    break
+                # En modo incremental una línea sin salto final aún se está escribiendo
+                if self.incremental and not line.endswith(b'\n'):
+                    break
+                last_line_offset = offset
+                last_line = line
+                offset += len(line)
+                
+                if pattern is None:
+                    parsed_line = self._parse_squid_native_log_line_bytes(line)
+                else:
+                    match = pattern.match(line)
+                    if not match:
+                        continue
+                    try:
+                        # Decodificar todos los campos capturados en una sola llamada; ninguno
+                        # puede contener un salto de línea
+                        fields = b'\n'.join(match.groups()).decode('utf-8', errors='ignore').split('\n')
+                        parsed_line = build_record(*fields)
+                    except Exception as e:
+                        logger.error(f"Error al parsear línea en formato {format_name}: {e}")
+                        logger.debug(f"Línea: {line}")
+                        continue
+                
+                if parsed_line:
+                    self.log_data.append(parsed_line)
+        
+        return offset, last_line_offset, last_line
+    
+    def _read_log_files(self):
+        """Lee en orden varios archivos de log (rotados y/o comprimidos)."""
+        self.log_data = self._new_log_data()
+        self.new_records_start = 0
+        self._sources = []
+        
+        try:
+            plan = self._plan_log_files()
+            format_to_use = self._resolve_format(plan[0][0])
+            
+            for path, start in plan:
+                with _open_log_file(path) as f:
+                    self._add_source(f, path, start, len(self.log_data))
+                    end = None
+                    if not _is_compressed(path):
+                        start, end = self._window_byte_range(f, format_to_use, start)
+                    self._read_lines(f, format_to_use, start, end)
+            
+            logger.info(f"Procesados {len(plan)} archivos de log")
+            self.log_lines = len(self.log_data)
+            self._publish_stream()
+            return True
+        except Exception as e:
+            logger.error(f"Error al leer los archivos de log: {e}")
+            return False
+    
+    def _read_log_file_parallel(self):
+        """
+        Divide los archivos en rangos de bytes alineados a líneas, los parsea en varios
+        procesos y combina los agregados parciales en el orden de los archivos. Los logs
+        comprimidos no se pueden dividir y se procesan completos en un solo proceso.
+        """
+        try:
+            plan = self._plan_log_files() if self.multi_file else [(self.log_path, 0)]
+            format_to_use = self._resolve_format(plan[0][0])
+            
+            tasks = []
+            for path, start in plan:
+                if _is_compressed(path):
+                    tasks.append((path, start, None))
+                    continue
+                with open(path, 'rb') as f:
+                    start, end = self._window_byte_range(f, format_to_use, start)
+                    tasks.extend((path, range_start, range_end)
+                                 for range_start, range_end in self._split_byte_ranges(f, self.workers * 4, start, end))
+            
+            aggregate = self._new_log_data() if self.streaming else LogAggregate()
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                partials = executor.map(_parse_byte_range, [path for path, _, _ in tasks], repeat(format_to_use),
+                                        [start for _, start, _ in tasks], [end for _, _, end in tasks],
+                                        repeat(self.bulk), repeat(self.chunk_size),
+                                        repeat(self.use_mmap), repeat(self.time_window))
+                for partial in partials:
+                    aggregate.merge(partial)
+            
+            logger.info(f"Procesados {len(tasks)} rangos de {len(plan)} archivos con {self.workers} procesos")
+            if self.streaming:
+                aggregate.detected_format = self.detected_format
+            self.aggregate = aggregate
+            self.log_lines = aggregate.total_requests
+            return True
+        except Exception as e:
+            logger.error(f"Error al leer el archivo de log en paralelo: {e}")
+            return False
+    
+    def _resolve_format(self, path):
+        """Devuelve el formato configurado o, si es 'auto', el detectado en las primeras líneas del archivo."""
+        if self.log_format != 'auto':
+            return self.log_format
+        
+        with _open_log_file(path) as f:
+            sample_lines = [line.decode('utf-8', errors='ignore') for line in islice(f, 10)]
+        self.detected_format = self._detect_log_format(sample_lines)
+        logger.info(f"Formato de log detectado: {self.detected_format}")
+        return self.detected_format
+    
+    def _plan_log_files(self):
+        """
+        Devuelve la lista de (archivo, byte inicial) a procesar, del más antiguo al más reciente.
+        El byte inicial salta las líneas que el archivo repite del anterior.
+        """
+        files = resolve_log_files(self.log_path)
+        if not files:
+            raise FileNotFoundError(f"No se encontraron archivos de log en {self.log_path}")
+        
+        plan = [(files[0], 0)]
+        for previous_path, path in zip(files, files[1:]):
+            start = self._overlap_offset(previous_path, path)
+            if start:
+                logger.info(f"Se omiten {start} bytes al inicio de {path} ya incluidos en {previous_path}")
+            plan.append((path, start))
+        return plan
+    
+    def _overlap_offset(self, previous_path, path):
+        """
+        Con la rotación por copytruncate el inicio de un archivo puede repetir el final del
+        anterior. Devuelve el byte desde el que hay que leer `path` para no contar dos veces
+        esas líneas, o 0 si no se solapan.
+        
+        Se comparan hashes de líneas completas, que incluyen el timestamp, así que una misma
+        petición repetida en otro momento no se toma por duplicada.
+        """
+        from config import DEFAULT_CONFIG
+        
+        tail = self._tail_line_hashes(previous_path, DEFAULT_CONFIG['rotation_overlap_lines'])
+        if not tail:
+            return 0
+        
+        with _open_log_file(path) as f:
+            head = list(islice(f, len(tail)))
+        if not head:
+            return 0
+        head_hashes = [self._hash_line(line.rstrip(b'\r\n')) for line in head]
+        
+        # El solapamiento es un sufijo del archivo anterior igual a un prefijo de este;
+        # se prueba desde el más largo posible
+        for i, line_hash in enumerate(tail):
+            overlap = len(tail) - i
+            if line_hash == head_hashes[0] and overlap <= len(head) and head_hashes[:overlap] == tail[i:]:
+                return sum(len(line) for line in head[:overlap])
+        return 0
+    
+    def _tail_line_hashes(self, path, count):
+        """Hashes de las últimas `count` líneas de un archivo de log."""
+        tail = deque(maxlen=count)
+        with _open_log_file(path) as f:
+            if not _is_compressed(path):
+                # En un archivo sin comprimir basta con leer el final
+                size = os.fstat(f.fileno()).st_size
+                start = max(0, size - count * 1024)
+                f.seek(start)
+                if start:
+                    f.readline()
+            for line in f:
+                tail.append(line)
+        return [self._hash_line(line.rstrip(b'\r\n')) for line in tail]
+    
+    @staticmethod
+    def _split_byte_ranges(f, parts, start=0, end=None):
+        """
+        Divide el tramo [start, end) del archivo (hasta el final si end es None) en hasta `parts`
+        rangos [inicio, fin) que empiezan al inicio de una línea.
+        """
+        size = os.fstat(f.fileno()).st_size if end is None else end
+        boundaries = [start]
+        for i in range(1, parts):
+            f.seek(start + (size - start) * i // parts)
+            f.readline()
+            position = f.tell()
+            if boundaries[-1] < position < size:
+                boundaries.append(position)
+        boundaries.append(size)
+        return [(boundaries[i], boundaries[i + 1]) for i in range(len(boundaries) - 1)
+                if boundaries[i] < boundaries[i + 1]]
+    
+    def _window_byte_range(self, f, format_name, start=0):
+        """
+        Con time_window y formato squid_native, localiza con búsquedas binarias sobre el epoch
+        inicial de las líneas el tramo [inicio, fin) del archivo que contiene la ventana, con un
+        margen de DEFAULT_CONFIG['seek_tolerance'] segundos para las líneas desordenadas. Los
+        registros del tramo que quedan fuera de la ventana se descartan después.
+        
+        Returns:
+            Tupla (inicio, fin); (start, None) si no hay ventana o el formato no es squid_native
+        """
+        from config import DEFAULT_CONFIG
+        
+        if self.time_window is None or format_name != 'squid_native':
+            return start, None
+        
+        window_start, window_end = self.time_window
+        tolerance = DEFAULT_CONFIG['seek_tolerance']
+        size = os.fstat(f.fileno()).st_size
+        end = None
+        if window_start is not None:
+            start, _ = self._seek_epoch(f, _epoch_from_wallclock(window_start) - tolerance, start, size)
+        if window_end is not None:
+            _, end = self._seek_epoch(f, _epoch_from_wallclock(window_end) + tolerance, start, size)
+        
+        if start > 0 or (end is not None and end < size):
+            logger.info(f"Ventana de tiempo: se leen {(end if end is not None else size) - start} de {size} bytes "
+                        f"de {self.log_path}")
+        return start, end
+    
+    @staticmethod
+    def _seek_epoch(f, target, start, end):
+        """
+        Búsqueda binaria en [start, end) de la primera línea con epoch >= target, suponiendo las
+        líneas ordenadas. Se detiene cuando quedan menos de SEEK_BLOCK bytes por acotar.
+        
+        Returns:
+            Tupla (lo, hi) de inicios de línea: antes de lo todas las líneas tienen epoch menor
+            que target y desde hi todas lo tienen mayor o igual (hi es end si no hay ninguna)
+        """
+        lo, hi = start, end
+        top = hi  # Límite superior de la búsqueda; entre top y hi no empieza ninguna línea
+        while top - lo > SEEK_BLOCK:
+            mid = (lo + top) // 2
+            # Primera línea que empieza en mid o después
+            f.seek(mid - 1)
+            f.readline()
+            position = f.tell()
+            if position >= hi:
+                top = mid
+                continue
+            
+            epoch = None
+            for line in islice(f, 16):
+                try:
+                    epoch = float(line.split(None, 1)[0])
+                    break
+                except (ValueError, IndexError):
+                    continue
+            if epoch is None or epoch >= target:
+                hi = top = position
+            else:
+                lo = position
+        return lo, hi
+    
+    def _checkpoint_paths(self):
+        """Devuelve las rutas del checkpoint y del directorio del estado acumulado para este archivo de log."""
+        from config import STATE_DIR
+        
+        state_dir = self.state_dir or STATE_DIR
+        key = hashlib.sha1(os.path.abspath(self.log_path).encode('utf-8')).hexdigest()[:16]
+        return (os.path.join(state_dir, f'{key}.checkpoint.json'),
+                os.path.join(state_dir, f'{key}.state'))
+    
+    @staticmethod
+    def _hash_line(line):
+        """Calcula el hash de una línea cruda del log."""
+        return hashlib.sha1(line).hexdigest()
+    
+    def _load_checkpoint(self, f):
+        """
+        Carga el checkpoint de la última ejecución y verifica que siga siendo válido.
+        
+        Args:
+            f: Archivo de log abierto en modo binario
+        
+        Returns:
+            Diccionario con el checkpoint, o None si hay que procesar el archivo desde el inicio
+        """
+        checkpoint_path, _ = self._checkpoint_paths()
+        if not os.path.isfile(checkpoint_path):
+            return None
+        
+        try:
+            with open(checkpoint_path, 'r', encoding='utf-8') as cf:
+                checkpoint = json.load(cf)
+        except Exception as e:
+            logger.warning(f"Checkpoint ilegible, se procesará el archivo completo: {e}")
+            return None
+        
+        if self.log_format != 'auto' and checkpoint.get('format') != self.log_format:
+            logger.info("El formato cambió desde la última ejecución. Procesando el archivo completo.")
+            return None
+        
+        if not self._same_log_prefix(f, checkpoint):
+            return None
+        
+        return checkpoint
+    
+    def _same_log_prefix(self, f, fingerprint):
+        """
+        Comprueba que el archivo abierto conserve el contenido ya procesado que describe un
+        checkpoint o una entrada de la caché (inodo, offset y hash de la última línea).
+        
+        Deja el archivo al inicio: si después se descarta el checkpoint (por ejemplo porque no
+        se pudo cargar el estado), la detección del formato debe leer las primeras líneas.
+        """
+        # Logrotate crea un archivo nuevo (otro inodo) o lo trunca (copytruncate)
+        stat = os.fstat(f.fileno())
+        if stat.st_ino != fingerprint.get('inode') or stat.st_size < fingerprint.get('offset', 0):
+            logger.info("Rotación del log detectada. Procesando el archivo desde el inicio.")
+            return False
+        
+        # Verificar que la última línea procesada sigue en el mismo lugar
+        if fingerprint.get('last_line_offset') is not None:
+            f.seek(fingerprint['last_line_offset'])
+            line = f.readline()
+            f.seek(0)
+            if self._hash_line(line) != fingerprint.get('last_line_hash'):
+                logger.info("El contenido del log fue reemplazado. Procesando el archivo desde el inicio.")
+                return False
+        
+        return True
+    
+    def _load_cache_entry(self, f):
+        """
+        Carga de la caché las columnas ya parseadas de este archivo si siguen siendo válidas.
+        
+        Args:
+            f: Archivo de log abierto en modo binario
+        
+        Returns:
+            Manifiesto de la entrada, o None si hay que parsear el archivo completo. Los registros
+            quedan en self._cached_frame; con time_window, solo los de las particiones del rango
+        """
+        manifest = self.column_cache.load_manifest(self.log_path, self.log_format)
+        if not manifest:
+            return None
+        if manifest.get('parser_version') != PARSER_VERSION:
+            logger.info("La caché de columnas es de otra versión de los parsers. Procesando el archivo completo.")
+            return None
+        # Mismo tamaño pero otra fecha de modificación: el archivo se reescribió en su sitio
+        stat = os.fstat(f.fileno())
+        if stat.st_size == manifest.get('size') and stat.st_mtime_ns != manifest.get('mtime'):
+            logger.info("El log se modificó sin crecer. Procesando el archivo completo.")
+            return None
+        if not self._same_log_prefix(f, manifest):
+            return None
+        
+        try:
+            self._cached_frame = self.column_cache.load_frame(self.log_path, self.log_format, manifest,
+                                                              *(self.time_window or (None, None)))
+        except Exception as e:
+            logger.warning(f"No se pudo leer la caché de columnas, se procesará el archivo completo: {e}")
+            return None
+        return manifest
+    
+    def _load_state(self, checkpoint):
+        """
+        Carga lo acumulado en ejecuciones anteriores: los archivos del estado que lista el
+        checkpoint. En modo streaming es un único StreamingAggregator; en modo DataFrame, un
+        LogColumns por ejecución con los registros nuevos de esa ejecución, que se unen en orden.
+        """
+        _, state_dir = self._checkpoint_paths()
+        try:
+            if 'state' not in checkpoint:
+                raise ValueError("formato de estado obsoleto")
+            state = None if self.streaming else LogColumns()
+            for name in checkpoint['state']:
+                with open(os.path.join(state_dir, name), 'rb') as sf:
+                    part = pickle.load(sf)
+                if not isinstance(part, StreamingAggregator if self.streaming else LogColumns):
+                    raise ValueError("formato de estado obsoleto")
+                if self.streaming:
+                    state = part
+                else:
+                    state.extend(part)
+            if state is None:
+                raise ValueError("estado vacío")
+            return state
+        except Exception as e:
+            logger.warning(f"No se pudo cargar el estado anterior, se procesará el archivo completo: {e}")
+            return None
+    
+    def _save_checkpoint(self, checkpoint, previous=None):
+        """
+        Guarda el estado y después, de forma atómica, el checkpoint.
+        
+        En modo DataFrame solo se escriben los registros nuevos de esta ejecución, como un archivo
+        más del estado, así que el coste no crece con el tamaño del log. En modo streaming se
+        reescribe el agregado, cuyo tamaño depende de los usuarios, dominios y URLs distintos y
+        no del número de líneas.
+        
+        Args:
+            checkpoint: Huella del archivo hasta la última línea procesada
+            previous: Checkpoint del que se partió en esta ejecución, o None si se leyó el archivo completo
+        """
+        checkpoint_path, state_dir = self._checkpoint_paths()
+        try:
+            os.makedirs(state_dir, exist_ok=True)
+            
+            state = list(previous['state']) if previous and not self.streaming else []
+            if self.streaming or len(self.log_data) > self.new_records_start or not state:
+                new_state = self.log_data if self.streaming else self.log_data.tail(self.new_records_start)
+                name = f'{time.time_ns()}-{os.getpid()}.pkl'
+                with open(os.path.join(state_dir, name), 'wb') as sf:
+                    pickle.dump(new_state, sf, protocol=pickle.HIGHEST_PROTOCOL)
+                state.append(name)
+            checkpoint['state'] = state
+            
+            # El checkpoint se escribe al final para que nunca apunte a un estado incompleto
+            with open(checkpoint_path + '.tmp', 'w', encoding='utf-8') as cf:
+                json.dump(checkpoint, cf)
+            os.replace(checkpoint_path + '.tmp', checkpoint_path)
+        except Exception as e:
+            logger.warning(f"No se pudo guardar el checkpoint: {e}")
+            return
+        
+        # Borrar los archivos que ya no forman parte del estado (el agregado anterior o los de
+        # antes de una rotación)
+        for name in set(os.listdir(state_dir)) - set(state):
+            try:
+                os.remove(os.path.join(state_dir, name))
+            except OSError as e:
+                logger.debug(f"No se pudo borrar {name}: {e}")
+    
     def _detect_log_format(self, sample_lines):
         """
         Detecta automáticamente el formato del log basado en muestras de líneas.
@@ -67,20 +1298,11 @@ class SquidLogAnalyzer:
         Returns:
             Formato detectado ('detailed', 'common', 'squid_native', 'custom', 'custom_new')
         """
-        # Patrones para cada formato
-        format_patterns = {
-            'detailed': r'(\S+) (\S+) "(.*?)" (\d+) (\d+|-) "(.*?)" (\S+)',
-            'common': r'(\S+) \S+ (\S+) \[(.*?)\] "(.*?)" (\d+) (\d+|-)',
-            'squid_native': r'(\d+\.\d+)\s+\d+\s+(\S+)\s+(\S+)\/(\d+)\s+(\d+)\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\/(\S+)\s+(\S+)',
-            'custom': r'(\S+) (\S+) (\S+) \[(.*?)\] (\d+) (\S+) (\S+) (\S+) "(.*?)"',
-            'custom_new': r'(\S+) (\S+) (\S+) \[(.*?)\] (\d+) (\S+)\/(\d+) (\S+) (\S+) "(.*?)"'
-        }
-        
         # Contar coincidencias para cada formato
-        format_matches = {fmt: 0 for fmt in format_patterns}
+        format_matches = {fmt: 0 for fmt in LOG_PATTERNS}
         
         for line in sample_lines:
-            for fmt, pattern in format_patterns.items():
+            for fmt, pattern in LOG_PATTERNS.items():
                 if re.match(pattern, line):
                     format_matches[fmt] += 1
         
@@ -107,326 +1329,705 @@ class SquidLogAnalyzer:
         parsers = {
             'detailed': self._parse_detailed_log_line,
             'common': self._parse_common_log_line,
-            'squid_native': self._parse_squid_native_log_line,
+            'squid_native': self._parse_squid_native_log_line_fast,
             'custom': self._parse_custom_log_line,
             'custom_new': self._parse_custom_new_log_line
         }
         
         return parsers.get(format_name, self._parse_detailed_log_line)
     
+    def _get_record_builder(self, format_name):
+        """Devuelve el método que construye un registro a partir de los grupos del patrón del formato."""
+        builders = {
+            'detailed': self._build_detailed_record,
+            'common': self._build_common_record,
+            'custom': self._build_custom_record,
+            'custom_new': self._build_custom_new_record
+        }
+        return builders.get(format_name, self._build_detailed_record)
+    
     def _parse_detailed_log_line(self, line):
         """
         Parsea una línea de log en formato detallado.
         Formato: client_ip username "method url" status_code size "user_agent" squid_status
         """
         try:
-            pattern = r'(\S+) (\S+) "(.*?)" (\d+) (\d+|-) "(.*?)" (\S+)'
-            match = re.match(pattern, line)
+            match = re.match(LOG_PATTERNS['detailed'], line)
             
             if not match:
                 return None
-                
-            client_ip, username, request, status_code, size, user_agent, squid_status = match.groups()
-            
-            # Extraer método y URL del request
-            request_parts = request.split()
-            method = request_parts[0] if len(request_parts) > 0 else "-"
-            url = request_parts[1] if len(request_parts) > 1 else "-"
-            
-            # Extraer dominio de la URL
-            domain = self._extract_domain(url)
-            
-            # Determinar tipo de contenido basado en la URL
-            content_type = self._determine_content_type(url)
             
-            # Convertir tamaño a entero
-            size = int(size) if size != '-' else 0
-            
-            # Usar la fecha actual como timestamp ya que no está en el log
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            
-            return {
-                'timestamp': timestamp,
-                'client_ip': client_ip,
-                'username': username if username != '-' else None,
-                'method': method,
-                'url': url,
-                'domain': domain,
-                'status_code': int(status_code),
-                'size': size,
-                'referer': None,  # No hay referer en este formato
-                'user_agent': user_agent,
-                'squid_status': squid_status,
-                'content_type': content_type
-            }
+            return self._build_detailed_record(*match.groups())
         except Exception as e:
             logger.error(f"Error al parsear línea en formato detailed: {e}")
             logger.debug(f"Línea: {line}")
             return None
     
+    def _build_detailed_record(self, client_ip, username, request, status_code, size, user_agent, squid_status):
+        """Construye el registro de una línea en formato detailed a partir de sus campos."""
+        # Extraer método y URL del request
+        request_parts = request.split()
+        method = request_parts[0] if len(request_parts) > 0 else "-"
+        url = request_parts[1] if len(request_parts) > 1 else "-"
+        
+        # Extraer dominio de la URL
+        domain = self._extract_domain(url)
+        
+        # Determinar tipo de contenido basado en la URL
+        content_type = self._determine_content_type(url)
+        
+        # Convertir tamaño a entero
+        size = int(size) if size != '-' else 0
+        
+        # Usar la fecha actual como timestamp ya que no está en el log
+        timestamp = _now_wallclock()
+        
+        return (
+            timestamp,
+            client_ip,
+            username if username != '-' else None,
+            method,
+            url,
+            domain,
+            int(status_code),
+            size,
+            None,  # No hay referer en este formato
+            user_agent,
+            squid_status,
+            content_type
+        )
+    
     def _parse_common_log_line(self, line):
         """
         Parsea una línea de log en formato común (CLF).
         Formato: client_ip ident username [timestamp] "method url protocol" status_code size
         """
         try:
-            pattern = r'(\S+) \S+ (\S+) \[(.*?)\] "(.*?)" (\d+) (\d+|-)'
-            match = re.match(pattern, line)
+            match = re.match(LOG_PATTERNS['common'], line)
             
             if not match:
                 return None
-                
-            client_ip, username, timestamp_str, request, status_code, size = match.groups()
-            
-            # Extraer método y URL del request
-            request_parts = request.split()
-            method = request_parts[0] if len(request_parts) > 0 else "-"
-            url = request_parts[1] if len(request_parts) > 1 else "-"
-            
-            # Extraer dominio de la URL
-            domain = self._extract_domain(url)
-            
-            # Determinar tipo de contenido basado en la URL
-            content_type = self._determine_content_type(url)
-            
-            # Convertir tamaño a entero
-            size = int(size) if size != '-' else 0
-            
-            # Parsear timestamp
-            try:
-                timestamp = date_parser.parse(timestamp_str).strftime('%Y-%m-%d %H:%M:%S')
-            except:
-                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             
-            return {
-                'timestamp': timestamp,
-                'client_ip': client_ip,
-                'username': username if username != '-' else None,
-                'method': method,
-                'url': url,
-                'domain': domain,
-                'status_code': int(status_code),
-                'size': size,
-                'referer': None,  # No hay referer en este formato
-                'user_agent': None,  # No hay user_agent en este formato
-                'squid_status': None,  # No hay squid_status en este formato
-                'content_type': content_type
-            }
+            return self._build_common_record(*match.groups())
         except Exception as e:
             logger.error(f"Error al parsear línea en formato common: {e}")
             logger.debug(f"Línea: {line}")
             return None
     
+    def _build_common_record(self, client_ip, username, timestamp_str, request, status_code, size):
+        """Construye el registro de una línea en formato common a partir de sus campos."""
+        # Extraer método y URL del request
+        request_parts = request.split()
+        method = request_parts[0] if len(request_parts) > 0 else "-"
+        url = request_parts[1] if len(request_parts) > 1 else "-"
+        
+        # Extraer dominio de la URL
+        domain = self._extract_domain(url)
+        
+        # Determinar tipo de contenido basado en la URL
+        content_type = self._determine_content_type(url)
+        
+        # Convertir tamaño a entero
+        size = int(size) if size != '-' else 0
+        
+        # Parsear timestamp
+        timestamp = self._parse_timestamp(timestamp_str)
+        
+        return (
+            timestamp,
+            client_ip,
+            username if username != '-' else None,
+            method,
+            url,
+            domain,
+            int(status_code),
+            size,
+            None,  # No hay referer en este formato
+            None,  # No hay user_agent en este formato
+            None,  # No hay squid_status en este formato
+            content_type
+        )
+    
     def _parse_squid_native_log_line(self, line):
         """
         Parsea una línea de log en formato nativo de Squid.
         Formato: timestamp elapsed client_ip result_code/status_code size method url username hierarchy_code/peer_host content_type
         """
         try:
-            pattern = r'(\d+\.\d+)\s+\d+\s+(\S+)\s+(\S+)\/(\d+)\s+(\d+)\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\/(\S+)\s+(\S+)'
-            match = re.match(pattern, line)
+            match = re.match(LOG_PATTERNS['squid_native'], line)
             
             if not match:
                 return None
                 
             timestamp_epoch, client_ip, result_code, status_code, size, method, url, username, hierarchy_code, peer_host, content_type_raw = match.groups()
             
-            # Extraer dominio de la URL
-            domain = self._extract_domain(url)
-            
-            # Determinar tipo de contenido
-            content_type = self._determine_content_type(url)
-            
-            # Convertir timestamp epoch a datetime
-            try:
-                timestamp = datetime.fromtimestamp(float(timestamp_epoch)).strftime('%Y-%m-%d %H:%M:%S')
-            except:
-                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            
-            return {
-                'timestamp': timestamp,
-                'client_ip': client_ip,
-                'username': username if username != '-' else None,
-                'method': method,
-                'url': url,
-                'domain': domain,
-                'status_code': int(status_code),
-                'size': int(size),
-                'referer': None,  # No hay referer en este formato
-                'user_agent': None,  # No hay user_agent en este formato
-                'squid_status': result_code,
-                'content_type': content_type
-            }
+            return self._build_squid_native_record(timestamp_epoch, client_ip, result_code, status_code,
+                                                   size, method, url, username, content_type_raw)
+        except Exception as e:
+            logger.error(f"Error al parsear línea en formato squid_native: {e}")
+            logger.debug(f"Línea: {line}")
+            return None
+    
+    def _parse_squid_native_log_line_fast(self, line):
+        """
+        Parsea una línea de log en formato nativo de Squid separando los campos por espacios.
+        Los campos ocupan posiciones fijas, así que se evita la regex; las líneas que no
+        encajan se delegan a _parse_squid_native_log_line.
+        """
+        fields = line.split()
+        if len(fields) < 10:
+            return self._parse_squid_native_log_line(line)
+        
+        timestamp_epoch, elapsed, client_ip, result_status, size, method, url, username, hierarchy_peer = fields[:9]
+        seconds, dot, millis = timestamp_epoch.partition('.')
+        result_code, _, status_code = result_status.rpartition('/')
+        hierarchy_code, _, peer_host = hierarchy_peer.rpartition('/')
+        
+        if not (dot and seconds.isdecimal() and millis.isdecimal() and elapsed.isdecimal()
+                and result_code and status_code.isdecimal() and size.isdecimal()
+                and hierarchy_code and peer_host):
+            return self._parse_squid_native_log_line(line)
+        
+        try:
+            return self._build_squid_native_record(timestamp_epoch, client_ip, result_code, status_code,
+                                                   size, method, url, username, fields[9])
         except Exception as e:
             logger.error(f"Error al parsear línea en formato squid_native: {e}")
             logger.debug(f"Línea: {line}")
             return None
     
+    def _parse_squid_native_log_line_bytes(self, line):
+        """
+        Versión de _parse_squid_native_log_line_fast para líneas en bytes: solo se decodifican
+        los campos de texto que se guardan; los numéricos se convierten directamente desde bytes.
+        """
+        fields = line.split()
+        if len(fields) < 10:
+            return self._parse_squid_native_log_line(line.decode('utf-8', errors='ignore').strip())
+        
+        timestamp_epoch, elapsed, client_ip, result_status, size, method, url, username, hierarchy_peer = fields[:9]
+        seconds, dot, millis = timestamp_epoch.partition(b'.')
+        result_code, _, status_code = result_status.rpartition(b'/')
+        hierarchy_code, _, peer_host = hierarchy_peer.rpartition(b'/')
+        
+        if not (dot and seconds.isdigit() and millis.isdigit() and elapsed.isdigit()
+                and result_code and status_code.isdigit() and size.isdigit()
+                and hierarchy_code and peer_host):
+            return self._parse_squid_native_log_line(line.decode('utf-8', errors='ignore').strip())
+        
+        try:
+            return self._build_squid_native_record(
+                timestamp_epoch,
+                client_ip.decode('utf-8', errors='ignore'),
+                result_code.decode('utf-8', errors='ignore'),
+                status_code,
+                size,
+                method.decode('utf-8', errors='ignore'),
+                url.decode('utf-8', errors='ignore'),
+                username.decode('utf-8', errors='ignore'),
+                fields[9].decode('utf-8', errors='ignore')
+            )
+        except Exception as e:
+            logger.error(f"Error al parsear línea en formato squid_native: {e}")
+            logger.debug(f"Línea: {line}")
+            return None
+    
+    def _build_squid_native_record(self, timestamp_epoch, client_ip, result_code, status_code, size, method, url, username,
+                                   content_type_raw=None):
+        """Construye el registro de una línea en formato nativo de Squid a partir de sus campos."""
+        # Extraer dominio de la URL
+        domain = self._extract_domain(url)
+        
+        # Determinar tipo de contenido (por el tipo MIME registrado o, si no, por la URL)
+        content_type = self._determine_content_type(url, content_type_raw)
+        
+        # Convertir timestamp epoch a hora local
+        try:
+            timestamp = _wallclock_seconds(float(timestamp_epoch))
+        except:
+            timestamp = _now_wallclock()
+        
+        return (
+            timestamp,
+            client_ip,
+            username if username != '-' else None,
+            method,
+            url,
+            domain,
+            int(status_code),
+            int(size),
+            None,  # No hay referer en este formato
+            None,  # No hay user_agent en este formato
+            result_code,
+            content_type
+        )
+    
     def _parse_custom_log_line(self, line):
         """
         Parsea una línea de log en formato personalizado.
         Formato: client_ip username url [timestamp] size squid_status/status_code method mime_type "user_agent"
         """
         try:
-            pattern = r'(\S+) (\S+) (\S+) \[(.*?)\] (\d+) (\S+) (\S+) (\S+) "(.*?)"'
-            match = re.match(pattern, line)
+            match = re.match(LOG_PATTERNS['custom'], line)
             
             if not match:
                 return None
-                
-            client_ip, username, url, timestamp_str, size, status_info, method, mime_type, user_agent = match.groups()
-            
-            # Extraer dominio de la URL
-            domain = self._extract_domain(url)
-            
-            # Determinar tipo de contenido
-            content_type = self._determine_content_type(url)
-            
-            # Extraer código de estado
-            if '/' in status_info:
-                squid_status, status_code = status_info.split('/')
-            else:
-                squid_status = status_info
-                status_code = 0
-            
-            # Parsear timestamp
-            try:
-                timestamp = date_parser.parse(timestamp_str).strftime('%Y-%m-%d %H:%M:%S')
-            except:
-                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             
-            return {
-                'timestamp': timestamp,
-                'client_ip': client_ip,
-                'username': username if username != '-' else None,
-                'method': method,
-                'url': url,
-                'domain': domain,
-                'status_code': int(status_code),
-                'size': int(size),
-                'referer': None,  # No hay referer en este formato
-                'user_agent': user_agent,
-                'squid_status': squid_status,
-                'content_type': content_type if content_type else mime_type
-            }
+            return self._build_custom_record(*match.groups())
         except Exception as e:
             logger.error(f"Error al parsear línea en formato custom: {e}")
             logger.debug(f"Línea: {line}")
             return None
     
+    def _build_custom_record(self, client_ip, username, url, timestamp_str, size, status_info, method, mime_type, user_agent):
+        """Construye el registro de una línea en formato custom a partir de sus campos."""
+        # Extraer dominio de la URL
+        domain = self._extract_domain(url)
+        
+        # Determinar tipo de contenido (por el tipo MIME registrado o, si no, por la URL)
+        content_type = self._determine_content_type(url, mime_type)
+        
+        # Extraer código de estado
+        if '/' in status_info:
+            squid_status, status_code = status_info.split('/')
+        else:
+            squid_status = status_info
+            status_code = 0
+        
+        # Parsear timestamp
+        timestamp = self._parse_timestamp(timestamp_str)
+        
+        return (
+            timestamp,
+            client_ip,
+            username if username != '-' else None,
+            method,
+            url,
+            domain,
+            int(status_code),
+            int(size),
+            None,  # No hay referer en este formato
+            user_agent,
+            squid_status,
+            content_type
+        )
+    
     def _parse_custom_new_log_line(self, line):
         """
         Parsea una línea de log en formato personalizado nuevo.
         Formato: client_ip username url [timestamp] status_code squid_status/hierarchy_code method mime_type "user_agent"
         """
         try:
-            pattern = r'(\S+) (\S+) (\S+) \[(.*?)\] (\d+) (\S+)\/(\d+) (\S+) (\S+) "(.*?)"'
-            match = re.match(pattern, line)
+            match = re.match(LOG_PATTERNS['custom_new'], line)
             
             if not match:
                 return None
-                
-            client_ip, username, url, timestamp_str, status_code, squid_status, hierarchy_code, method, mime_type, user_agent = match.groups()
-            
-            # Extraer dominio de la URL
-            domain = self._extract_domain(url)
-            
-            # Determinar tipo de contenido
-            content_type = self._determine_content_type(url)
-            
-            # Parsear timestamp
-            try:
-                timestamp = date_parser.parse(timestamp_str).strftime('%Y-%m-%d %H:%M:%S')
-            except:
-                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             
-            return {
-                'timestamp': timestamp,
-                'client_ip': client_ip,
-                'username': username if username != '-' else None,
-                'method': method,
-                'url': url,
-                'domain': domain,
-                'status_code': int(status_code),
-                'size': 0,  # No hay tamaño en este formato, se podría añadir después
-                'referer': None,  # No hay referer en este formato
-                'user_agent': user_agent,
-                'squid_status': squid_status,
-                'content_type': content_type if content_type else mime_type
-            }
+            return self._build_custom_new_record(*match.groups())
         except Exception as e:
             logger.error(f"Error al parsear línea en formato custom_new: {e}")
             logger.debug(f"Línea: {line}")
             return None
     
+    def _build_custom_new_record(self, client_ip, username, url, timestamp_str, status_code, squid_status, hierarchy_code, method, mime_type, user_agent):
+        """Construye el registro de una línea en formato custom_new a partir de sus campos."""
+        # Extraer dominio de la URL
+        domain = self._extract_domain(url)
+        
+        # Determinar tipo de contenido (por el tipo MIME registrado o, si no, por la URL)
+        content_type = self._determine_content_type(url, mime_type)
+        
+        # Parsear timestamp
+        timestamp = self._parse_timestamp(timestamp_str)
+        
+        return (
+            timestamp,
+            client_ip,
+            username if username != '-' else None,
+            method,
+            url,
+            domain,
+            int(status_code),
+            0,  # No hay tamaño en este formato, se podría añadir después
+            None,  # No hay referer en este formato
+            user_agent,
+            squid_status,
+            content_type
+        )
+    
+    def _parse_timestamp(self, timestamp_str):
+        """Convierte el timestamp textual del log a segundos de hora local."""
+        if timestamp_str == self._last_timestamp_str:
+            return self._last_timestamp
+        
+        timestamp = _parse_clf_timestamp(timestamp_str)
+        if timestamp is None:
+            # Otros formatos de fecha: se delega en dateutil
+            try:
+                timestamp = calendar.timegm(date_parser.parse(timestamp_str).timetuple())
+            except:
+                return _now_wallclock()
+        
+        self._last_timestamp_str = timestamp_str
+        self._last_timestamp = timestamp
+        return timestamp
+    
+    def _parse_chunk(self, raw_lines, format_name):
+        """
+        Parsea un bloque de líneas crudas con operaciones vectorizadas y lo añade a log_data.
+        
+        Args:
+            raw_lines: Lista de líneas del log en bytes
+            format_name: Nombre del formato ('detailed', 'common', etc.)
+        """
+        chunk_parsers = {
+            'detailed': self._parse_detailed_chunk,
+            'common': self._parse_common_chunk,
+            'squid_native': self._parse_squid_native_chunk,
+            'custom': self._parse_custom_chunk,
+            'custom_new': self._parse_custom_new_chunk
+        }
+        chunk_parser = chunk_parsers.get(format_name, self._parse_detailed_chunk)
+        
+        text = b''.join(raw_lines).decode('utf-8', errors='ignore')
+        
+        try:
+            columns = chunk_parser(text)
+        except Exception as e:
+            logger.error(f"Error al parsear bloque en formato {format_name}: {e}")
+            return
+        
+        if columns is not None:
+            self.log_data.append_columns(columns)
+    
+    def _extract_chunk(self, text, format_name):
+        """Aplica el patrón del formato a cada línea del bloque; devuelve los campos de las que coinciden."""
+        match = LOG_CHUNK_PATTERNS[format_name].match
+        rows = [found.groups() for found in map(match, text.split('\n')) if found]
+        return pd.DataFrame(rows, dtype=object) if rows else None
+    
+    def _split_request_series(self, requests):
+        """Versión vectorizada de la separación de método y URL del campo request."""
+        parts = [request.split() for request in requests]
+        method = [request_parts[0] if request_parts else '-' for request_parts in parts]
+        url = [request_parts[1] if len(request_parts) > 1 else '-' for request_parts in parts]
+        return pd.Series(method, index=requests.index, dtype=object), pd.Series(url, index=requests.index, dtype=object)
+    
+    def _build_chunk_columns(self, timestamp, client_ip, username, method, url,
+                             status_code, size, user_agent, squid_status, mime_type=None):
+        """
+        Reúne las columnas de un bloque parseado en el orden de LOG_COLUMNS.
+        
+        Descarta las filas cuyo código de estado o tamaño no son enteros válidos, igual
+        que hacen los parsers de línea.
+        """
+        status_code = _to_int_series(status_code)
+        size = _to_int_series(size)
+        valid = status_code.notna() & (status_code.abs() <= _INT32_MAX) & size.notna() & (size.abs() <= _INT64_MAX)
+        if not valid.all():
+            timestamp = timestamp[valid.to_numpy()]
+            client_ip, username, method, url = client_ip[valid], username[valid], method[valid], url[valid]
+            status_code, size = status_code[valid], size[valid]
+            user_agent = user_agent[valid] if user_agent is not None else None
+            squid_status = squid_status[valid] if squid_status is not None else None
+            mime_type = mime_type[valid] if mime_type is not None else None
+        
+        count = len(url)
+        content_type = self._determine_content_type_series(url, mime_type)
+        
+        return {
+            'timestamp': timestamp,
+            'client_ip': _to_object_list(client_ip),
+            'username': _to_object_list(username.where(username != '-', None)),
+            'method': _to_object_list(method),
+            'url': _to_object_list(url),
+            'domain': _to_object_list(self._extract_domain_series(url)),
+            'status_code': status_code.to_numpy(dtype=np.int64),
+            'size': size.to_numpy(dtype=np.int64),
+            'referer': [None] * count,  # Ningún formato incluye referer
+            'user_agent': _to_object_list(user_agent) if user_agent is not None else [None] * count,
+            'squid_status': _to_object_list(squid_status) if squid_status is not None else [None] * count,
+            'content_type': _to_object_list(content_type)
+        }
+    
+    def _parse_timestamp_series(self, timestamps):
+        """
+        Convierte una serie de timestamps textuales decodificando una sola vez cada valor distinto:
+        los CLF de forma vectorizada y el resto uno a uno, con _parse_timestamp.
+        """
+        codes, uniques = pd.factorize(timestamps)
+        decoded = _parse_clf_timestamps(uniques)
+        pending = np.isnan(decoded)
+        if pending.any():
+            decoded[pending] = [self._parse_timestamp(value) for value in uniques[pending]]
+        return decoded.astype(np.int64)[codes]
+    
+    def _parse_detailed_chunk(self, text):
+        """Versión vectorizada de _parse_detailed_log_line."""
+        fields = self._extract_chunk(text, 'detailed')
+        if fields is None:
+            return None
+        
+        method, url = self._split_request_series(fields[2])
+        size = fields[4].where(fields[4] != '-', '0')
+        
+        # Usar la fecha actual como timestamp ya que no está en el log
+        timestamp = np.full(len(fields), _now_wallclock(), dtype=np.int64)
+        
+        return self._build_chunk_columns(timestamp, fields[0], fields[1], method, url,
+                                         fields[3], size, fields[5], fields[6])
+    
+    def _parse_common_chunk(self, text):
+        """Versión vectorizada de _parse_common_log_line."""
+        fields = self._extract_chunk(text, 'common')
+        if fields is None:
+            return None
+        
+        method, url = self._split_request_series(fields[3])
+        size = fields[5].where(fields[5] != '-', '0')
+        timestamp = self._parse_timestamp_series(fields[2])
+        
+        return self._build_chunk_columns(timestamp, fields[0], fields[1], method, url,
+                                         fields[4], size, None, None)
+    
+    def _parse_squid_native_chunk(self, text):
+        """
+        Versión vectorizada de _parse_squid_native_log_line_fast.
+        
+        El lector C de pandas separa los campos por espacios y se comprueban por columnas las
+        mismas condiciones que en el parser de línea; las líneas que no las cumplen (o que
+        read_csv separaría de otra forma) se parsean con él y se intercalan en su posición.
+        """
+        lines = text.split('\n')
+        if lines[-1] == '':
+            lines.pop()
+        
+        positions = np.arange(len(lines))
+        unsplit = _UNSPLIT_ASCII if text.isascii() else _UNSPLIT_CHARACTERS
+        if any(character in text for character in unsplit):
+            regular = np.array([not any(character in line for character in unsplit) for line in lines], dtype=bool)
+            positions = positions[regular]
+            text = '\n'.join(lines[position] for position in positions)
+        
+        fields = None
+        if len(positions):
+            try:
+                fields = pd.read_csv(io.StringIO(text), sep=r'\s+', header=None, names=range(10), usecols=range(10),
+                                     dtype=object, na_filter=False, quoting=csv.QUOTE_NONE, skip_blank_lines=False,
+                                     engine='c')
+            except (ValueError, pd.errors.ParserError):
+                # Ninguna línea tiene los 10 campos: todas pasan por el parser de línea
+                fields = None
+            if fields is not None and len(fields) != len(positions):
+                fields = None
+        
+        columns = None
+        if fields is not None:
+            valid, result_code, status_code = self._check_squid_native_fields(fields)
+            if valid.any():
+                # Las columnas numéricas ya se comprobaron: se convierten directamente
+                count = int(valid.sum())
+                epoch = np.fromiter(map(float, fields[0][valid]), dtype=np.float64, count=count)
+                size = pd.Series(np.fromiter(map(int, fields[4][valid]), dtype=np.int64, count=count))
+                fields = fields[valid].reset_index(drop=True)
+                columns = self._build_chunk_columns(_wallclock_seconds_array(epoch), fields[2], fields[7], fields[5],
+                                                    fields[6], status_code[valid].reset_index(drop=True), size, None,
+                                                    result_code[valid].reset_index(drop=True), fields[9])
+            positions_left = np.setdiff1d(np.arange(len(lines)), positions[valid], assume_unique=True)
+            positions = positions[valid]
+        else:
+            positions_left = np.arange(len(lines))
+            positions = positions[:0]
+        
+        records = [(position, self._parse_squid_native_log_line_fast(lines[position].strip()))
+                   for position in positions_left]
+        return self._merge_chunk_records(columns, positions, records)
+    
+    def _check_squid_native_fields(self, fields):
+        """
+        Comprueba por columnas las condiciones de _parse_squid_native_log_line_fast (solo con
+        dígitos ASCII y con números que caben en las columnas).
+        
+        Returns:
+            Tupla (máscara de filas válidas, result_code, status_code)
+        """
+        count = len(fields)
+        
+        def digits(values, max_length=None):
+            values = values.tolist()
+            plain = (np.fromiter(map(str.isdecimal, values), dtype=bool, count=count)
+                     & np.fromiter(map(str.isascii, values), dtype=bool, count=count))
+            if max_length is not None:
+                plain &= np.fromiter(map(len, values), dtype=np.int64, count=count) <= max_length
+            return plain
+        
+        seconds = np.fromiter(map(bool, map(_EPOCH_PATTERN.fullmatch, fields[0].tolist())), dtype=bool, count=count)
+        
+        # result_code/status_code y hierarchy_code/peer_host tienen pocos valores distintos
+        codes, uniques = pd.factorize(fields[3])
+        parts = [value.rpartition('/') for value in uniques]
+        result_ok = np.array([bool(code) and _is_ascii_number(status) and len(status) <= 9
+                              for code, _, status in parts], dtype=bool)
+        result_code = np.array([code for code, _, _ in parts], dtype=object)
+        status_code = np.array([int(status) if ok else 0 for (_, _, status), ok in zip(parts, result_ok)],
+                               dtype=np.int64)
+        hierarchy_codes, hierarchy_uniques = pd.factorize(fields[8])
+        hierarchy_ok = np.array([bool(code) and bool(peer) for code, _, peer in
+                                 (value.rpartition('/') for value in hierarchy_uniques)], dtype=bool)
+        
+        valid = (seconds & digits(fields[1]) & result_ok[codes] & digits(fields[4], max_length=18)
+                 & hierarchy_ok[hierarchy_codes] & (fields[9] != '').to_numpy())
+        return (valid, pd.Series(result_code[codes], index=fields.index, dtype=object),
+                pd.Series(status_code[codes], index=fields.index))
+    
+    def _merge_chunk_records(self, columns, positions, records):
+        """
+        Intercala en las columnas de un bloque los registros de las líneas parseadas aparte.
+        
+        Args:
+            columns: Columnas de las líneas en `positions` (None si no hay ninguna)
+            positions: Posición en el bloque de cada fila de `columns`
+            records: Lista de (posición, registro o None) del resto de líneas
+        """
+        extra = LogColumns()
+        extra_positions = [position for position, record in records if record and extra.append(record)]
+        if not extra_positions:
+            return columns
+        if columns is None:
+            return {column: getattr(extra, column) for column in LOG_COLUMNS}
+        
+        order = np.argsort(np.concatenate([positions, extra_positions]), kind='stable')
+        merged = {}
+        for column in LOG_COLUMNS:
+            values = np.concatenate([np.asarray(columns[column], dtype=object),
+                                     np.asarray(getattr(extra, column), dtype=object)])
+            merged[column] = values[order]
+        return merged
+    
+    def _parse_custom_chunk(self, text):
+        """Versión vectorizada de _parse_custom_log_line."""
+        fields = self._extract_chunk(text, 'custom')
+        if fields is None:
+            return None
+        
+        # squid_status/status_code; sin '/' el código es 0 y con más de una '/' la línea se descarta
+        status_info = fields[5]
+        slashes = status_info.str.count('/')
+        fields = fields[slashes <= 1]
+        status_info, slashes = status_info[slashes <= 1], slashes[slashes <= 1]
+        status_parts = status_info.str.partition('/')
+        squid_status = status_parts[0]
+        status_code = status_parts[2].where(slashes == 1, '0')
+        
+        timestamp = self._parse_timestamp_series(fields[3])
+        
+        return self._build_chunk_columns(timestamp, fields[0], fields[1], fields[6], fields[2],
+                                         status_code, fields[4], fields[8], squid_status, fields[7])
+    
+    def _parse_custom_new_chunk(self, text):
+        """Versión vectorizada de _parse_custom_new_log_line."""
+        fields = self._extract_chunk(text, 'custom_new')
+        if fields is None:
+            return None
+        
+        timestamp = self._parse_timestamp_series(fields[3])
+        size = pd.Series('0', index=fields.index)  # No hay tamaño en este formato
+        
+        return self._build_chunk_columns(timestamp, fields[0], fields[1], fields[7], fields[2],
+                                         fields[4], size, fields[9], fields[5], fields[8])
+    
     def _extract_domain(self, url):
         """Extrae el dominio de una URL."""
-        try:
-            if url == '-':
-                return '-'
-                
-            # Manejar URLs con y sin protocolo
-            if '://' not in url:
-                url = 'http://' + url
-                
-            parsed_url = urlparse(url)
-            domain = parsed_url.netloc
-            
-            # Si no hay dominio, intentar extraerlo de otra manera
-            if not domain and ':' in url:
-                domain = url.split(':', 1)[0]
-            
-            return domain if domain else url
-        except:
-            return url
+        scheme, separator, rest = url.partition('://')
+        if not separator:
+            return _domain_from_url(url)
+        
+        # El dominio solo depende del esquema y la autoridad, así que se usa ese prefijo
+        # como clave de la caché: todas las URLs de un mismo host comparten entrada
+        prefix = scheme + separator + rest.split('/', 1)[0]
+        domain = _domain_from_url(prefix)
+        
+        # Si no se pudo extraer el dominio se devuelve la URL completa, no el prefijo
+        return url if domain == prefix else domain
+    
+    def _extract_domain_series(self, urls):
+        """
+        Versión vectorizada de _extract_domain: la aplica una sola vez por URL distinta del
+        bloque, con la misma caché por esquema y autoridad que el parser de línea.
+        """
+        return _map_distinct(urls, lambda uniques: [self._extract_domain(url) for url in uniques])
     
-    def _determine_content_type(self, url):
-        """Determina el tipo de contenido basado en la URL."""
+    def _determine_content_type(self, url, mime_type=None):
+        """
+        Determina el tipo de contenido: por el tipo MIME registrado si es concluyente y,
+        si no, por la extensión final de la ruta de la URL.
+        """
+        if mime_type:
+            content_type = _content_type_from_mime(mime_type)
+            if content_type is not None:
+                return content_type
+        
         if url == '-':
             return 'unknown'
-            
-        url_lower = url.lower()
-        
-        # Imágenes
-        if any(ext in url_lower for ext in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.svg', '.ico']):
-            return 'image'
-        # Documentos
-        elif any(ext in url_lower for ext in ['.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.txt', '.csv']):
-            return 'document'
-        # Audio/Video
-        elif any(ext in url_lower for ext in ['.mp3', '.mp4', '.avi', '.mov', '.flv', '.wav', '.ogg', '.webm', '.mkv']):
-            return 'media'
-        # Web
-        elif any(ext in url_lower for ext in ['.html', '.htm', '.php', '.asp', '.aspx', '.jsp', '.do']):
-            return 'web'
-        # JavaScript/CSS
-        elif any(ext in url_lower for ext in ['.js', '.css', '.json', '.xml']):
-            return 'web-resource'
-        # Comprimidos
-        elif any(ext in url_lower for ext in ['.zip', '.rar', '.7z', '.tar', '.gz', '.bz2']):
-            return 'archive'
-        # Ejecutables
-        elif any(ext in url_lower for ext in ['.exe', '.msi', '.bin', '.sh', '.bat', '.apk']):
-            return 'executable'
-        # Fuentes
-        elif any(ext in url_lower for ext in ['.ttf', '.otf', '.woff', '.woff2', '.eot']):
-            return 'font'
-        else:
+        
+        # Ruta sin esquema ni autoridad, y sin query ni fragmento
+        scheme, separator, rest = url.partition('://')
+        path = rest.partition('/')[2] if separator else url
+        path = path.split('?', 1)[0].split('#', 1)[0]
+        
+        name = path.rpartition('/')[2]
+        _, dot, extension = name.rpartition('.')
+        if not dot:
             return 'other'
+        return EXTENSION_CONTENT_TYPES.get(extension.lower(), 'other')
+    
+    def _determine_content_type_series(self, urls, mime_types=None):
+        """
+        Versión vectorizada de _determine_content_type: la aplica una sola vez por tipo MIME y
+        por URL distintos, y por la URL solo en las filas sin tipo MIME concluyente.
+        """
+        by_url = lambda uniques: [self._determine_content_type(url) for url in uniques]
+        if mime_types is None:
+            return _map_distinct(urls, by_url)
+        
+        content_types = _map_distinct(mime_types, lambda uniques: [_content_type_from_mime(mime_type) if mime_type else None
+                                                                   for mime_type in uniques])
+        pending = content_types.isna()
+        if pending.any():
+            content_types[pending] = _map_distinct(urls[pending], by_url)
+        return content_types
     
     def to_dataframe(self):
         """Convierte los datos procesados a un DataFrame de pandas."""
-        if not hasattr(self, 'log_data') or not self.log_data:
+        if self.workers > 1 or self.streaming:
+            raise ValueError("Los modos streaming y con varios procesos solo conservan agregados; "
+                             "use workers=1 sin streaming para obtener el DataFrame")
+        
+        log_data = getattr(self, 'log_data', None)
+        if self.df is not None and log_data is None:
+            return self.df
+        
+        if log_data is None:
             if not self.read_log_file():
                 raise ValueError("No se pudo leer el archivo de log")
         
-        # Crear DataFrame a partir de la lista de diccionarios
-        self.df = pd.DataFrame(self.log_data)
+        # Crear DataFrame directamente a partir de las columnas acumuladas, a continuación de
+        # los registros leídos de la caché
+        self.df = self.log_data.to_dataframe()
+        new_records = len(self.df)
+        if self._cached_frame is not None:
+            if len(self.df):
+                self.df = pd.concat([self._cached_frame, self.df], ignore_index=True)
+            else:
+                self.df = self._cached_frame
+            self._cached_frame = None
+        
+        # Liberar los buffers: a partir de aquí los datos solo viven en el DataFrame
+        self.log_data = None
         
         # Añadir columnas derivadas útiles para el análisis
         if 'timestamp' in self.df.columns:
             try:
-                self.df['timestamp'] = pd.to_datetime(self.df['timestamp'])
                 self.df['date'] = self.df['timestamp'].dt.date
                 self.df['hour'] = self.df['timestamp'].dt.hour
                 self.df['day_of_week'] = self.df['timestamp'].dt.day_name()
@@ -437,12 +2038,130 @@ class SquidLogAnalyzer:
                 self.df['hour'] = datetime.now().hour
                 self.df['day_of_week'] = datetime.now().strftime('%A')
         
+        self._compact_dataframe()
+        
+        if self._cache_update is not None:
+            self.column_cache.store(self.log_path, self.log_format, self._cache_update,
+                                    self.df.iloc[len(self.df) - new_records:][list(LOG_COLUMNS)], self._cache_entry)
+            self._cache_update = None
+        
+        # Ordenar por timestamp (el índice conserva la posición de cada registro en el log) para
+        # resolver los filtros por fecha con búsquedas binarias y cortes del DataFrame
+        if 'timestamp' in self.df.columns and not self.df['timestamp'].is_monotonic_increasing:
+            self.df = self.df.sort_values('timestamp', kind='stable', na_position='last')
+        
+        if self.time_window is not None:
+            start, end = self.time_window
+            first, last = self._time_slice(pd.Timestamp(start, unit='s') if start is not None else None,
+                                           pd.Timestamp(end, unit='s') if end is not None else None)
+            if last - first < len(self.df):
+                self.df = self.df.iloc[first:last]
+        
         return self.df
     
+    def _compact_dataframe(self):
+        """
+        Reduce la memoria del DataFrame: las columnas de CATEGORY_COLUMNS pasan a category y
+        los enteros al tipo más pequeño que los contiene (status_code suele quedar en int16 y
+        hour en int8). Las consultas agrupan con observed=True y cuentan con _value_counts
+        para no devolver categorías sin registros.
+        """
+        verbose = logger.isEnabledFor(logging.DEBUG)
+        if verbose:
+            memory_before = self.df.memory_usage(deep=True)
+        
+        for column in CATEGORY_COLUMNS:
+            if column in self.df.columns:
+                self.df[column] = self.df[column].astype('category')
+        for column in ('status_code', 'size', 'hour'):
+            if column in self.df.columns:
+                self.df[column] = pd.to_numeric(self.df[column], downcast='integer')
+        
+        if verbose:
+            memory_after = self.df.memory_usage(deep=True)
+            logger.debug(f"Memoria del DataFrame: {self._bytes_to_human_readable(memory_after.sum())} "
+                         f"(antes {self._bytes_to_human_readable(memory_before.sum())})")
+            for column in self.df.columns:
+                logger.debug(f"  {column} ({self.df[column].dtype}): "
+                             f"{self._bytes_to_human_readable(memory_after[column])} "
+                             f"(antes {self._bytes_to_human_readable(memory_before.get(column, 0))})")
+    
+    def _ensure_loaded(self):
+        """Procesa el log si aún no hay DataFrame ni agregados."""
+        if self.df is not None or self.aggregate is not None:
+            return
+        if self.workers > 1 or self.streaming:
+            if not self.read_log_file():
+                raise ValueError("No se pudo leer el archivo de log")
+        else:
+            self.to_dataframe()
+    
+    def _current_results(self):
+        """Resultados memorizados de las consultas; se descartan si han cambiado los datos."""
+        df, aggregate = self._results_source
+        if df is not self.df or aggregate is not self.aggregate:
+            self._results = {}
+            self._results_source = (self.df, self.aggregate)
+        return self._results
+    
+    def _user_column(self):
+        """Columna del DataFrame con el usuario, o None si no hay."""
+        for col in ['username', 'user']:
+            if col in self.df.columns:
+                return col
+        return None
+    
+    def _group_totals(self, kind):
+        """
+        Solicitudes (URLs no nulas), registros y tráfico del DataFrame agrupados en una sola
+        pasada, de donde salen todas las consultas de los informes:
+        
+        - 'dimensions': por usuario, dominio, código de estado y tipo de contenido
+        - 'time': por hora y día de la semana
+        
+        Los nulos forman su propio grupo y los grupos siguen el orden de aparición en el log.
+        """
+        results = self._current_results()
+        key = ('_group_totals', kind)
+        if key not in results:
+            if kind == 'dimensions':
+                keys = [self._user_column(), 'domain', 'status_code', 'content_type']
+            else:
+                keys = ['hour', 'day_of_week']
+            keys = [col for col in keys if col is not None and col in self.df.columns]
+            results[key] = self.df.groupby(keys, observed=True, dropna=False, sort=False).agg(
+                requests=('url', 'count'),
+                records=('url', 'size'),
+                traffic=('size', 'sum')
+            ).reset_index()
+        return results[key]
+    
+    def compute_all(self):
+        """
+        Calcula todos los agregados de un informe con una pasada agrupada sobre el DataFrame y
+        los deja memorizados, así que las consultas posteriores con los mismos argumentos no
+        vuelven a recorrer los datos.
+        
+        Returns:
+            Diccionario con el resumen, usuarios, dominios, códigos de estado, tipos de
+            contenido, uso por hora y por día y rango de fechas
+        """
+        return {
+            'summary': self.get_summary(),
+            'top_users': self.get_top_users(),
+            'top_domains': self.get_top_domains(),
+            'status_codes': self.get_status_codes(),
+            'content_types': self.get_content_types(),
+            'hourly_usage': self.get_hourly_usage(),
+            'daily_usage': self.get_daily_usage(),
+            'date_range': self.get_date_range()
+        }
+    
+    @_memoized
     def get_summary(self):
         """Obtiene un resumen del análisis."""
-        if self.df is None:
-            self.to_dataframe()
+        if self.aggregate is not None:
+            return self.aggregate.get_summary()
         
         if self.df.empty:
             return {
@@ -458,13 +2177,9 @@ class SquidLogAnalyzer:
         total_bytes = self.df['size'].sum() if 'size' in self.df.columns else 0
         
         # Determinar qué columna usar para el usuario
-        user_column = None
-        for col in ['username', 'user']:
-            if col in self.df.columns:
-                user_column = col
-                break
+        user_column = self._user_column()
         
-        unique_users = self.df[user_column].nunique() if user_column and user_column in self.df.columns else 0
+        unique_users = self._group_totals('dimensions')[user_column].nunique() if user_column else 0
         unique_ips = self.df['client_ip'].nunique() if 'client_ip' in self.df.columns else 0
         
         return {
@@ -473,40 +2188,39 @@ class SquidLogAnalyzer:
             'unique_users': unique_users,
             'unique_ips': unique_ips
         }
-
+    
+    @_memoized
     def get_top_users(self, limit=10, excluded=None):
         """Obtiene los usuarios con más tráfico."""
-        if self.df is None:
-            self.to_dataframe()
+        if self.aggregate is not None:
+            return self.aggregate.get_top_users(limit, excluded)
         
         if excluded is None:
             excluded = []
         
         # Determinar qué columna usar para el usuario
-        user_column = None
-        for col in ['username', 'user']:
-            if col in self.df.columns:
-                user_column = col
-                break
+        user_column = self._user_column()
         
         if self.df.empty or not user_column:
             # Devolver un DataFrame vacío con las columnas esperadas
             return pd.DataFrame(columns=['user', 'traffic', 'requests', 'traffic_readable'])
         
         # Filtrar usuarios excluidos y nulos
-        filtered_df = self.df[
-            (~self.df[user_column].isin(excluded)) & 
-            (self.df[user_column].notna())
+        totals = self._group_totals('dimensions')
+        filtered = totals[
+            (~totals[user_column].isin(excluded)) & 
+            (totals[user_column].notna())
         ]
         
-        if filtered_df.empty:
+        if filtered.empty:
             return pd.DataFrame(columns=['user', 'traffic', 'requests', 'traffic_readable'])
         
         # Agrupar por usuario y sumar el tráfico
-        user_traffic = filtered_df.groupby(user_column).agg({
-            'size': 'sum',
-            'url': 'count'
+        user_traffic = filtered.groupby(user_column, observed=True).agg({
+            'traffic': 'sum',
+            'requests': 'sum'
         }).reset_index()
+        user_traffic[user_column] = user_traffic[user_column].astype(object)
         
         user_traffic.columns = ['user', 'traffic', 'requests']
         user_traffic = user_traffic.sort_values('traffic', ascending=False).head(limit)
@@ -515,11 +2229,12 @@ class SquidLogAnalyzer:
         user_traffic['traffic_readable'] = user_traffic['traffic'].apply(self._bytes_to_human_readable)
         
         return user_traffic
-
+    
+    @_memoized
     def get_top_domains(self, limit=20, excluded=None):
         """Obtiene los dominios más visitados."""
-        if self.df is None:
-            self.to_dataframe()
+        if self.aggregate is not None:
+            return self.aggregate.get_top_domains(limit, excluded)
         
         if excluded is None:
             excluded = []
@@ -529,19 +2244,21 @@ class SquidLogAnalyzer:
             return pd.DataFrame(columns=['domain', 'visits', 'traffic', 'traffic_readable'])
         
         # Filtrar dominios excluidos y nulos
-        filtered_df = self.df[
-            (~self.df['domain'].isin(excluded)) & 
-            (self.df['domain'].notna())
+        totals = self._group_totals('dimensions')
+        filtered = totals[
+            (~totals['domain'].isin(excluded)) & 
+            (totals['domain'].notna())
         ]
         
-        if filtered_df.empty:
+        if filtered.empty:
             return pd.DataFrame(columns=['domain', 'visits', 'traffic', 'traffic_readable'])
         
         # Agrupar por dominio y contar visitas
-        domain_visits = filtered_df.groupby('domain').agg({
-            'url': 'count',
-            'size': 'sum'
+        domain_visits = filtered.groupby('domain', observed=True).agg({
+            'requests': 'sum',
+            'traffic': 'sum'
         }).reset_index()
+        domain_visits['domain'] = domain_visits['domain'].astype(object)
         
         domain_visits.columns = ['domain', 'visits', 'traffic']
         domain_visits = domain_visits.sort_values('visits', ascending=False).head(limit)
@@ -551,17 +2268,18 @@ class SquidLogAnalyzer:
         
         return domain_visits
         
+    @_memoized
     def get_hourly_usage(self):
         """Obtiene el uso por hora del día."""
-        if self.df is None:
-            self.to_dataframe()
+        if self.aggregate is not None:
+            return self.aggregate.get_hourly_usage()
         
         if 'hour' not in self.df.columns:
             return pd.DataFrame()
         
-        hourly_usage = self.df.groupby('hour').agg({
-            'url': 'count',
-            'size': 'sum'
+        hourly_usage = self._group_totals('time').groupby('hour').agg({
+            'requests': 'sum',
+            'traffic': 'sum'
         }).reset_index()
         
         hourly_usage.columns = ['hour', 'requests', 'traffic']
@@ -572,10 +2290,11 @@ class SquidLogAnalyzer:
         
         return hourly_usage
     
+    @_memoized
     def get_daily_usage(self):
         """Obtiene el uso por día de la semana."""
-        if self.df is None:
-            self.to_dataframe()
+        if self.aggregate is not None:
+            return self.aggregate.get_daily_usage()
         
         if 'day_of_week' not in self.df.columns:
             return pd.DataFrame()
@@ -583,9 +2302,9 @@ class SquidLogAnalyzer:
         # Orden de los días de la semana
         day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
         
-        daily_usage = self.df.groupby('day_of_week').agg({
-            'url': 'count',
-            'size': 'sum'
+        daily_usage = self._group_totals('time').groupby('day_of_week', observed=True).agg({
+            'requests': 'sum',
+            'traffic': 'sum'
         }).reset_index()
         
         daily_usage.columns = ['day_of_week', 'requests', 'traffic']
@@ -600,15 +2319,16 @@ class SquidLogAnalyzer:
         
         return daily_usage
     
+    @_memoized
     def get_status_codes(self):
         """Obtiene la distribución de códigos de estado HTTP."""
-        if self.df is None:
-            self.to_dataframe()
+        if self.aggregate is not None:
+            return self.aggregate.get_status_codes()
         
         if 'status_code' not in self.df.columns:
             return pd.DataFrame(columns=['status_code', 'count', 'description'])
         
-        status_counts = self.df['status_code'].value_counts().reset_index()
+        status_counts = self._totals_by('status_code').reset_index()
         status_counts.columns = ['status_code', 'count']
         
         # Añadir descripción de los códigos
@@ -620,93 +2340,140 @@ class SquidLogAnalyzer:
         
         return status_counts
     
+    @_memoized
     def get_content_types(self):
         """Obtiene la distribución de tipos de contenido."""
-        if self.df is None:
-            self.to_dataframe()
+        if self.aggregate is not None:
+            return self.aggregate.get_content_types()
         
         if 'content_type' not in self.df.columns:
             return pd.Series(dtype='object')
         
-        return self.df['content_type'].value_counts().head(10)
+        return self._totals_by('content_type').head(10)
+    
+    def _totals_by(self, column):
+        """
+        Registros por valor de una columna, de mayor a menor, a partir de los totales agrupados.
+        Equivale a _value_counts(self.df[column]): omite los nulos y desempata por orden de
+        aparición en el log.
+        """
+        totals = self._group_totals('dimensions')
+        counts = totals.groupby(column, observed=True, sort=False)['records'].sum()
+        index = counts.index
+        if isinstance(index, pd.CategoricalIndex):
+            index = index.astype(index.categories.dtype)
+        counts = pd.Series(counts.to_numpy(), index=pd.Index(index, name=column), name='count')
+        return counts.sort_values(ascending=False, kind='stable')
     
+    @_memoized
     def get_user_data(self, username):
         """Obtiene datos específicos para un usuario."""
-        if self.df is None:
-            self.to_dataframe()
+        if self.aggregate is not None:
+            return self.aggregate.get_user_data(username)
         
-        # Determinar qué columna usar para el usuario
-        user_column = None
-        for col in ['username', 'user']:
-            if col in self.df.columns:
-                user_column = col
-                break
+        return self.get_all_user_data([username]).get(username)
+    
+    @_memoized
+    def get_all_user_data(self, users=None):
+        """
+        Obtiene los datos de get_user_data() de varios usuarios con una agrupación por usuario
+        para cada tabla, en lugar de filtrar el DataFrame completo una vez por usuario.
         
-        if not user_column:
-            return None
+        Args:
+            users: Usuarios a incluir (todos si es None)
+            
+        Returns:
+            Diccionario usuario -> datos, sin los usuarios que no aparecen en el log
+        """
+        if self.aggregate is not None:
+            return self.aggregate.get_all_user_data(users)
+        
+        # Determinar qué columna usar para el usuario
+        user_column = self._user_column()
         
-        # Filtrar por usuario
-        user_df = self.df[self.df[user_column] == username]
+        if not user_column or self.df.empty:
+            return {}
         
-        if user_df.empty:
-            return None
+        df = self.df
+        if users is not None:
+            df = df[df[user_column].isin(users)]
         
         # Estadísticas básicas
-        total_requests = len(user_df)
-        total_traffic = user_df['size'].sum() if 'size' in user_df.columns else 0
-        traffic_readable = self._bytes_to_human_readable(total_traffic)
-        
-        # Dominios más visitados
-        top_domains = user_df['domain'].value_counts().head(10).reset_index() if 'domain' in user_df.columns else pd.DataFrame(columns=['domain', 'count'])
-        top_domains.columns = ['domain', 'visits']
-        
-        # Códigos de estado
-        status_codes = user_df['status_code'].value_counts().reset_index() if 'status_code' in user_df.columns else pd.DataFrame(columns=['status_code', 'count'])
-        status_codes.columns = ['status_code', 'count']
-        
-        # Tipos de contenido
-        content_types = user_df['content_type'].value_counts().reset_index() if 'content_type' in user_df.columns else pd.DataFrame(columns=['content_type', 'count'])
-        content_types.columns = ['content_type', 'count']
-        
-        # URLs más visitadas
-        top_urls = user_df['url'].value_counts().head(10).reset_index() if 'url' in user_df.columns else pd.DataFrame(columns=['url', 'count'])
-        top_urls.columns = ['url', 'visits']
-        
-        # Tamaño promedio de respuesta
-        avg_response_size = user_df['size'].mean() if 'size' in user_df.columns else 0
-        avg_response_readable = self._bytes_to_human_readable(avg_response_size)
-        
-        # Porcentaje de solicitudes exitosas (códigos 2xx)
-        if 'status_code' in user_df.columns:
-            success_requests = len(user_df[user_df['status_code'].between(200, 299)])
-            success_rate = (success_requests / total_requests) * 100 if total_requests > 0 else 0
-            
-            # Porcentaje de solicitudes fallidas (códigos 4xx, 5xx)
-            error_requests = len(user_df[user_df['status_code'] >= 400])
-            error_rate = (error_requests / total_requests) * 100 if total_requests > 0 else 0
-        else:
-            success_rate = 0
-            error_rate = 0
+        status = df['status_code']
+        totals = df.assign(
+            success=status.between(200, 299),
+            error=status >= 400
+        ).groupby(user_column, observed=True, sort=False).agg(
+            total_requests=('size', 'size'),
+            total_traffic=('size', 'sum'),
+            avg_response_size=('size', 'mean'),
+            success_requests=('success', 'sum'),
+            error_requests=('error', 'sum')
+        )
         
-        return {
-            'username': username,
-            'total_requests': total_requests,
-            'total_traffic': total_traffic,
-            'traffic_readable': traffic_readable,
-            'top_domains': top_domains,
-            'status_codes': status_codes,
-            'content_types': content_types,
-            'top_urls': top_urls,
-            'avg_response_size': avg_response_size,
-            'avg_response_readable': avg_response_readable,
-            'success_rate': success_rate,
-            'error_rate': error_rate
-        }
+        names = totals.index.astype(object).tolist() if users is None else [user for user in users if user in totals.index]
+        
+        # Tablas de cada usuario: dominios y URLs más visitados, códigos de estado y tipos de contenido
+        top_domains = self._counts_by_user(df, user_column, names, 'domain', 'visits', 10)
+        status_codes = self._counts_by_user(df, user_column, names, 'status_code', 'count')
+        content_types = self._counts_by_user(df, user_column, names, 'content_type', 'count')
+        top_urls = self._counts_by_user(df, user_column, names, 'url', 'visits', 10)
+        
+        users_data = {}
+        for username in names:
+            total_requests = int(totals.at[username, 'total_requests'])
+            total_traffic = totals.at[username, 'total_traffic']
+            avg_response_size = totals.at[username, 'avg_response_size']
+            users_data[username] = {
+                'username': username,
+                'total_requests': total_requests,
+                'total_traffic': total_traffic,
+                'traffic_readable': self._bytes_to_human_readable(total_traffic),
+                'top_domains': top_domains[username],
+                'status_codes': status_codes[username],
+                'content_types': content_types[username],
+                'top_urls': top_urls[username],
+                'avg_response_size': avg_response_size,
+                'avg_response_readable': self._bytes_to_human_readable(avg_response_size),
+                # Porcentaje de solicitudes exitosas (códigos 2xx) y fallidas (códigos 4xx, 5xx)
+                'success_rate': (int(totals.at[username, 'success_requests']) / total_requests) * 100,
+                'error_rate': (int(totals.at[username, 'error_requests']) / total_requests) * 100
+            }
+        return users_data
+    
+    @staticmethod
+    def _counts_by_user(df, user_column, users, column, count_name, limit=None):
+        """
+        Registros de cada usuario por valor de `column`, de mayor a menor y desempatando por
+        orden de aparición (como value_counts() sobre los registros del usuario).
+        
+        Returns:
+            Diccionario usuario -> DataFrame con las columnas `column` y `count_name`, con una
+            entrada (quizá vacía) para cada usuario de `users`
+        """
+        counts = df.groupby([user_column, column], observed=True, sort=False).size().reset_index(name=count_name)
+        if isinstance(counts[column].dtype, pd.CategoricalDtype):
+            counts[column] = counts[column].astype(counts[column].cat.categories.dtype)
+        
+        # Ordenar por usuario y, dentro de cada uno, por conteo (lexsort es estable)
+        user_codes, user_values = pd.factorize(counts[user_column])
+        order = np.lexsort((-counts[count_name].to_numpy(), user_codes))
+        bounds = np.searchsorted(user_codes[order], np.arange(len(user_values) + 1))
+        
+        table = counts[[column, count_name]].iloc[order]
+        positions = {username: code for code, username in enumerate(user_values)}
+        by_user = {}
+        for username in users:
+            code = positions.get(username)
+            rows = table.iloc[bounds[code]:bounds[code + 1]] if code is not None else table.iloc[:0]
+            by_user[username] = (rows.head(limit) if limit is not None else rows).reset_index(drop=True)
+        return by_user
     
+    @_memoized
     def get_date_range(self):
         """Obtiene el rango de fechas en el log."""
-        if self.df is None:
-            self.to_dataframe()
+        if self.aggregate is not None:
+            return self.aggregate.get_date_range()
         
         if 'timestamp' in self.df.columns and not self.df.empty:
             try:
@@ -718,54 +2485,206 @@ class SquidLogAnalyzer:
         # Si no hay timestamps válidos, devolver la fecha actual
         now = datetime.now()
         return now, now
-
+    
+    @_memoized
+    def get_distinct_usage(self, period='day'):
+        """
+        Usuarios, IPs y sitios distintos por hora ('hour') o por día ('day'). Con agregados se
+        estiman con HyperLogLog; con el DataFrame son exactos.
+        """
+        if self.aggregate is not None:
+            return self.aggregate.get_distinct_usage(period)
+        
+        columns = ['period', 'unique_users', 'unique_ips', 'unique_domains']
+        if self.df.empty or 'timestamp' not in self.df.columns:
+            return pd.DataFrame(columns=columns)
+        
+        user_column = self._user_column()
+        periods = self.df['timestamp'].dt.floor('h' if period == 'hour' else 'D')
+        grouped = self.df.groupby(periods)
+        distinct_usage = pd.DataFrame({
+            'unique_users': grouped[user_column].nunique() if user_column else 0,
+            'unique_ips': grouped['client_ip'].nunique(),
+            'unique_domains': grouped['domain'].nunique()
+        }).reset_index()
+        distinct_usage.columns = columns
+        return distinct_usage
+    
+    @_memoized
+    def get_unique_counts(self, start_date=None, end_date=None):
+        """Usuarios, IPs y sitios distintos entre dos fechas (con agregados, con resolución de una hora)."""
+        if self.aggregate is not None:
+            return self.aggregate.get_unique_counts(start_date, end_date)
+        
+        df = self.df
+        if 'timestamp' in df.columns:
+            if start_date is not None:
+                df = df[df['timestamp'] >= pd.Timestamp(start_date)]
+            if end_date is not None:
+                df = df[df['timestamp'] <= pd.Timestamp(end_date)]
+        user_column = self._user_column()
+        return {
+            'unique_users': df[user_column].nunique() if user_column else 0,
+            'unique_ips': df['client_ip'].nunique() if 'client_ip' in df.columns else 0,
+            'unique_domains': df['domain'].nunique() if 'domain' in df.columns else 0
+        }
+    
+    def get_approximation(self):
+        """Cotas de error de las tablas aproximadas (approx_top), o None si los valores son exactos."""
+        self._ensure_loaded()
+        
+        if self.aggregate is not None:
+            return self.aggregate.get_approximation()
+        return None
+    
     def filter_by_date(self, start_date=None, end_date=None):
-        """Filtra los datos por rango de fechas."""
-        if self.df is None:
-            self.to_dataframe()
+        """
+        Filtra los datos por rango de fechas.
         
-        filtered_analyzer = SquidLogAnalyzer(self.log_path, self.log_format)
+        Como el DataFrame está ordenado por timestamp, el rango se localiza con una búsqueda
+        binaria y el analizador devuelto recibe un corte del DataFrame que comparte sus buffers.
+        
+        En modo incremental primero se procesan las líneas nuevas (lo que avanza el checkpoint)
+        y, en modo DataFrame, se filtra sobre los registros acumulados en lugar de releer el log.
+        """
+        if self.incremental:
+            self._ensure_loaded()
+        if self.workers > 1 or self.streaming or self.df is None:
+            return self._filter_by_date_lazy(start_date, end_date)
         
         if 'timestamp' not in self.df.columns or self.df.empty:
-            filtered_analyzer.df = self.df.copy() if self.df is not None else None
-            return filtered_analyzer
+            return self._derived(self.df)
         
         try:
-            # Convertir a datetime si no lo son
-            if start_date and not isinstance(start_date, datetime):
-                start_date = pd.to_datetime(start_date)
-            if end_date and not isinstance(end_date, datetime):
-                end_date = pd.to_datetime(end_date)
-            
-            # Convertir la columna timestamp a datetime
-            df_copy = self.df.copy()
-            df_copy['timestamp'] = pd.to_datetime(df_copy['timestamp'])
-            
-            # Aplicar filtros
+            first, last = self._time_slice(pd.Timestamp(start_date) if start_date else None,
+                                           pd.Timestamp(end_date) if end_date else None)
+            return self._derived(self.df.iloc[first:last])
+        except Exception as e:
+            logger.error(f"Error al filtrar por fecha: {e}")
+            return self._derived(self.df)
+    
+    def filter_by_user(self, users):
+        """Filtra los registros de uno o varios usuarios; el resultado sigue ordenado por timestamp."""
+        if self.df is None:
+            self.to_dataframe()
+        return self._filter_by_values(self._user_column(), users)
+    
+    def filter_by_ip(self, ips):
+        """Filtra los registros de una o varias IPs de cliente; el resultado sigue ordenado por timestamp."""
+        if self.df is None:
+            self.to_dataframe()
+        return self._filter_by_values('client_ip', ips)
+    
+    def _filter_by_values(self, column, values):
+        """Analizador con los registros cuyo valor de `column` es `values` o está en esa lista."""
+        if isinstance(values, str):
+            values = [values]
+        if column is None or column not in self.df.columns:
+            return self._derived(self.df.iloc[:0])
+        return self._derived(self.df[self.df[column].isin(values)])
+    
+    def _time_slice(self, start=None, end=None):
+        """
+        Posiciones [first, last) del DataFrame ordenado con los registros entre start y end
+        (Timestamps, ambos incluidos). Los registros sin timestamp quedan al final y fuera del
+        rango si se indica algún límite.
+        """
+        timestamps = self.df['timestamp']
+        if start is None and end is None:
+            return 0, len(timestamps)
+        timestamps = timestamps.iloc[:len(timestamps) - int(timestamps.isna().sum())]
+        # Redondear los límites a la resolución de la columna (normalmente segundos)
+        unit = np.datetime_data(timestamps.dtype)[0]
+        first = int(timestamps.searchsorted(start.ceil(unit).as_unit(unit), side='left')) if start is not None else 0
+        last = int(timestamps.searchsorted(end.floor(unit).as_unit(unit), side='right')) if end is not None else len(timestamps)
+        return first, max(first, last)
+    
+    def _derived(self, df):
+        """Analizador con la misma configuración y formato detectado que este, sobre los registros de df."""
+        derived = SquidLogAnalyzer(self.log_path, self.log_format, bulk=self.bulk, chunk_size=self.chunk_size,
+                                   use_mmap=self.use_mmap, use_cache=False)
+        derived.detected_format = self.detected_format
+        derived.df = df
+        return derived
+    
+    def _filter_by_date_lazy(self, start_date=None, end_date=None):
+        """
+        En los modos paralelo y streaming los registros no se conservan: devuelve un analizador
+        que vuelve a procesar el archivo agregando solo los registros dentro del rango de fechas.
+        
+        En modo DataFrame, si aún no se construyó, el analizador devuelto solo lee las particiones
+        diarias de la caché de columnas que se solapan con el rango (y las líneas añadidas al log
+        desde la última ejecución) o, sin caché, el tramo del log que contiene el rango si el
+        formato es squid_native.
+        """
+        # Las entradas de la caché se identifican por el formato solicitado, no el detectado
+        log_format = self.log_format if self.column_cache is not None else self.detected_format or self.log_format
+        filtered_analyzer = SquidLogAnalyzer(self.log_path, log_format,
+                                             bulk=self.bulk, chunk_size=self.chunk_size, workers=self.workers,
+                                             use_mmap=self.use_mmap, streaming=self.streaming,
+                                             approx_top=self.approx_top, use_cache=self.column_cache is not None,
+                                             cache_dir=self.column_cache.cache_dir if self.column_cache else None)
+        filtered_analyzer.detected_format = self.detected_format
+        
+        # Los timestamps se guardan como segundos de hora local
+        start, end = self.time_window or (None, None)
+        try:
             if start_date:
-                df_copy = df_copy[df_copy['timestamp'] >= start_date]
+                start_seconds = pd.Timestamp(start_date).value / 1e9
+                start = start_seconds if start is None else max(start, start_seconds)
             if end_date:
-                df_copy = df_copy[df_copy['timestamp'] <= end_date]
-            
-            filtered_analyzer.df = df_copy
+                end_seconds = pd.Timestamp(end_date).value / 1e9
+                end = end_seconds if end is None else min(end, end_seconds)
         except Exception as e:
             logger.error(f"Error al filtrar por fecha: {e}")
-            filtered_analyzer.df = self.df.copy()
         
+        filtered_analyzer.time_window = (start, end)
         return filtered_analyzer
     
-    def _bytes_to_human_readable(self, bytes_value):
-        """Convierte bytes a formato legible por humanos."""
-        if bytes_value == 0:
-            return "0 B"
+    def save_rollups(self, store):
+        """
+        Suma al almacén de agregados por hora (RollupStore) los registros nuevos de cada
+        archivo leído. Solo está disponible cuando se construye el DataFrame.
         
-        size_names = ["B", "KB", "MB", "GB", "TB", "PB"]
-        i = 0
-        while bytes_value >= 1024 and i < len(size_names) - 1:
-            bytes_value /= 1024
-            i += 1
+        Returns:
+            Número de registros agregados, o None si no se actualizó el almacén
+        """
+        if self.workers > 1 or self.streaming:
+            logger.info("Los modos streaming y con varios procesos no actualizan el almacén de agregados por hora")
+            return None
+        if self.time_window is not None:
+            logger.info("Un análisis limitado a una ventana de tiempo no actualiza el almacén de agregados por hora")
+            return None
         
-        return f"{bytes_value:.2f} {size_names[i]}"
+        self._ensure_loaded()
+        try:
+            # El almacén recibe los registros de cada archivo en el orden del log
+            df = self.df if self.df.index.is_monotonic_increasing else self.df.sort_index()
+            boundaries = [first_row for _, _, _, first_row in self._sources[1:]] + [len(df)]
+            log_set = os.path.abspath(self.log_path)
+            added = sum(store.save(key, path, df.iloc[first_row:end], start, log_set)
+                        for (key, path, start, first_row), end in zip(self._sources, boundaries))
+            logger.info(f"Almacén de agregados por hora: {added} registros nuevos")
+            return added
+        except Exception as e:
+            logger.error(f"Error al guardar los agregados por hora: {e}")
+            return None
+    
+    def from_rollups(self, store, start_date=None, end_date=None):
+        """
+        Devuelve un analizador con los agregados guardados en el almacén entre dos fechas. Solo
+        incluye las fuentes de este log: los archivos leídos y los guardados antes con la misma
+        entrada (log_path), como los ya rotados. La resolución es de una hora.
+        """
+        keys = [key for key, _, _, _ in self._sources] + store.source_keys(os.path.abspath(self.log_path))
+        filtered_analyzer = SquidLogAnalyzer(self.log_path, self.detected_format or self.log_format, use_cache=False)
+        filtered_analyzer.detected_format = self.detected_format
+        filtered_analyzer.aggregate = store.load(keys, start_date, end_date)
+        return filtered_analyzer
+    
+    def _bytes_to_human_readable(self, bytes_value):
+        """Convierte bytes a formato legible por humanos."""
+        return bytes_to_human_readable(bytes_value)
         
     def debug_dataframe(self):
         """Imprime información de depuración sobre el DataFrame."""
@@ -0,0 +1,104 @@
+"""
+Benchmark del parser por bloques (bulk: read_csv de pandas para squid_native y expresiones
+regulares para los formatos con comillas) frente al parser línea a línea, en los cinco formatos de log.
+
+Antes de medir comprueba que ambos dan exactamente los mismos registros; si no, termina con
+código de salida 1.
+
+Uso: python benchmarks/bench_bulk_parse.py [--lines N] [--hosts N]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analyzer  # noqa: E402
+from analyzer import SquidLogAnalyzer  # noqa: E402
+from bench_domains import make_hosts, make_urls, timed  # noqa: E402
+
+FORMATS = ['detailed', 'common', 'squid_native', 'custom', 'custom_new']
+MIME_TYPES = ['-', 'text/html', 'text/css', 'application/javascript', 'image/png', 'video/mp4', 'application/pdf']
+USER_AGENTS = ['Mozilla/5.0 (X11; Linux x86_64)', 'curl/8.5.0', '-']
+
+
+def make_log_lines(format_name, urls, rng):
+    """Líneas en el formato `format_name`, una por URL."""
+    epoch = 1760000000.0
+    lines = []
+    for url in urls:
+        epoch += rng.random() * 5
+        clf = time.strftime('%d/%b/%Y:%H:%M:%S -0400', time.gmtime(epoch))
+        ip = f'10.0.{rng.randint(0, 9)}.{rng.randint(1, 254)}'
+        user = rng.choice(['alice', 'bob', 'carol', '-'])
+        method = 'CONNECT' if '://' not in url else rng.choice(['GET', 'GET', 'POST', 'HEAD'])
+        status = rng.choice([200, 206, 304, 404])
+        size = rng.randint(0, 10 ** 6)
+        squid = rng.choice(['TCP_MISS', 'TCP_HIT', 'TCP_TUNNEL'])
+        mime = rng.choice(MIME_TYPES)
+        agent = rng.choice(USER_AGENTS)
+        if format_name == 'detailed':
+            lines.append(f'{ip} {user} "{method} {url}" {status} {size} "{agent}" {squid}:HIER_DIRECT')
+        elif format_name == 'common':
+            lines.append(f'{ip} - {user} [{clf}] "{method} {url} HTTP/1.1" {status} {size}')
+        elif format_name == 'squid_native':
+            lines.append(f'{epoch:.3f} {rng.randint(0, 9999):6d} {ip} {squid}/{status:03d} {size} {method} {url} {user} '
+                         f'HIER_DIRECT/1.2.3.4 {mime}')
+        elif format_name == 'custom':
+            lines.append(f'{ip} {user} {url} [{clf}] {size} {squid}/{status} {method} {mime} "{agent}"')
+        else:
+            lines.append(f'{ip} {user} {url} [{clf}] {status} {squid}/{status} {method} {mime} "{agent}"')
+    return lines
+
+
+def _parse(log_path, format_name, bulk):
+    log = SquidLogAnalyzer(log_path, format_name, bulk=bulk, use_cache=False)
+    analyzer._domain_from_url.cache_clear()
+    return timed(log.to_dataframe)
+
+
+def bench_parsers(lines, urls, rng, directory):
+    """Parser bulk frente a línea a línea; devuelve False si algún formato da registros distintos."""
+    print(f"{'formato':<14}{'línea a línea':>16}{'bulk':>16}{'mejora':>9}")
+    ok = True
+    for format_name in FORMATS:
+        log_path = os.path.join(directory, f'{format_name}.log')
+        with open(log_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(make_log_lines(format_name, urls, rng)) + '\n')
+        
+        per_line, per_line_time = _parse(log_path, format_name, bulk=False)
+        bulk, bulk_time = _parse(log_path, format_name, bulk=True)
+        if format_name == 'detailed':
+            # Sin fecha en el log: ambos usan la hora de lectura, que no tiene por qué coincidir
+            per_line, bulk = per_line.drop(columns='timestamp'), bulk.drop(columns='timestamp')
+        try:
+            pd.testing.assert_frame_equal(per_line, bulk)
+        except AssertionError as e:
+            print(f"{format_name}: el parser bulk no da los mismos registros:\n{e}")
+            ok = False
+        print(f"{format_name:<14}{lines / per_line_time:>11,.0f} l/s{lines / bulk_time:>11,.0f} l/s"
+              f"{per_line_time / bulk_time:>8.1f}x")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the bulk parser')
+    parser.add_argument('--lines', type=int, default=100000, help='Log lines per format (default: 100000)')
+    parser.add_argument('--hosts', type=int, default=2000, help='Distinct hosts in the URLs (default: 2000)')
+    parser.add_argument('--seed', type=int, default=2024, help='Random seed (default: 2024)')
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    urls = make_urls(args.lines, make_hosts(args.hosts, rng), rng)
+    with tempfile.TemporaryDirectory() as directory:
+        ok = bench_parsers(args.lines, urls, rng, directory)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
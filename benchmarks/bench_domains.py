@@ -0,0 +1,91 @@
+"""
+Benchmark de la extracción de dominios: urlparse sin caché (la función original),
+_extract_domain con la caché por esquema y autoridad, y _extract_domain_series, que usa el
+modo bulk.
+
+Antes de medir comprueba que las dos variantes dan los mismos dominios que urlparse; si no,
+termina con código de salida 1.
+
+Uso: python benchmarks/bench_domains.py [--urls N] [--hosts N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analyzer  # noqa: E402
+from analyzer import SquidLogAnalyzer  # noqa: E402
+
+PATHS = ['/', '/index.html', '/s.css', '/app.js?v=3', '/img/logo.png', '/video.mp4#t=10', '/descargas/informe.pdf']
+
+
+def make_hosts(count, rng):
+    """Hosts de prueba, con algunos casos especiales (IPv6, no ASCII, userinfo, puerto)."""
+    hosts = [f'www{i}.example{i % 97}.com' for i in range(count)]
+    for host in ['[2001:db8::1]:8080', 'ñandú.example.es', 'user:pass@intranet.local', 'cdn.example.com:8443']:
+        hosts[rng.randrange(count)] = host
+    return hosts
+
+
+def make_urls(count, hosts, rng):
+    """URLs sobre `hosts`; una de cada diez es el host:port de un CONNECT."""
+    urls = []
+    for _ in range(count):
+        host = rng.choice(hosts)
+        if rng.random() < 0.1:
+            urls.append(f'{host}:443')
+        else:
+            urls.append(f'{rng.choice(["http", "https"])}://{host}{rng.choice(PATHS)}')
+    return urls
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def bench_domains(urls):
+    """Mide las tres variantes; devuelve False si alguna difiere de urlparse sin caché."""
+    log = SquidLogAnalyzer('access.log', 'squid_native', use_cache=False)
+    uncached = analyzer._domain_from_url.__wrapped__
+    
+    expected, uncached_time = timed(lambda: [uncached(url) for url in urls])
+    analyzer._domain_from_url.cache_clear()
+    cached, cached_time = timed(lambda: [log._extract_domain(url) for url in urls])
+    analyzer._domain_from_url.cache_clear()
+    series = pd.Series(urls, dtype=object)
+    vectorized, vectorized_time = timed(lambda: log._extract_domain_series(series).tolist())
+    
+    print(f"{'dominios':<28}{'URLs/s':>14}{'mejora':>9}")
+    for name, elapsed in [('urlparse sin caché', uncached_time), ('_extract_domain (caché)', cached_time),
+                          ('_extract_domain_series', vectorized_time)]:
+        print(f"{name:<28}{len(urls) / elapsed:>14,.0f}{uncached_time / elapsed:>8.1f}x")
+    
+    ok = True
+    for name, domains in [('_extract_domain', cached), ('_extract_domain_series', vectorized)]:
+        different = [(url, want, got) for url, want, got in zip(urls, expected, domains) if want != got]
+        if different:
+            print(f"{name}: {len(different)} dominios distintos de urlparse, p. ej. {different[:3]}")
+            ok = False
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the domain extraction')
+    parser.add_argument('--urls', type=int, default=100000, help='URLs to extract (default: 100000)')
+    parser.add_argument('--hosts', type=int, default=2000, help='Distinct hosts in the URLs (default: 2000)')
+    parser.add_argument('--seed', type=int, default=2024, help='Random seed (default: 2024)')
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    return 0 if bench_domains(make_urls(args.urls, make_hosts(args.hosts, rng), rng)) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
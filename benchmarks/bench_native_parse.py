@@ -0,0 +1,78 @@
+"""
+Benchmark del parser de línea del formato squid_native: la regex de referencia frente al
+parser rápido (str.split en posiciones fijas) y su variante sobre bytes, que usa el modo mmap.
+
+Antes de medir comprueba que las tres variantes dan los mismos registros; si no, termina con
+código de salida 1.
+
+Uso: python benchmarks/bench_native_parse.py [--lines N] [--hosts N] [--repeat N]
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analyzer  # noqa: E402
+from analyzer import SquidLogAnalyzer  # noqa: E402
+from bench_bulk_parse import make_log_lines  # noqa: E402
+from bench_domains import make_hosts, make_urls, timed  # noqa: E402
+
+
+def _best_time(parse, lines, repeat):
+    """
+    Mejor de `repeat` pasadas, empezando cada una con la caché de dominios vacía y, como
+    timeit, sin el recolector de basura (los registros creados no forman ciclos).
+    """
+    best = None
+    for _ in range(repeat):
+        analyzer._domain_from_url.cache_clear()
+        gc.collect()
+        gc.disable()
+        try:
+            records, elapsed = timed(lambda: [parse(line) for line in lines])
+        finally:
+            gc.enable()
+        best = elapsed if best is None else min(best, elapsed)
+    return records, best
+
+
+def bench_native(lines, repeat):
+    """Mide las tres variantes; devuelve False si alguna da registros distintos de la regex."""
+    log = SquidLogAnalyzer('access.log', 'squid_native', use_cache=False)
+    raw_lines = [line.encode('utf-8') for line in lines]
+    
+    expected, regex_time = _best_time(log._parse_squid_native_log_line, lines, repeat)
+    fast, fast_time = _best_time(log._parse_squid_native_log_line_fast, lines, repeat)
+    raw, raw_time = _best_time(log._parse_squid_native_log_line_bytes, raw_lines, repeat)
+    
+    print(f"{'parser squid_native':<28}{'líneas/s':>14}{'mejora':>9}")
+    for name, elapsed in [('regex', regex_time), ('rápido (str.split)', fast_time), ('rápido sobre bytes', raw_time)]:
+        print(f"{name:<28}{len(lines) / elapsed:>14,.0f}{regex_time / elapsed:>8.2f}x")
+    
+    ok = True
+    for name, records in [('rápido', fast), ('bytes', raw)]:
+        different = [(line, want, got) for line, want, got in zip(lines, expected, records) if want != got]
+        if different:
+            print(f"{name}: {len(different)} registros distintos de la regex, p. ej. {different[:1]}")
+            ok = False
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the squid_native line parsers')
+    parser.add_argument('--lines', type=int, default=100000, help='Log lines to parse (default: 100000)')
+    parser.add_argument('--hosts', type=int, default=2000, help='Distinct hosts in the URLs (default: 2000)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per parser; the best one counts (default: 3)')
+    parser.add_argument('--seed', type=int, default=2024, help='Random seed (default: 2024)')
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    urls = make_urls(args.lines, make_hosts(args.hosts, rng), rng)
+    return 0 if bench_native(make_log_lines('squid_native', urls, rng), args.repeat) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,264 @@
+"""
+Caché en disco de las columnas parseadas de un log, particionada por día.
+
+Cada entrada corresponde a un archivo de log y un formato y guarda un manifiesto JSON con la
+huella del archivo (inodo, tamaño, mtime, versión de los parsers y byte hasta el que se
+parseó) y la lista de particiones: una por día, con su número de registros y su primer y
+último timestamp. Una consulta por fechas solo abre las particiones que se solapan con el
+rango, y al añadir registros solo se reescriben las particiones de sus días.
+
+Cada partición se guarda como:
+
+- Parquet, si pyarrow está instalado;
+- si no, un subdirectorio con un .npy por columna numérica y, para las de texto, un .npy con
+  los códigos y un .json con el diccionario de valores. Los .npy se abren con mmap.
+
+Las particiones incluyen la columna 'row' con la posición del registro en el log, que permite
+devolver los registros en el orden del archivo aunque haya líneas desordenadas entre días.
+
+Al actualizar una entrada las particiones nuevas se escriben con otro nombre y después se
+reemplaza el manifiesto, así que un lector nunca ve una entrada a medio escribir.
+
+Una entrada ocupa en disco aproximadamente lo mismo que el log (todas las columnas, incluidos
+usuarios, IPs y URLs). prune() borra las de los archivos que ya no existen o se rotaron y las
+que llevan más de un tiempo sin usarse.
+"""
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+logger = logging.getLogger('SLAM.ColumnCache')
+
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+
+class ColumnCache:
+    """Columnas parseadas de cada log, guardadas en `cache_dir`."""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def _entry_dir(self, log_path, log_format):
+        key = hashlib.sha1(f"{os.path.abspath(log_path)}\0{log_format}".encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.cache_dir, key)
+
+    def prune(self, max_age):
+        """
+        Borra las entradas cuyo log ya no existe, tiene otro inodo o es más corto que la parte
+        guardada (se rotó o se truncó), y las que no se han usado en `max_age` segundos.
+        """
+        if not os.path.isdir(self.cache_dir):
+            return
+        now = time.time()
+        for key in os.listdir(self.cache_dir):
+            entry_dir = os.path.join(self.cache_dir, key)
+            manifest_path = os.path.join(entry_dir, 'manifest.json')
+            try:
+                if not os.path.isfile(manifest_path):
+                    # Una entrada sin manifiesto puede estar escribiéndose ahora mismo
+                    stale = now - os.path.getmtime(entry_dir) > max_age
+                else:
+                    with open(manifest_path, 'r', encoding='utf-8') as mf:
+                        manifest = json.load(mf)
+                    stale = now - os.path.getmtime(manifest_path) > max_age
+                    if not stale:
+                        stat = os.stat(manifest['log_path'])
+                        stale = stat.st_ino != manifest.get('inode') or stat.st_size < manifest.get('offset', 0)
+            except (OSError, ValueError, KeyError, TypeError):
+                # Sin manifiesto legible o sin el log: la entrada ya no sirve
+                stale = True
+            if stale:
+                logger.info(f"Borrando la entrada {key} de la caché de columnas")
+                shutil.rmtree(entry_dir, ignore_errors=True)
+
+    def load_manifest(self, log_path, log_format):
+        """Devuelve el manifiesto de la entrada, o None si no existe o es ilegible."""
+        manifest_path = os.path.join(self._entry_dir(log_path, log_format), 'manifest.json')
+        if not os.path.isfile(manifest_path):
+            return None
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as mf:
+                manifest = json.load(mf)
+        except Exception as e:
+            logger.warning(f"Manifiesto de caché ilegible, se ignorará: {e}")
+            return None
+        # La fecha del manifiesto marca el último uso de la entrada (ver prune)
+        try:
+            os.utime(manifest_path)
+        except OSError as e:
+            logger.debug(f"No se pudo actualizar la fecha de {manifest_path}: {e}")
+        return manifest
+
+    def load_frame(self, log_path, log_format, manifest, start=None, end=None):
+        """
+        Carga los registros de una entrada como DataFrame, en el orden del log (timestamp en
+        datetime64, las columnas de texto guardadas como category siguen siéndolo y el resto
+        como texto).
+
+        Args:
+            start, end: Rango en segundos de hora local; solo se leen las particiones que se
+                solapan con él (las filas de esas particiones fuera del rango se incluyen)
+
+        Returns:
+            DataFrame, o None si ninguna partición se solapa con el rango
+        """
+        entry_dir = self._entry_dir(log_path, log_format)
+        partitions = [partition for partition in manifest['partitions']
+                      if (start is None or partition['max_timestamp'] >= start)
+                      and (end is None or partition['min_timestamp'] <= end)]
+        if not partitions:
+            return None
+        logger.debug(f"Caché de columnas: {len(partitions)} de {len(manifest['partitions'])} particiones")
+
+        df = self._concat([self._read_partition(entry_dir, manifest['backend'], partition) for partition in partitions])
+        if not df['row'].is_monotonic_increasing:
+            df = df.iloc[np.argsort(df['row'].to_numpy(), kind='stable')].reset_index(drop=True)
+        return df.drop(columns='row')
+
+    @staticmethod
+    def _concat(frames):
+        """Concatena particiones; las columnas category se unen sin pasar por texto."""
+        if len(frames) == 1:
+            return frames[0]
+        data = {}
+        for column in frames[0].columns:
+            if isinstance(frames[0][column].dtype, pd.CategoricalDtype):
+                data[column] = union_categoricals([frame[column] for frame in frames], sort_categories=True)
+            else:
+                data[column] = pd.concat([frame[column] for frame in frames], ignore_index=True)
+        return pd.DataFrame(data)
+
+    @staticmethod
+    def _read_partition(entry_dir, backend, partition):
+        data_path = os.path.join(entry_dir, partition['data'])
+        if backend == 'parquet':
+            return pd.read_parquet(data_path, memory_map=True)
+
+        data = {}
+        for column, kind in partition['columns'].items():
+            if kind == 'timestamp':
+                seconds = np.load(os.path.join(data_path, f'{column}.npy'), mmap_mode='r')
+                data[column] = pd.to_datetime(seconds, unit='s')
+            elif kind == 'number':
+                data[column] = np.load(os.path.join(data_path, f'{column}.npy'), mmap_mode='r')
+            else:
+                codes = np.load(os.path.join(data_path, f'{column}.codes.npy'), mmap_mode='r')
+                with open(os.path.join(data_path, f'{column}.values.json'), 'r', encoding='utf-8') as vf:
+                    values = json.load(vf)
+                if kind == 'category':
+                    data[column] = pd.Categorical.from_codes(codes, categories=values)
+                else:
+                    # El código -1 (valor nulo) toma el último elemento, None
+                    lookup = np.array(values + [None], dtype=object)
+                    data[column] = lookup[codes]
+        return pd.DataFrame(data)
+
+    def store(self, log_path, log_format, manifest, records, previous=None):
+        """
+        Guarda registros nuevos y el manifiesto (sin las claves 'backend', 'rows' ni
+        'partitions', que se añaden aquí). Los errores solo se registran.
+
+        Args:
+            manifest: Huella del archivo hasta el último registro de `records`
+            records: DataFrame con los registros nuevos, en el orden del log
+            previous: Manifiesto de la entrada a la que siguen los registros, o None si
+                `records` contiene el log completo
+        """
+        entry_dir = self._entry_dir(log_path, log_format)
+        on_disk = self.load_manifest(log_path, log_format)
+        backend = 'parquet' if HAS_PYARROW else 'npy'
+        if previous is not None and previous.get('backend') != backend:
+            previous = None
+        first_row = previous['rows'] if previous is not None else 0
+        partitions = {partition['day']: partition for partition in previous['partitions']} if previous else {}
+        written = []
+
+        try:
+            os.makedirs(entry_dir, exist_ok=True)
+            seconds = records['timestamp'].to_numpy(dtype='datetime64[s]').astype(np.int64)
+            records = records.assign(row=np.arange(first_row, first_row + len(records), dtype=np.int64))
+            days = seconds // 86400
+            for day in np.unique(days):
+                part = records[days == day]
+                day_name = str(np.datetime64(int(day), 'D'))
+                # Los registros de un día ya guardado se añaden a su partición
+                if day_name in partitions:
+                    part = self._concat([self._read_partition(entry_dir, backend, partitions[day_name]), part])
+                part_seconds = part['timestamp'].to_numpy(dtype='datetime64[s]').astype(np.int64)
+                partition = {
+                    'day': day_name,
+                    'data': f'{day_name}-{time.time_ns()}-{os.getpid()}' + ('.parquet' if backend == 'parquet' else ''),
+                    'rows': len(part),
+                    'min_timestamp': int(part_seconds.min()),
+                    'max_timestamp': int(part_seconds.max())
+                }
+                written.append(partition['data'])
+                if backend == 'parquet':
+                    part.to_parquet(os.path.join(entry_dir, partition['data']), index=False)
+                else:
+                    partition['columns'] = self._write_npy(os.path.join(entry_dir, partition['data']), part)
+                partitions[day_name] = partition
+
+            manifest = dict(manifest, backend=backend, rows=first_row + len(records),
+                            partitions=[partitions[day] for day in sorted(partitions)])
+            manifest_path = os.path.join(entry_dir, 'manifest.json')
+            with open(manifest_path + '.tmp', 'w', encoding='utf-8') as mf:
+                json.dump(manifest, mf)
+            os.replace(manifest_path + '.tmp', manifest_path)
+        except Exception as e:
+            logger.warning(f"No se pudo guardar la caché de columnas: {e}")
+            for data in written:
+                self._remove_data(entry_dir, data)
+            return
+
+        # Borrar las particiones reemplazadas
+        if on_disk and on_disk.get('partitions'):
+            kept = {partition['data'] for partition in manifest['partitions']}
+            for partition in on_disk['partitions']:
+                if partition['data'] not in kept:
+                    self._remove_data(entry_dir, partition['data'])
+
+    @staticmethod
+    def _write_npy(data_path, df):
+        """Escribe cada columna en data_path y devuelve el tipo de cada una para el manifiesto."""
+        os.makedirs(data_path)
+        columns = {}
+        for column in df.columns:
+            values = df[column]
+            if pd.api.types.is_datetime64_any_dtype(values):
+                np.save(os.path.join(data_path, f'{column}.npy'), values.to_numpy(dtype='datetime64[s]').astype(np.int64))
+                columns[column] = 'timestamp'
+            elif pd.api.types.is_integer_dtype(values):
+                np.save(os.path.join(data_path, f'{column}.npy'), values.to_numpy())
+                columns[column] = 'number'
+            else:
+                if isinstance(values.dtype, pd.CategoricalDtype):
+                    values = values.cat.remove_unused_categories()
+                    codes, uniques, kind = values.cat.codes.to_numpy(), values.cat.categories, 'category'
+                else:
+                    codes, uniques = pd.factorize(values)
+                    kind = 'text'
+                np.save(os.path.join(data_path, f'{column}.codes.npy'), codes.astype(np.int32))
+                with open(os.path.join(data_path, f'{column}.values.json'), 'w', encoding='utf-8') as vf:
+                    json.dump([str(value) for value in uniques], vf, ensure_ascii=False)
+                columns[column] = kind
+        return columns
+
+    @staticmethod
+    def _remove_data(entry_dir, data):
+        path = os.path.join(entry_dir, data)
+        try:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            elif os.path.exists(path):
+                os.remove(path)
+        except OSError as e:
+            logger.debug(f"No se pudo borrar {path}: {e}")
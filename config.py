@@ -9,11 +9,13 @@ BASE_DIR = Path(__file__).resolve().parent
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
 STATIC_DIR = os.path.join(BASE_DIR, "static")
 REPORTS_DIR = "/var/www/slam"
+STATE_DIR = "/var/lib/slam"  # Checkpoints de la lectura incremental
+CACHE_DIR = "/var/cache/slam"  # Caché de columnas parseadas
+TEMPLATE_CACHE_DIR = os.path.join(CACHE_DIR, "templates")  # Plantillas Jinja2 compiladas
+ROLLUP_DB = os.path.join(STATE_DIR, "rollups.db")  # Agregados por hora de todos los logs procesados
 
-# Asegurar que los directorios existan
-for directory in [TEMPLATES_DIR, STATIC_DIR]:
-    os.makedirs(directory, exist_ok=True)
-os.makedirs(REPORTS_DIR, exist_ok=True)
+# Los directorios se crean al usarlos (main.py, el generador de informes, la caché...), no al
+# importar este módulo
 
 # Configuración por defecto
 DEFAULT_CONFIG = {
@@ -36,6 +38,19 @@ DEFAULT_CONFIG = {
     "theme": "light",
     "language": "es",
     "log_format": "auto",  # Formato de log: auto, detailed, common, squid_native, custom
+    "incremental": False,  # Procesar solo las líneas nuevas desde la última ejecución
+    "bulk_chunk_size": 100000,  # Líneas por bloque en el parser vectorizado (bulk)
+    "rotated_log_pattern": "access.log*",  # Archivos que se leen cuando la entrada es un directorio
+    "rotation_overlap_lines": 1000,  # Líneas comparadas entre archivos rotados para descartar duplicados
+    "topk_capacity": 1000,  # Contadores del top-K aproximado de sitios (--approx-top)
+    "topk_user_capacity": 100,  # Contadores por usuario para sus sitios y URLs en modo aproximado
+    "rollups": False,  # Guardar agregados por hora en ROLLUP_DB y generar los informes de --days a partir de ellos (--rollups)
+    "column_cache": False,  # Guardar las columnas parseadas en CACHE_DIR y parsear solo las líneas nuevas (--cache)
+    "column_cache_max_age_days": 7,  # Días sin usarse tras los que se borra una entrada de la caché de columnas
+    "seek_tolerance": 300,  # Segundos de margen para líneas desordenadas al buscar por timestamp en logs squid_native
+    "chart_workers": 0,  # Procesos para dibujar los gráficos del informe (0: uno por núcleo)
+    "template_auto_reload": False,  # Comprobar en cada uso si las plantillas cambiaron (solo para desarrollarlas)
+    "charts": "server",  # Gráficos del informe: 'server' (PNG con matplotlib) o 'client' (Chart.js en el navegador)
 }
 
 # Colores para gráficos
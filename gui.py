@@ -6,8 +6,6 @@ import webbrowser
 from datetime import datetime, timedelta
 import logging
 
-from analyzer import SquidLogAnalyzer
-from report_generator import SquidReportGenerator
 from config import DEFAULT_CONFIG, REPORTS_DIR
 
 # Configurar logging
@@ -186,7 +184,9 @@ class SquidAnalyzerGUI(tk.Tk):
             # Actualizar progreso
             self._update_status("Iniciando análisis...", 10)
             
-            # Crear analizador con el formato especificado
+            # Crear analizador con el formato especificado; analyzer (pandas) se importa aquí
+            # para que la ventana se abra sin esperar a cargarlo
+            from analyzer import SquidLogAnalyzer
             analyzer = SquidLogAnalyzer(log_file, log_format)
             
             # Leer y procesar el archivo
@@ -229,6 +229,7 @@ class SquidAnalyzerGUI(tk.Tk):
             
             # Generar informe completo
             self._update_status("Generando informe completo...", 70)
+            from report_generator import SquidReportGenerator
             report_generator = SquidReportGenerator(analyzer)
             report_dir = report_generator.generate_report()
             
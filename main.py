@@ -2,14 +2,11 @@ import sys
 import os
 import argparse
 from datetime import datetime, timedelta
-import tkinter as tk
-from tkinter import filedialog, messagebox
-import webbrowser
 import logging
 
-from analyzer import SquidLogAnalyzer
-from report_generator import SquidReportGenerator
-from config import DEFAULT_CONFIG, REPORTS_DIR
+# analyzer (pandas), rollup_store y report_generator se importan en run_cli, así --help y
+# --gui no los cargan y una consulta --user no carga report_generator
+from config import DEFAULT_CONFIG, REPORTS_DIR, ROLLUP_DB
 
 # Configurar logging
 logging.basicConfig(
@@ -25,13 +22,36 @@ logger = logging.getLogger('SLAM.Main')
 
 def parse_args():
     parser = argparse.ArgumentParser(description='Squid Log Analyzer')
-    parser.add_argument('log_file', nargs='?', default=DEFAULT_CONFIG["squid_log_path"], help='Path to the Squid log file')
+    parser.add_argument('log_file', nargs='?', default=DEFAULT_CONFIG["squid_log_path"], help='Path to the Squid log file, a directory or a glob pattern '
+                        '(rotated .gz, .bz2 and .xz files are read too)')
     parser.add_argument('-o', '--output', help='Output directory for the report')
     parser.add_argument('-d', '--days', type=int, default=0, help='Number of days to analyze (0 for all)')
     parser.add_argument('-u', '--user', help='Filter by specific user')
     parser.add_argument('-g', '--gui', action='store_true', help='Launch GUI mode')
     parser.add_argument('-f', '--format', choices=['auto', 'detailed', 'common', 'squid_native', 'custom', 'custom_new'], 
                         default='auto', help='Log format (default: auto)')
+    parser.add_argument('-i', '--incremental', action='store_true', default=DEFAULT_CONFIG["incremental"],
+                        help='Only parse lines appended since the last run (uses a checkpoint)')
+    parser.add_argument('-m', '--mmap', action='store_true',
+                        help='Read the log through a memory map and parse lines as bytes')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='Number of processes used to parse the log (default: 1)')
+    parser.add_argument('-s', '--streaming', action='store_true',
+                        help='Aggregate records while parsing instead of building a DataFrame (lower memory)')
+    parser.add_argument('-a', '--approx-top', type=int, nargs='?', const=DEFAULT_CONFIG["topk_capacity"], metavar='N',
+                        help='Approximate the top domain and URL tables with N counters '
+                        f'(default: {DEFAULT_CONFIG["topk_capacity"]}); implies --streaming')
+    parser.add_argument('--cache', action='store_true', default=DEFAULT_CONFIG["column_cache"],
+                        help='Keep a copy of the parsed columns on disk and only parse new lines on the next run '
+                        '(takes about as much space as the log)')
+    parser.add_argument('--no-cache', dest='cache', action='store_false',
+                        help='Do not read or update the on-disk cache of parsed columns')
+    parser.add_argument('--rollups', action='store_true', default=DEFAULT_CONFIG["rollups"],
+                        help='Update the hourly rollup store and build --days reports from it (keeps rotated logs; '
+                        'dates are filtered by whole hours and distinct counts per period are estimates)')
+    parser.add_argument('--charts', choices=['server', 'client'], default=DEFAULT_CONFIG["charts"],
+                        help='Draw report charts as PNG images (server) or in the browser with Chart.js (client) '
+                        f'(default: {DEFAULT_CONFIG["charts"]})')
     parser.add_argument('-v', '--verbose', action='store_true', help='Enable verbose output')
     
     return parser.parse_args()
@@ -49,6 +69,8 @@ def run_gui():
 
 def run_cli(args_list):
     """Ejecuta el analizador en modo consola."""
+    from analyzer import SquidLogAnalyzer, resolve_log_files
+    
     args = parse_args()
     
     # Configurar nivel de logging según verbose
@@ -68,8 +90,8 @@ def run_cli(args_list):
             logger.error("No se proporcionó un archivo de log. Saliendo.")
             return
     
-    # Verificar que el archivo existe
-    if not os.path.isfile(args.log_file):
+    # Verificar que el archivo (o los archivos rotados) existen
+    if not resolve_log_files(args.log_file):
         logger.error(f"El archivo {args.log_file} no existe.")
         return
     
@@ -77,18 +99,45 @@ def run_cli(args_list):
     logger.info(f"Formato de log: {args.format}")
     
     # Crear analizador con el formato especificado
-    analyzer = SquidLogAnalyzer(args.log_file, args.format)
+    analyzer = SquidLogAnalyzer(args.log_file, args.format, incremental=args.incremental,
+                                workers=args.workers, use_mmap=args.mmap, streaming=args.streaming,
+                                approx_top=args.approx_top, use_cache=args.cache)
     
-    # Leer y procesar el archivo
+    # Leer y procesar el archivo; con varios procesos o en modo streaming se procesa al
+    # consultar los datos, así el filtro por fecha se aplica durante la lectura
     logger.info("Procesando archivo de log...")
-    analyzer.to_dataframe()
+    dataframe_mode = analyzer.workers == 1 and not analyzer.streaming
+    rollups = None
+    if dataframe_mode and args.rollups:
+        try:
+            from rollup_store import RollupStore
+            rollups = RollupStore(ROLLUP_DB)
+        except Exception as e:
+            logger.error(f"Error al abrir el almacén de agregados por hora: {e}")
+    
+    # Con --days y sin almacén de agregados, el DataFrame se construye al filtrar, leyendo
+    # de la caché de columnas solo las particiones de esos días
+    if dataframe_mode and (rollups is not None or args.days <= 0):
+        analyzer.to_dataframe()
+    
+    # Sumar los registros nuevos al almacén de agregados por hora
+    if rollups is not None and analyzer.save_rollups(rollups) is None:
+        rollups.close()
+        rollups = None
     
     # Filtrar por fecha si se especificó
     if args.days > 0:
         end_date = datetime.now()
         start_date = end_date - timedelta(days=args.days)
         logger.info(f"Filtrando por fecha: desde {start_date.strftime('%Y-%m-%d')} hasta {end_date.strftime('%Y-%m-%d')}")
-        analyzer = analyzer.filter_by_date(start_date, end_date)
+        if rollups is not None:
+            # Incluye los datos de los logs ya rotados, con resolución de una hora
+            logger.info("Informe generado a partir del almacén de agregados por hora")
+            analyzer = analyzer.from_rollups(rollups, start_date, end_date)
+        else:
+            analyzer = analyzer.filter_by_date(start_date, end_date)
+    if rollups is not None:
+        rollups.close()
     
     # Filtrar por usuario si se especificó
     if args.user:
@@ -107,7 +156,8 @@ def run_cli(args_list):
     
     # Generar informe completo
     logger.info("Generando informe completo...")
-    report_generator = SquidReportGenerator(analyzer)
+    from report_generator import SquidReportGenerator
+    report_generator = SquidReportGenerator(analyzer, chart_mode=args.charts)
     report_dir = report_generator.generate_report(args.output)
     
     # Mostrar resumen
@@ -1,22 +1,238 @@
 import os
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+import atexit
+from concurrent.futures import BrokenExecutor, Future, ProcessPoolExecutor
+import multiprocessing
+import threading
 from datetime import datetime
-import jinja2
 import shutil
 import json
 import re
 import logging
-from config import TEMPLATES_DIR, REPORTS_DIR, CHART_COLORS, STATIC_DIR
+from config import TEMPLATES_DIR, TEMPLATE_CACHE_DIR, REPORTS_DIR, CHART_COLORS, STATIC_DIR, DEFAULT_CONFIG
 
 logger = logging.getLogger('SLAM.ReportGenerator')
 
+# Entorno de Jinja2 compartido por todas las páginas; se crea al cargar la primera plantilla
+_template_env = None
+
+
+def _get_template(name):
+    """
+    Devuelve una plantilla de TEMPLATES_DIR.
+    
+    El entorno se crea una vez por proceso y compila cada plantilla una sola vez (sin
+    DEFAULT_CONFIG['template_auto_reload'] no vuelve a comprobar si cambiaron en disco). El
+    código compilado se guarda en TEMPLATE_CACHE_DIR, así las siguientes ejecuciones tampoco
+    las compilan; Jinja2 lo descarta si la plantilla cambia.
+    """
+    global _template_env
+    if _template_env is None:
+        import jinja2
+        bytecode_cache = None
+        try:
+            os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+            if os.access(TEMPLATE_CACHE_DIR, os.W_OK):
+                bytecode_cache = jinja2.FileSystemBytecodeCache(TEMPLATE_CACHE_DIR)
+        except OSError as e:
+            logger.warning(f"No se pudo crear la caché de plantillas compiladas: {e}")
+        _template_env = jinja2.Environment(loader=jinja2.FileSystemLoader(searchpath=TEMPLATES_DIR),
+                                           bytecode_cache=bytecode_cache,
+                                           auto_reload=DEFAULT_CONFIG['template_auto_reload'])
+    return _template_env.get_template(name)
+
+
+# Funciones de dibujo: se ejecutan en los procesos del pool de gráficos, así que son funciones
+# de módulo y reciben solo la ruta de salida y los datos (tablas pequeñas) del gráfico.
+# Dibujan sobre una Figure propia con el canvas Agg y aplican el estilo en un rc_context, sin
+# pasar por el estado global de pyplot: con un solo proceso se dibuja en el proceso principal
+# (que puede ser la GUI) y no debe cambiar su backend ni sus rcParams.
+# matplotlib y seaborn se importan aquí y no al cargar el módulo: en el modo de gráficos
+# 'client' no se usan, y solo se cargan al dibujar el primer gráfico
+
+def _chart_figure(figsize):
+    """Figure con canvas Agg (sin pantalla) y un único eje."""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    figure = Figure(figsize=figsize)
+    FigureCanvasAgg(figure)
+    return figure, figure.add_subplot()
+
+
+def _chart_style():
+    """Estilo de los gráficos (ggplot con CHART_COLORS), solo mientras dura el bloque with."""
+    import matplotlib.style
+    from cycler import cycler
+    # La paleta equivale a seaborn.set_palette(CHART_COLORS), pero sin tocar los rcParams globales
+    return matplotlib.style.context(['ggplot', {'axes.prop_cycle': cycler(color=CHART_COLORS)}])
+
+
+def _save_figure(figure, path):
+    figure.tight_layout()
+    figure.savefig(path)
+
+
+def _bar_chart(path, data, x, y, title, xlabel, ylabel, figsize=(10, 6), rotate=False, labels=None, inner_labels=None):
+    """
+    Gráfico de barras de `y` por `x`.
+    
+    Args:
+        rotate: Inclinar las etiquetas del eje x
+        labels: Columna con el texto a mostrar sobre cada barra
+        inner_labels: Columna con el texto a mostrar, en vertical, dentro de cada barra
+    """
+    import seaborn as sns
+    with _chart_style():
+        figure, ax = _chart_figure(figsize)
+        sns.barplot(x=x, y=y, data=data, ax=ax)
+        ax.set_title(title)
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+        if rotate:
+            for label in ax.get_xticklabels():
+                label.set_rotation(45)
+                label.set_horizontalalignment('right')
+        
+        for i, row in enumerate(data.itertuples()):
+            if labels:
+                ax.text(i, getattr(row, y), getattr(row, labels),
+                        ha='center', va='bottom', rotation=0)
+            if inner_labels:
+                ax.text(i, getattr(row, y) / 2, getattr(row, inner_labels),
+                        ha='center', va='center', rotation=90, color='white', fontweight='bold')
+        
+        _save_figure(figure, path)
+
+
+def _pie_chart(path, data, title, **plot_options):
+    """Gráfico de sectores de una serie (o de la columna `y` de un DataFrame)."""
+    with _chart_style():
+        figure, ax = _chart_figure((10, 6))
+        data.plot(kind='pie', autopct='%1.1f%%', ax=ax, **plot_options)
+        ax.set_title(title)
+        ax.set_ylabel('')
+        _save_figure(figure, path)
+
+
+def _hourly_chart(path, data):
+    """Solicitudes por hora del día."""
+    import seaborn as sns
+    with _chart_style():
+        figure, ax = _chart_figure((12, 6))
+        sns.lineplot(x='hour', y='requests', data=data, marker='o', ax=ax)
+        ax.set_title('Uso por Hora del Día')
+        ax.set_xlabel('Hora')
+        ax.set_ylabel('Solicitudes')
+        ax.set_xticks(range(0, 24, 2))
+        ax.grid(True)
+        _save_figure(figure, path)
+
+
+# Pool de procesos de los gráficos: se crea con el primer informe que lo necesita y lo
+# reutilizan todos los informes del proceso (la GUI puede generar varios). Los procesos se
+# arrancan con forkserver o spawn y no con fork: la GUI tiene hilos (Tk) y un fork copiaría
+# su estado a medias. Se cierra al salir del proceso
+_chart_pool = None
+_chart_pool_lock = threading.Lock()
+
+
+def _init_chart_worker():
+    """Carga matplotlib (con Agg) y seaborn al arrancar cada proceso, y no con su primer gráfico."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.figure  # noqa: F401
+    import matplotlib.backends.backend_agg  # noqa: F401
+    import seaborn  # noqa: F401
+
+
+def _chart_executor():
+    """
+    Pool de procesos para dibujar los gráficos, con DEFAULT_CONFIG['chart_workers'] procesos
+    (uno por núcleo si es 0). Con un solo proceso devuelve None y los gráficos se dibujan en este.
+    """
+    global _chart_pool
+    workers = DEFAULT_CONFIG['chart_workers'] or os.cpu_count() or 1
+    if workers <= 1:
+        return None
+    with _chart_pool_lock:
+        if _chart_pool is None:
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            _chart_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method),
+                                              initializer=_init_chart_worker)
+        return _chart_pool
+
+
+def _discard_chart_executor(executor):
+    """Descarta un pool roto para que el siguiente informe cree otro. Devuelve False si ya estaba descartado."""
+    global _chart_pool
+    with _chart_pool_lock:
+        if _chart_pool is not executor:
+            return False
+        _chart_pool = None
+    executor.shutdown(wait=False)
+    return True
+
+
+@atexit.register
+def _shutdown_chart_executor():
+    """Cierra el pool de gráficos, si se creó, al terminar el proceso."""
+    global _chart_pool
+    with _chart_pool_lock:
+        executor, _chart_pool = _chart_pool, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+def _draw_now(draw, path, options):
+    """Dibuja un gráfico en este proceso y devuelve el resultado como un Future ya resuelto."""
+    future = Future()
+    try:
+        future.set_result(draw(path, **options))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def _chart_dataset(draw, **options):
+    """
+    Datos de un gráfico para dibujarlo en el navegador con Chart.js (modo de gráficos 'client'):
+    tipo ('bar', 'pie' o 'line'), título, etiquetas, valores y, en los de barras que los
+    tienen, los textos de cada barra.
+    """
+    data = options['data']
+    if draw is _hourly_chart:
+        return {'type': 'line', 'title': 'Uso por Hora del Día',
+                'labels': data['hour'].tolist(), 'values': data['requests'].tolist()}
+    if draw is _pie_chart:
+        if 'y' in options:
+            labels, values = options.get('labels', data.index.tolist()), data[options['y']]
+        else:
+            labels, values = data.index.tolist(), data
+        return {'type': 'pie', 'title': options['title'],
+                'labels': [str(label) for label in labels], 'values': values.tolist()}
+    dataset = {'type': 'bar', 'title': options['title'],
+               'labels': data[options['x']].astype(str).tolist(), 'values': data[options['y']].tolist()}
+    text = options.get('labels') or options.get('inner_labels')
+    if text:
+        dataset['text'] = data[text].astype(str).tolist()
+    return dataset
+
+
 class SquidReportGenerator:
     
-    def __init__(self, analyzer):
-        """Inicializa el generador de Reportes con un analizador."""
+    def __init__(self, analyzer, chart_mode=None):
+        """
+        Inicializa el generador de Reportes con un analizador.
+        
+        También admite directamente un StreamingAggregator (o cualquier LogAggregate con
+        log_path), que ofrece los mismos métodos de consulta sin DataFrame.
+        
+        Args:
+            chart_mode: 'server' para dibujar los gráficos como PNG con matplotlib o 'client'
+                para incluir solo sus datos y dibujarlos en el navegador con Chart.js. Si es
+                None se usa DEFAULT_CONFIG['charts'].
+        """
         self.analyzer = analyzer
+        self.chart_mode = chart_mode or DEFAULT_CONFIG['charts']
         self.report_data = {}
 
     @staticmethod
@@ -24,6 +240,7 @@ class SquidReportGenerator:
         """Genera un índice HTML de todos los Reportes disponibles."""
         try:
             # Buscar todos los directorios de Reportes
+            os.makedirs(REPORTS_DIR, exist_ok=True)
             reports = []
             for item in os.listdir(REPORTS_DIR):
                 item_path = os.path.join(REPORTS_DIR, item)
@@ -64,9 +281,7 @@ class SquidReportGenerator:
             }
             
             # Cargar plantilla
-            template_loader = jinja2.FileSystemLoader(searchpath=TEMPLATES_DIR)
-            template_env = jinja2.Environment(loader=template_loader)
-            template = template_env.get_template('reports_index.html')
+            template = _get_template('reports_index.html')
             
             # Generar HTML
             html_output = template.render(**template_data)
@@ -98,161 +313,83 @@ class SquidReportGenerator:
             logger.error(f"Error al generar índice de reportes: {e}")
             return None
    
-    def _generate_charts(self, report_dir, user=None):
-        charts = {}
+    def _chart_jobs(self, report_dir, user=None, user_data=None):
+        """
+        Describe los gráficos generales del informe, o los de un usuario, como trabajos de dibujo.
         
-        # Configurar estilo de los gráficos
-        plt.style.use('ggplot')
-        sns.set_palette(CHART_COLORS)
+        Returns:
+            Diccionario nombre -> (descripción, función de dibujo, ruta, argumentos)
+        """
+        jobs = {}
         
         if user:
             # Gráficos específicos para el usuario
-            user_data = self.analyzer.get_user_data(user)
+            if user_data is None:
+                user_data = self.analyzer.get_user_data(user)
             if not user_data:
-                return charts
+                return jobs
             
             # Gráfico de dominios más visitados por el usuario
-            try:
-                top_domains = user_data['top_domains']
-                if not top_domains.empty:
-                    plt.figure(figsize=(12, 6))
-                    ax = sns.barplot(x='domain', y='visits', data=top_domains)
-                    plt.title(f'Top Domains Visited by {user}')
-                    plt.xlabel('Domain')
-                    plt.ylabel('Visits')
-                    plt.xticks(rotation=45, ha='right')
-                    plt.tight_layout()
-                    chart_path = os.path.join(report_dir, f'user_{user}_domains.png')
-                    plt.savefig(chart_path)
-                    plt.close()
-                    charts['user_domains'] = os.path.basename(chart_path)
-            except Exception as e:
-                logger.error(f"Error al generar gráfico de dominios para usuario {user}: {e}")
+            top_domains = user_data['top_domains']
+            if not top_domains.empty:
+                jobs['user_domains'] = (f'dominios para usuario {user}', _bar_chart,
+                                        os.path.join(report_dir, f'user_{user}_domains.png'),
+                                        dict(data=top_domains, x='domain', y='visits', title=f'Top Domains Visited by {user}',
+                                             xlabel='Domain', ylabel='Visits', figsize=(12, 6), rotate=True))
             
             # Gráfico de códigos de estado para el usuario
-            try:
-                status_codes = user_data['status_codes']
-                if not status_codes.empty:
-                    plt.figure(figsize=(10, 6))
-                    ax = sns.barplot(x='status_code', y='count', data=status_codes)
-                    plt.title(f'HTTP Status Codes for {user}')
-                    plt.xlabel('Status Code')
-                    plt.ylabel('Count')
-                    plt.tight_layout()
-                    chart_path = os.path.join(report_dir, f'user_{user}_status.png')
-                    plt.savefig(chart_path)
-                    plt.close()
-                    charts['user_status'] = os.path.basename(chart_path)
-            except Exception as e:
-                logger.error(f"Error al generar gráfico de códigos de estado para usuario {user}: {e}")
+            status_codes = user_data['status_codes']
+            if not status_codes.empty:
+                jobs['user_status'] = (f'códigos de estado para usuario {user}', _bar_chart,
+                                       os.path.join(report_dir, f'user_{user}_status.png'),
+                                       dict(data=status_codes, x='status_code', y='count', title=f'HTTP Status Codes for {user}',
+                                            xlabel='Status Code', ylabel='Count'))
             
             # Gráfico de tipos de contenido para el usuario
-            try:
-                content_types = user_data['content_types']
-                if not content_types.empty and len(content_types) > 1:
-                    plt.figure(figsize=(10, 6))
-                    content_types.plot(kind='pie', y='count', labels=content_types['content_type'], autopct='%1.1f%%')
-                    plt.title(f'Content Types for {user}')
-                    plt.ylabel('')
-                    plt.tight_layout()
-                    chart_path = os.path.join(report_dir, f'user_{user}_content_types.png')
-                    plt.savefig(chart_path)
-                    plt.close()
-                    charts['user_content_types'] = os.path.basename(chart_path)
-            except Exception as e:
-                logger.error(f"Error al generar gráfico de tipos de contenido para usuario {user}: {e}")
+            content_types = user_data['content_types']
+            if not content_types.empty and len(content_types) > 1:
+                jobs['user_content_types'] = (f'tipos de contenido para usuario {user}', _pie_chart,
+                                              os.path.join(report_dir, f'user_{user}_content_types.png'),
+                                              dict(data=content_types, title=f'Content Types for {user}',
+                                                   y='count', labels=content_types['content_type'].tolist()))
             
-            return charts
-
+            return jobs
+        
         # Gráfico de usuarios con más tráfico
         try:
             top_users = self.analyzer.get_top_users()
             if not top_users.empty:
-                plt.figure(figsize=(10, 6))
-                ax = sns.barplot(x='user', y='traffic', data=top_users)
-                plt.title('Top Usuarios por Trafico')
-                plt.xlabel('Usuario')
-                plt.ylabel('Trafico (bytes)')
-                plt.xticks(rotation=45, ha='right')
-                
-                # Añadir etiquetas de tráfico legible
-                for i, row in enumerate(top_users.itertuples()):
-                    ax.text(i, row.traffic, row.traffic_readable, 
-                            ha='center', va='bottom', rotation=0)
-                
-                plt.tight_layout()
-                chart_path = os.path.join(report_dir, 'top_users.png')
-                plt.savefig(chart_path)
-                plt.close()
-                charts['top_users'] = os.path.basename(chart_path)
+                jobs['top_users'] = ('usuarios', _bar_chart, os.path.join(report_dir, 'top_users.png'),
+                                     dict(data=top_users, x='user', y='traffic', title='Top Usuarios por Trafico',
+                                          xlabel='Usuario', ylabel='Trafico (bytes)', rotate=True, labels='traffic_readable'))
         except Exception as e:
             logger.error(f"Error al generar gráfico de usuarios: {e}")
         
-        # Gráfico de dominios más visitados
+        # Gráficos de dominios más visitados y, ordenados por tráfico en lugar de visitas, por tráfico
         try:
             top_domains = self.analyzer.get_top_domains()
             if not top_domains.empty:
-                plt.figure(figsize=(12, 6))
-                ax = sns.barplot(x='domain', y='visits', data=top_domains)
-                plt.title('Top Sitios por Visitas')
-                plt.xlabel('Sitios')
-                plt.ylabel('Visitas')
-                plt.xticks(rotation=45, ha='right')
-                plt.tight_layout()
-                chart_path = os.path.join(report_dir, 'top_domains.png')
-                plt.savefig(chart_path)
-                plt.close()
-                charts['top_domains'] = os.path.basename(chart_path)
-        except Exception as e:
-            logger.error(f"Error al generar gráfico de dominios: {e}")
-        
-        # Gráfico de dominios por tráfico
-        try:
-            top_domains_traffic = self.analyzer.get_top_domains()
-            if not top_domains_traffic.empty:
-                # Ordenar por tráfico en lugar de visitas
-                top_domains_traffic = top_domains_traffic.sort_values('traffic', ascending=False).head(20)
+                jobs['top_domains'] = ('dominios', _bar_chart, os.path.join(report_dir, 'top_domains.png'),
+                                       dict(data=top_domains, x='domain', y='visits', title='Top Sitios por Visitas',
+                                            xlabel='Sitios', ylabel='Visitas', figsize=(12, 6), rotate=True))
                 
-                plt.figure(figsize=(12, 6))
-                ax = sns.barplot(x='domain', y='traffic', data=top_domains_traffic)
-                plt.title('Top Sitios por Tráfico')
-                plt.xlabel('Sitios')
-                plt.ylabel('Tráfico (bytes)')
-                plt.xticks(rotation=45, ha='right')
-                
-                # Añadir etiquetas de tráfico legible
-                for i, row in enumerate(top_domains_traffic.itertuples()):
-                    ax.text(i, row.traffic, row.traffic_readable, 
-                            ha='center', va='bottom', rotation=0)
-                
-                plt.tight_layout()
-                chart_path = os.path.join(report_dir, 'top_domains_traffic.png')
-                plt.savefig(chart_path)
-                plt.close()
-                charts['top_domains_traffic'] = os.path.basename(chart_path)
+                top_domains_traffic = top_domains.sort_values('traffic', ascending=False).head(20)
+                jobs['top_domains_traffic'] = ('dominios por tráfico', _bar_chart,
+                                               os.path.join(report_dir, 'top_domains_traffic.png'),
+                                               dict(data=top_domains_traffic, x='domain', y='traffic',
+                                                    title='Top Sitios por Tráfico', xlabel='Sitios',
+                                                    ylabel='Tráfico (bytes)', figsize=(12, 6), rotate=True,
+                                                    labels='traffic_readable'))
         except Exception as e:
-            logger.error(f"Error al generar gráfico de dominios por tráfico: {e}")
+            logger.error(f"Error al generar gráfico de dominios: {e}")
         
-        # Gráfico de códigos de estado
+        # Gráfico de códigos de estado, con sus descripciones como etiquetas
         try:
             status_codes = self.analyzer.get_status_codes()
             if not status_codes.empty:
-                plt.figure(figsize=(10, 6))
-                ax = sns.barplot(x='status_code', y='count', data=status_codes)
-                plt.title('HTTP Status')
-                plt.xlabel('Status')
-                plt.ylabel('Total')
-                
-                # Añadir descripciones como etiquetas
-                for i, row in enumerate(status_codes.itertuples()):
-                    ax.text(i, row.count/2, row.description, 
-                            ha='center', va='center', rotation=90, color='white', fontweight='bold')
-                
-                plt.tight_layout()
-                chart_path = os.path.join(report_dir, 'status_codes.png')
-                plt.savefig(chart_path)
-                plt.close()
-                charts['status_codes'] = os.path.basename(chart_path)
+                jobs['status_codes'] = ('códigos de estado', _bar_chart, os.path.join(report_dir, 'status_codes.png'),
+                                        dict(data=status_codes, x='status_code', y='count', title='HTTP Status',
+                                             xlabel='Status', ylabel='Total', inner_labels='description'))
         except Exception as e:
             logger.error(f"Error al generar gráfico de códigos de estado: {e}")
         
@@ -260,15 +397,8 @@ class SquidReportGenerator:
         try:
             content_types = self.analyzer.get_content_types()
             if not content_types.empty:
-                plt.figure(figsize=(10, 6))
-                content_types.plot(kind='pie', autopct='%1.1f%%')
-                plt.title('Tipo de Contenido')
-                plt.ylabel('')
-                plt.tight_layout()
-                chart_path = os.path.join(report_dir, 'content_types.png')
-                plt.savefig(chart_path)
-                plt.close()
-                charts['content_types'] = os.path.basename(chart_path)
+                jobs['content_types'] = ('tipos de contenido', _pie_chart, os.path.join(report_dir, 'content_types.png'),
+                                         dict(data=content_types, title='Tipo de Contenido'))
         except Exception as e:
             logger.error(f"Error al generar gráfico de tipos de contenido: {e}")
         
@@ -276,18 +406,8 @@ class SquidReportGenerator:
         try:
             hourly_usage = self.analyzer.get_hourly_usage()
             if not hourly_usage.empty:
-                plt.figure(figsize=(12, 6))
-                ax = sns.lineplot(x='hour', y='requests', data=hourly_usage, marker='o')
-                plt.title('Uso por Hora del Día')
-                plt.xlabel('Hora')
-                plt.ylabel('Solicitudes')
-                plt.xticks(range(0, 24, 2))
-                plt.grid(True)
-                plt.tight_layout()
-                chart_path = os.path.join(report_dir, 'hourly_usage.png')
-                plt.savefig(chart_path)
-                plt.close()
-                charts['hourly_usage'] = os.path.basename(chart_path)
+                jobs['hourly_usage'] = ('uso por hora', _hourly_chart, os.path.join(report_dir, 'hourly_usage.png'),
+                                        dict(data=hourly_usage))
         except Exception as e:
             logger.error(f"Error al generar gráfico de uso por hora: {e}")
         
@@ -295,19 +415,51 @@ class SquidReportGenerator:
         try:
             daily_usage = self.analyzer.get_daily_usage()
             if not daily_usage.empty:
-                plt.figure(figsize=(12, 6))
-                ax = sns.barplot(x='day_of_week', y='requests', data=daily_usage)
-                plt.title('Uso por Día de la Semana')
-                plt.xlabel('Día')
-                plt.ylabel('Solicitudes')
-                plt.tight_layout()
-                chart_path = os.path.join(report_dir, 'daily_usage.png')
-                plt.savefig(chart_path)
-                plt.close()
-                charts['daily_usage'] = os.path.basename(chart_path)
+                jobs['daily_usage'] = ('uso por día', _bar_chart, os.path.join(report_dir, 'daily_usage.png'),
+                                       dict(data=daily_usage, x='day_of_week', y='requests', title='Uso por Día de la Semana',
+                                            xlabel='Día', ylabel='Solicitudes', figsize=(12, 6)))
         except Exception as e:
             logger.error(f"Error al generar gráfico de uso por día: {e}")
         
+        return jobs
+    
+    def _start_charts(self, executor, jobs):
+        """
+        Lanza los trabajos de dibujo (en este proceso si executor es None); en el modo 'client'
+        solo prepara los datos de cada gráfico. Devuelve nombre -> (descripción, ruta, Future).
+        """
+        pending = {}
+        for name, (description, draw, path, options) in jobs.items():
+            if self.chart_mode == 'client':
+                future = _draw_now(_chart_dataset, draw, options)
+            elif executor is not None:
+                try:
+                    future = executor.submit(draw, path, **options)
+                except BrokenExecutor as e:
+                    # Un proceso del pool terminó de forma anormal: el siguiente informe creará
+                    # otro pool y los gráficos de este se dibujan aquí
+                    if _discard_chart_executor(executor):
+                        logger.warning(f"Pool de gráficos inutilizable, se dibuja en este proceso: {e}")
+                    executor = None
+                    future = _draw_now(draw, path, options)
+            else:
+                future = _draw_now(draw, path, options)
+            pending[name] = (description, path, future)
+        return pending
+    
+    @staticmethod
+    def _wait_charts(pending):
+        """
+        Espera a los gráficos lanzados y devuelve, de los que se generaron, nombre -> archivo
+        (o nombre -> datos del gráfico en el modo 'client').
+        """
+        charts = {}
+        for name, (description, path, future) in pending.items():
+            try:
+                dataset = future.result()
+                charts[name] = dataset if dataset is not None else os.path.basename(path)
+            except Exception as e:
+                logger.error(f"Error al generar gráfico de {description}: {e}")
         return charts
     
     def generate_report(self, output_dir=None):
@@ -329,8 +481,10 @@ class SquidReportGenerator:
         
         os.makedirs(report_dir, exist_ok=True)
         
-        # Generar gráficos generales
-        charts = self._generate_charts(report_dir)
+        # Calcular todos los agregados en una pasada; los gráficos y la plantilla reutilizan
+        # los resultados memorizados por el analizador
+        if hasattr(self.analyzer, 'compute_all'):
+            self.analyzer.compute_all()
         
         # Obtener datos
         summary = self.analyzer.get_summary()
@@ -354,39 +508,49 @@ class SquidReportGenerator:
             'top_users': top_users.to_dict('records') if not top_users.empty else [],
             'top_domains': top_domains.to_dict('records') if not top_domains.empty else [],
             'status_codes': status_codes.to_dict('records') if not status_codes.empty else [],
-            'charts': charts
+            'approximation': self.analyzer.get_approximation(),
+            'chart_mode': self.chart_mode,
+            'chart_colors': CHART_COLORS
         }
         
-        # Guardar datos para reportes de usuario
+        # Datos para reportes de usuario; los de todos se obtienen en una sola pasada
+        all_user_data = self.analyzer.get_all_user_data(top_users['user'].tolist()) if not top_users.empty else {}
+        all_user_data = {user: user_data for user, user_data in all_user_data.items() if user_data}
+        
+        # Lanzar todos los gráficos (generales y de cada usuario) en el pool; cada página espera
+        # solo a los suyos. En el modo 'client' no se dibuja nada y no hace falta el pool
+        chart_jobs = self._chart_jobs(report_dir)
+        user_chart_jobs = {user: self._chart_jobs(report_dir, user, user_data) for user, user_data in all_user_data.items()}
+        executor = _chart_executor() if self.chart_mode != 'client' else None
+        pending_charts = self._start_charts(executor, chart_jobs)
+        pending_user_charts = {user: self._start_charts(executor, jobs) for user, jobs in user_chart_jobs.items()}
+        
         users_data = {}
-        for user in top_users['user'].tolist() if not top_users.empty else []:
-            user_data = self.analyzer.get_user_data(user)
-            if user_data:
-                # Generar gráficos específicos para el usuario
-                user_charts = self._generate_charts(report_dir, user)
-                
-                # Preparar datos para la plantilla de usuario
-                user_template_data = {
-                    'title': f'Trazas de Usuario: {user}',
-                    'generation_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    'user_data': user_data,
-                    'charts': user_charts
-                }
-                
-                # Guardar datos para el usuario
-                users_data[user] = user_template_data
-                
-                # Generar HTML para el usuario
-                self._generate_user_report(user, user_template_data, report_dir)
+        for user, user_data in all_user_data.items():
+            # Preparar datos para la plantilla de usuario
+            user_template_data = {
+                'title': f'Trazas de Usuario: {user}',
+                'generation_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'user_data': user_data,
+                'charts': self._wait_charts(pending_user_charts[user]),
+                'chart_mode': self.chart_mode,
+                'chart_colors': CHART_COLORS
+            }
+            
+            # Guardar datos para el usuario
+            users_data[user] = user_template_data
+            
+            # Generar HTML para el usuario
+            self._generate_user_report(user, user_template_data, report_dir)
+        
+        template_data['charts'] = self._wait_charts(pending_charts)
         
         # Guardar datos de usuarios para JavaScript
         with open(os.path.join(report_dir, 'users_data.js'), 'w', encoding='utf-8') as f:
             f.write(f"const usersData = {json.dumps({'users': list(users_data.keys())})};\n")
         
         # Cargar plantilla
-        template_loader = jinja2.FileSystemLoader(searchpath=TEMPLATES_DIR)
-        template_env = jinja2.Environment(loader=template_loader)
-        template = template_env.get_template('report_template.html')
+        template = _get_template('report_template.html')
         
         # Generar HTML
         html_output = template.render(**template_data)
@@ -419,9 +583,7 @@ class SquidReportGenerator:
         """
         try:
             # Cargar plantilla
-            template_loader = jinja2.FileSystemLoader(searchpath=TEMPLATES_DIR)
-            template_env = jinja2.Environment(loader=template_loader)
-            template = template_env.get_template('user_report_template.html')
+            template = _get_template('user_report_template.html')
             
             # Generar HTML
             html_output = template.render(**template_data)
@@ -494,6 +656,16 @@ class SquidReportGenerator:
                 'status_codes': status_codes.to_dict('records') if not status_codes.empty else []
             }
             
+            # Usuarios, IPs y sitios distintos por día
+            distinct_usage = self.analyzer.get_distinct_usage('day')
+            distinct_usage['period'] = distinct_usage['period'].astype(str)
+            report_data['unique_by_day'] = distinct_usage.to_dict('records')
+            
+            # Cotas de error de las tablas aproximadas (--approx-top)
+            approximation = self.analyzer.get_approximation()
+            if approximation:
+                report_data['approximation'] = approximation
+            
             # Determinar ruta de salida
             if output_file is None:
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
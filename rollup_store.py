@@ -0,0 +1,305 @@
+"""
+Almacén persistente de agregados por hora en SQLite.
+
+Cada archivo de log leído es una fuente, identificada por el hash de su primera línea (que
+no cambia cuando logrotate lo renombra). Para cada fuente se guarda desde qué byte se leyó y
+cuántos registros se agregaron ya, y en cada ejecución solo se suman los registros
+posteriores, de modo que volver a procesar el mismo log no duplica los conteos y los datos de
+los archivos rotados se conservan. Cada fuente queda asociada a las entradas del analizador
+(archivo, directorio o patrón) con las que se leyó, y las consultas se limitan a las fuentes
+de una entrada: los informes de un log no incluyen los de otros logs guardados en el mismo
+almacén.
+
+Tablas (las claves primarias empiezan por la hora, así que un rango de fechas se lee con un
+recorrido de la clave):
+
+- hourly: solicitudes, bytes, primer y último timestamp y resúmenes HyperLogLog de los usuarios,
+  IPs y dominios distintos de cada hora;
+- rollups: solicitudes y bytes por hora, usuario, dominio, código de estado y tipo de contenido;
+- user_urls: solicitudes por hora, usuario y URL;
+- client_ips: solicitudes por hora e IP de cliente.
+
+Las horas son segundos de hora local // 3600, como en LogAggregate. Las claves de texto no
+admiten NULL: un valor ausente se guarda como MISSING y, igual que en las agrupaciones del
+DataFrame, se cuenta en los totales pero no como usuario, dominio, IP o URL.
+"""
+import logging
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from aggregator import LogAggregate
+from sketches import HyperLogLog
+
+logger = logging.getLogger('SLAM.RollupStore')
+
+# Valor de una clave de texto ausente (None en los registros)
+MISSING = ''
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    log_path TEXT NOT NULL,
+    records INTEGER NOT NULL,
+    updated INTEGER NOT NULL,
+    start INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS log_sets (
+    log_set TEXT NOT NULL,
+    source INTEGER NOT NULL,
+    PRIMARY KEY (log_set, source)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS hourly (
+    hour INTEGER NOT NULL,
+    source INTEGER NOT NULL,
+    requests INTEGER NOT NULL,
+    bytes INTEGER NOT NULL,
+    min_timestamp INTEGER NOT NULL,
+    max_timestamp INTEGER NOT NULL,
+    users_hll BLOB NOT NULL,
+    ips_hll BLOB NOT NULL,
+    domains_hll BLOB NOT NULL,
+    PRIMARY KEY (hour, source)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollups (
+    hour INTEGER NOT NULL,
+    source INTEGER NOT NULL,
+    username TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    status_code INTEGER NOT NULL,
+    content_type TEXT NOT NULL,
+    requests INTEGER NOT NULL,
+    bytes INTEGER NOT NULL,
+    PRIMARY KEY (hour, source, username, domain, status_code, content_type)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS user_urls (
+    hour INTEGER NOT NULL,
+    source INTEGER NOT NULL,
+    username TEXT NOT NULL,
+    url TEXT NOT NULL,
+    requests INTEGER NOT NULL,
+    PRIMARY KEY (hour, source, username, url)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS client_ips (
+    hour INTEGER NOT NULL,
+    source INTEGER NOT NULL,
+    client_ip TEXT NOT NULL,
+    requests INTEGER NOT NULL,
+    PRIMARY KEY (hour, source, client_ip)
+) WITHOUT ROWID;
+"""
+
+# Upserts de cada tabla: los conteos de una clave existente se suman (los resúmenes de hourly
+# ya llegan unidos con los guardados)
+UPSERTS = {
+    'hourly': """
+        INSERT INTO hourly (hour, source, requests, bytes, min_timestamp, max_timestamp, users_hll, ips_hll, domains_hll)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (hour, source) DO UPDATE SET
+            requests = requests + excluded.requests, bytes = bytes + excluded.bytes,
+            min_timestamp = MIN(min_timestamp, excluded.min_timestamp),
+            max_timestamp = MAX(max_timestamp, excluded.max_timestamp),
+            users_hll = excluded.users_hll, ips_hll = excluded.ips_hll, domains_hll = excluded.domains_hll
+    """,
+    'rollups': """
+        INSERT INTO rollups (hour, source, username, domain, status_code, content_type, requests, bytes)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (hour, source, username, domain, status_code, content_type) DO UPDATE SET
+            requests = requests + excluded.requests, bytes = bytes + excluded.bytes
+    """,
+    'user_urls': """
+        INSERT INTO user_urls (hour, source, username, url, requests) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (hour, source, username, url) DO UPDATE SET requests = requests + excluded.requests
+    """,
+    'client_ips': """
+        INSERT INTO client_ips (hour, source, client_ip, requests) VALUES (?, ?, ?, ?)
+        ON CONFLICT (hour, source, client_ip) DO UPDATE SET requests = requests + excluded.requests
+    """,
+}
+
+
+class RollupStore:
+    """Agregados por hora de todos los logs procesados, en una base de datos SQLite."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.connection = sqlite3.connect(db_path, timeout=30)
+        # WAL permite consultar el almacén mientras otra ejecución lo actualiza
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+        # Almacenes creados antes de guardar el byte inicial de cada fuente
+        columns = {column[1] for column in self.connection.execute('PRAGMA table_info(sources)')}
+        if 'start' not in columns:
+            self.connection.execute('ALTER TABLE sources ADD COLUMN start INTEGER NOT NULL DEFAULT 0')
+
+    def close(self):
+        self.connection.close()
+
+    def save(self, key, log_path, df, start=0, log_set=None):
+        """
+        Suma al almacén los registros de una fuente que aún no se agregaron.
+
+        Args:
+            key: Identificador de la fuente (hash de la primera línea del archivo)
+            log_path: Ruta del archivo, solo informativa
+            df: Todos los registros de la fuente desde el byte `start`, en el orden del archivo
+            start: Byte desde el que se leyó el archivo; es mayor que 0 cuando se omite el
+                inicio que repite el archivo anterior
+            log_set: Entrada del analizador (ruta absoluta del archivo, directorio o patrón)
+                con la que se leyó la fuente
+
+        Returns:
+            Número de registros agregados en esta llamada
+        """
+        with self.connection:
+            row = self.connection.execute('SELECT id, records, start FROM sources WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                source = self.connection.execute(
+                    'INSERT INTO sources (key, log_path, records, updated, start) VALUES (?, ?, 0, 0, ?)',
+                    (key, log_path, start)
+                ).lastrowid
+                stored = 0
+            else:
+                source, stored, stored_start = row
+                if len(df) < stored or start != stored_start:
+                    # El archivo tiene menos registros que los ya agregados o se leyó desde otro byte
+                    # (solo o junto al archivo anterior): los registros no se corresponden con los
+                    # guardados y se reemplaza la fuente
+                    logger.info(f"La fuente {log_path} cambió desde la última ejecución; se vuelve a agregar completa")
+                    for table in UPSERTS:
+                        self.connection.execute(f'DELETE FROM {table} WHERE source = ?', (source,))
+                    stored = 0
+
+            new_records = df.iloc[stored:]
+            if not new_records.empty:
+                for table, rows in self._rollup_rows(new_records, source).items():
+                    self.connection.executemany(UPSERTS[table], rows)
+            self.connection.execute('UPDATE sources SET log_path = ?, records = ?, start = ?, updated = ? WHERE id = ?',
+                                    (log_path, len(df), start, int(time.time()), source))
+            if log_set is not None:
+                self.connection.execute('INSERT OR IGNORE INTO log_sets (log_set, source) VALUES (?, ?)',
+                                        (log_set, source))
+        return len(new_records)
+
+    def _rollup_rows(self, df, source):
+        """Filas de cada tabla para un bloque de registros."""
+        seconds = df['timestamp'].to_numpy(dtype='datetime64[s]').astype(np.int64)
+        frame = pd.DataFrame({
+            'hour': seconds // 3600,
+            'timestamp': seconds,
+            'size': df['size'].to_numpy(dtype=np.int64),
+            'status_code': df['status_code'].to_numpy(dtype=np.int64),
+            **{column: df[column].array for column in ('username', 'domain', 'content_type', 'url', 'client_ip')}
+        })
+
+        def grouped(keys, **aggregations):
+            table = frame.groupby(keys, sort=False, observed=True, dropna=False).agg(**aggregations).reset_index()
+            columns = [table['hour'].tolist(), [source] * len(table)]
+            for column in table.columns[1:]:
+                if pd.api.types.is_numeric_dtype(table[column]):
+                    columns.append(table[column].tolist())
+                else:
+                    columns.append(table[column].astype(object).fillna(MISSING).tolist())
+            return zip(*columns)
+
+        # Resúmenes de cada hora, unidos con los ya guardados para esta fuente
+        sketches = {}
+        for field, position in (('username', 0), ('client_ip', 1), ('domain', 2)):
+            pairs = frame[['hour', field]].dropna().drop_duplicates()
+            for hour, value in zip(pairs['hour'].tolist(), pairs[field]):
+                hour_sketches = sketches.get(hour)
+                if hour_sketches is None:
+                    hour_sketches = sketches[hour] = [HyperLogLog(), HyperLogLog(), HyperLogLog()]
+                hour_sketches[position].add(value)
+        for hour, *blobs in self.connection.execute(
+                'SELECT hour, users_hll, ips_hll, domains_hll FROM hourly WHERE hour BETWEEN ? AND ? AND source = ?',
+                (int(frame['hour'].min()), int(frame['hour'].max()), source)):
+            for sketch, blob in zip(sketches.setdefault(hour, [HyperLogLog(), HyperLogLog(), HyperLogLog()]), blobs):
+                sketch.update(HyperLogLog.from_bytes(blob))
+        hourly = [row + tuple(sketch.to_bytes() for sketch in sketches.get(row[0], [HyperLogLog()] * 3))
+                  for row in grouped(['hour'], requests=('size', 'count'), bytes=('size', 'sum'),
+                                     min_timestamp=('timestamp', 'min'), max_timestamp=('timestamp', 'max'))]
+
+        return {
+            'hourly': hourly,
+            'rollups': grouped(['hour', 'username', 'domain', 'status_code', 'content_type'],
+                               requests=('size', 'count'), bytes=('size', 'sum')),
+            'user_urls': grouped(['hour', 'username', 'url'], requests=('size', 'count')),
+            'client_ips': grouped(['hour', 'client_ip'], requests=('size', 'count')),
+        }
+
+    def source_keys(self, log_set):
+        """Claves de las fuentes guardadas con una entrada del analizador, incluidas las de archivos ya rotados."""
+        return [key for key, in self.connection.execute(
+            'SELECT key FROM sources JOIN log_sets ON log_sets.source = sources.id WHERE log_set = ?', (log_set,))]
+
+    def load(self, keys, start_date=None, end_date=None):
+        """
+        Construye un LogAggregate con los agregados de unas fuentes guardados entre dos fechas.
+        La resolución es de una hora: se incluyen completas las horas de los extremos.
+
+        Las claves con el mismo conteo quedan en orden alfabético, no en el de su primera
+        aparición en el log.
+
+        Args:
+            keys: Claves de las fuentes a incluir (ver source_keys)
+        """
+        first = pd.Timestamp(start_date).value // 10**9 // 3600 if start_date is not None else -2**62
+        last = pd.Timestamp(end_date).value // 10**9 // 3600 if end_date is not None else 2**62
+        keys = list(dict.fromkeys(keys))
+        sources = [source for source, in self.connection.execute(
+            f'SELECT id FROM sources WHERE key IN ({", ".join("?" * len(keys))})', keys)] if keys else []
+        # Condición común a todas las consultas: rango de horas y fuentes
+        where = f'hour BETWEEN ? AND ? AND source IN ({", ".join("?" * len(sources))})'
+        query = lambda sql, *params: self.connection.execute(sql, (first, last, *sources) + params)
+
+        aggregate = LogAggregate()
+        if not sources:
+            return aggregate
+        for hour, requests, traffic, min_timestamp, max_timestamp, *blobs in query(
+                'SELECT hour, requests, bytes, min_timestamp, max_timestamp, users_hll, ips_hll, domains_hll '
+                f'FROM hourly WHERE {where} ORDER BY hour'):
+            # Una fila por hora y fuente
+            entry = aggregate.hours.setdefault(hour, [0, 0])
+            entry[0] += requests
+            entry[1] += traffic
+            aggregate.total_requests += requests
+            aggregate.total_bytes += traffic
+            if aggregate.min_timestamp is None:
+                aggregate.min_timestamp, aggregate.max_timestamp = min_timestamp, max_timestamp
+            aggregate.min_timestamp = min(aggregate.min_timestamp, min_timestamp)
+            aggregate.max_timestamp = max(aggregate.max_timestamp, max_timestamp)
+            hour_sketches = aggregate._hour_sketches(hour)
+            for name, blob in zip(('users', 'ips', 'domains'), blobs):
+                hour_sketches[name].update(HyperLogLog.from_bytes(blob))
+
+        for key, counters in (('username', aggregate.users), ('domain', aggregate.domains)):
+            for value, requests, traffic in query(
+                    f'SELECT {key}, SUM(requests), SUM(bytes) FROM rollups WHERE {where} AND {key} != ? '
+                    f'GROUP BY {key} ORDER BY {key}', MISSING):
+                counters[value] = [requests, traffic]
+        for key, counts in (('status_code', aggregate.status_codes), ('content_type', aggregate.content_types)):
+            for value, requests in query(f'SELECT {key}, SUM(requests) FROM rollups WHERE {where} '
+                                         f'AND {key} != ? GROUP BY {key} ORDER BY {key}', MISSING):
+                counts[value] = requests
+
+        for table, key, counter in (('rollups', 'domain', 'domains'), ('rollups', 'status_code', 'status_codes'),
+                                    ('rollups', 'content_type', 'content_types'), ('user_urls', 'url', 'urls')):
+            for user, value, requests in query(
+                    f'SELECT username, {key}, SUM(requests) FROM {table} WHERE {where} '
+                    f'AND ? NOT IN (username, {key}) GROUP BY username, {key} ORDER BY username, {key}', MISSING):
+                details = aggregate.user_details.get(user)
+                if details is None:
+                    details = aggregate.user_details[user] = aggregate._new_user_details()
+                details[counter][value] = requests
+
+        aggregate.client_ips = {ip for ip, in query(
+            f'SELECT DISTINCT client_ip FROM client_ips WHERE {where} AND client_ip != ?', MISSING)}
+
+        return aggregate
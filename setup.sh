@@ -17,6 +17,8 @@ LOG_DIR="/var/log/slam"
 BIN_DIR="/usr/local/bin"
 CRON_JOB="0 * * * * root /usr/local/bin/slam"
 REPORTS_DIR="/var/www/slam"
+STATE_DIR="/var/lib/slam"
+CACHE_DIR="/var/cache/slam"
 INSTALL_LOG="/var/log/slam_install.log"
 SQUID_CONF="/etc/squid/squid.conf"
 
@@ -242,7 +244,7 @@ except ImportError as e:
 
 create_dirs() {
     echo -e "${BLUE}■ Creando estructura de directorios...${NC}"
-    declare -a dirs=("$INSTALL_DIR" "$LOG_DIR" "$INSTALL_DIR/templates" "$INSTALL_DIR/static" "$REPORTS_DIR")
+    declare -a dirs=("$INSTALL_DIR" "$LOG_DIR" "$INSTALL_DIR/templates" "$INSTALL_DIR/static" "$REPORTS_DIR" "$STATE_DIR" "$CACHE_DIR")
     
     for dir in "${dirs[@]}"; do
         echo -ne "${YELLOW}  Creando $dir...${NC}"
@@ -254,7 +256,7 @@ create_dirs() {
 copy_files() {
     echo -e "${BLUE}■ Copiando archivos del proyecto...${NC}"
     
-    declare -a main_files=("analyzer.py" "gui.py" "main.py" "report_generator.py" "config.py")
+    declare -a main_files=("analyzer.py" "aggregator.py" "sketches.py" "column_cache.py" "rollup_store.py" "gui.py" "main.py" "report_generator.py" "config.py")
     for file in "${main_files[@]}"; do
         if [ ! -f "$file" ]; then
             echo -e "${RED}  ✗ Error: Archivo $file no encontrado${NC}"
@@ -292,6 +294,7 @@ ANALYSIS_LOG="/var/log/slam/analysis_$LOG_DATE.log"
 # Procesar argumentos
 FORMAT="auto"
 VERBOSE=""
+INCREMENTAL="--incremental"
 
 while [[ $# -gt 0 ]]; do
     case $1 in
@@ -303,6 +306,10 @@ while [[ $# -gt 0 ]]; do
             VERBOSE="-v"
             shift
             ;;
+        --full)
+            INCREMENTAL=""
+            shift
+            ;;
         *)
             LOG_FILE="$1"
             shift
@@ -316,7 +323,7 @@ done
     echo "Formato: $FORMAT"
     
     cd "$INSTALL_DIR"
-    python3 main.py "$LOG_FILE" -o "$OUTPUT_DIR/reporte_$LOG_DATE" -f "$FORMAT" $VERBOSE
+    python3 main.py "$LOG_FILE" -o "$OUTPUT_DIR/reporte_$LOG_DATE" -f "$FORMAT" $VERBOSE $INCREMENTAL
     
     echo "Análisis completado a $(date)"
 } >> "$ANALYSIS_LOG" 2>&1
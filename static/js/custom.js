@@ -301,3 +301,64 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 });
 
+
+// Draw the report charts with Chart.js (--charts=client). Each chart has a type ('bar', 'pie'
+// or 'line'), a title, labels, values and, for some bar charts, a text per bar for the tooltip
+function drawCharts(charts, colors) {
+    Object.keys(charts).forEach(function(name) {
+        const canvas = document.getElementById('chart-' + name);
+        if (!canvas) {
+            return;
+        }
+        
+        const chart = charts[name];
+        const ctx = canvas.getContext('2d');
+        const options = { responsive: true };
+        
+        if (chart.type === 'pie') {
+            const total = chart.values.reduce((sum, value) => sum + value, 0);
+            const segments = chart.values.map((value, i) => ({
+                value: value,
+                label: chart.labels[i],
+                color: colors[i % colors.length]
+            }));
+            options.tooltipTemplate = function(segment) {
+                return segment.label + ': ' + (100 * segment.value / total).toFixed(1) + '%';
+            };
+            new Chart(ctx).Pie(segments, options);
+        } else if (chart.type === 'line') {
+            new Chart(ctx).Line({
+                labels: chart.labels,
+                datasets: [{
+                    label: chart.title,
+                    fillColor: 'rgba(78, 121, 167, 0.2)',
+                    strokeColor: colors[0],
+                    pointColor: colors[0],
+                    pointStrokeColor: '#fff',
+                    data: chart.values
+                }]
+            }, options);
+        } else {
+            if (chart.text) {
+                options.tooltipTemplate = function(bar) {
+                    return bar.label + ': ' + chart.text[chart.labels.indexOf(bar.label)];
+                };
+            }
+            const barChart = new Chart(ctx).Bar({
+                labels: chart.labels,
+                datasets: [{
+                    label: chart.title,
+                    fillColor: colors[0],
+                    strokeColor: colors[0],
+                    data: chart.values
+                }]
+            }, options);
+            
+            // One palette color per bar, like the server-side charts
+            barChart.datasets[0].bars.forEach(function(bar, i) {
+                bar.fillColor = bar.strokeColor = colors[i % colors.length];
+            });
+            barChart.update();
+        }
+    });
+}
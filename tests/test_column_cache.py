@@ -0,0 +1,47 @@
+"""
+Caché de columnas: desactivada por defecto y prune() borra las entradas de logs que ya no
+existen, se rotaron o llevan tiempo sin usarse.
+"""
+import os
+import time
+
+from analyzer import SquidLogAnalyzer
+from column_cache import ColumnCache
+
+LINE = ('1760000000.134 1537 10.0.3.14 TCP_MISS/200 61898 GET http://www.example.com/ alice '
+        'HIER_DIRECT/1.2.3.4 text/html\n')
+
+
+def _cached_log(tmp_path, name, lines=3):
+    log_path = tmp_path / name
+    log_path.write_text(LINE * lines)
+    analyzer = SquidLogAnalyzer(str(log_path), 'squid_native', use_cache=True, cache_dir=str(tmp_path / 'cache'))
+    analyzer.read_log_file()
+    analyzer.to_dataframe()
+    return log_path
+
+
+def test_cache_is_opt_in(tmp_path):
+    log_path = tmp_path / 'access.log'
+    log_path.write_text(LINE)
+    assert SquidLogAnalyzer(str(log_path), 'squid_native').column_cache is None
+
+
+def test_prune_removes_stale_entries(tmp_path):
+    cache = ColumnCache(str(tmp_path / 'cache'))
+    kept = _cached_log(tmp_path, 'kept.log')
+    removed = _cached_log(tmp_path, 'removed.log')
+    truncated = _cached_log(tmp_path, 'truncated.log')
+    old = _cached_log(tmp_path, 'old.log')
+    assert len(os.listdir(cache.cache_dir)) == 4
+
+    removed.unlink()
+    truncated.write_text(LINE)
+    old_manifest = os.path.join(cache._entry_dir(str(old), 'squid_native'), 'manifest.json')
+    stale_time = time.time() - 3600
+    os.utime(old_manifest, (stale_time, stale_time))
+
+    cache.prune(60)
+
+    assert sorted(os.listdir(cache.cache_dir)) == [os.path.basename(cache._entry_dir(str(kept), 'squid_native'))]
+    assert cache.load_manifest(str(kept), 'squid_native')['rows'] == 3
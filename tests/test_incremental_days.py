@@ -0,0 +1,49 @@
+"""
+Lectura incremental combinada con un filtro por fechas (--incremental --days): el filtro se
+aplica sobre los registros acumulados y el checkpoint avanza igual que sin filtro.
+"""
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+from analyzer import SquidLogAnalyzer
+
+
+def _lines(epochs, user):
+    return ''.join(f'{epoch:.3f}    120 10.0.0.1 TCP_MISS/200 1000 GET http://www.example.com/ {user} '
+                   f'HIER_DIRECT/1.2.3.4 text/html\n' for epoch in epochs)
+
+
+def _last_days(log_path, state_dir, days=7):
+    analyzer = SquidLogAnalyzer(str(log_path), 'squid_native', incremental=True, state_dir=str(state_dir))
+    end_date = datetime.now()
+    return analyzer.filter_by_date(end_date - timedelta(days=days), end_date)
+
+
+def _checkpoint_offset(state_dir):
+    [name] = [name for name in os.listdir(state_dir) if name.endswith('.checkpoint.json')]
+    with open(os.path.join(state_dir, name), encoding='utf-8') as cf:
+        return json.load(cf)['offset']
+
+
+def test_incremental_with_days(tmp_path):
+    log_path = tmp_path / 'access.log'
+    state_dir = tmp_path / 'state'
+    now = time.time()
+    log_path.write_text(_lines([now - 30 * 86400] * 3, 'old') + _lines([now - 7200] * 2, 'alice'))
+
+    first = _last_days(log_path, state_dir)
+    assert first.df['username'].tolist() == ['alice', 'alice']
+    assert _checkpoint_offset(state_dir) == log_path.stat().st_size
+
+    with open(log_path, 'a', encoding='utf-8') as f:
+        f.write(_lines([now - 3600] * 4, 'bob'))
+
+    second = _last_days(log_path, state_dir)
+    assert sorted(second.df['username'].tolist()) == ['alice'] * 2 + ['bob'] * 4
+    assert _checkpoint_offset(state_dir) == log_path.stat().st_size
+
+    # Sin líneas nuevas se filtran los mismos registros acumulados
+    third = _last_days(log_path, state_dir, days=60)
+    assert len(third.df) == 9
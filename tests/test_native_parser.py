@@ -0,0 +1,67 @@
+"""
+Parser rápido del formato squid_native (str.split) frente al parser con regex: mismos registros
+en un log generado, incluidas las líneas que el rápido delega en la regex. La comparación de
+velocidad está en benchmarks/bench_native_parse.py.
+"""
+import random
+
+from analyzer import SquidLogAnalyzer
+
+HOSTS = ['www.google.com', 'api.github.com', 'fonts.gstatic.com', 'ñandú.example.es', '[2001:db8::1]:8080',
+         'user:pass@intranet.local', 'cdn.example.com:8443']
+PATHS = ['/', '/index.html', '/s.css', '/app.js?v=3', '/img/logo.png', '/video.mp4#t=10', '/descargas/informe.pdf']
+MIME_TYPES = ['-', 'text/html', 'text/css', 'application/javascript', 'image/png', 'video/mp4',
+              'application/octet-stream', 'application/pdf; charset=binary']
+
+# Líneas que no encajan en las posiciones fijas y pasan por la regex (o se descartan en ambos)
+IRREGULAR_LINES = [
+    '',
+    'basura',
+    '1760000000.134 1537 10.0.3.14 TCP_MISS/206 61898 GET http://a.com/ alice HIER_DIRECT/1.2.3.4',
+    '1760000000 1537 10.0.3.14 TCP_MISS/206 61898 GET http://a.com/ alice HIER_DIRECT/1.2.3.4 text/html',
+    '1760000000.134 -1 10.0.3.14 TCP_MISS/206 61898 GET http://a.com/ alice HIER_DIRECT/1.2.3.4 text/html',
+    '1760000000.134 1537 10.0.3.14 TCP_MISS/2x6 61898 GET http://a.com/ alice HIER_DIRECT/1.2.3.4 text/html',
+    '1760000000.134 1537 10.0.3.14 TCP_MISS 61898 GET http://a.com/ alice HIER_DIRECT/1.2.3.4 text/html',
+    '1760000000.134 1537 10.0.3.14 TCP_MISS/206 -1 GET http://a.com/ alice HIER_DIRECT/1.2.3.4 text/html',
+    '1760000000.134 1537 10.0.3.14 TCP_MISS/206 61898 GET http://a.com/ alice HIER_DIRECT text/html',
+    '1760000000.134 1537 10.0.3.14 /206 61898 GET http://a.com/ alice HIER_DIRECT/1.2.3.4 text/html',
+    '1760000000.134\t1537\t10.0.3.14\tTCP_MISS/206\t61898\tGET\thttp://a.com/\talice\tHIER_NONE/-\ttext/html',
+    '1760000000.134 1537 10.0.3.14 TCP_MISS/206 61898 GET http://a.com/ alice HIER_DIRECT/1.2.3.4 text/html extra',
+]
+
+
+def _generated_log(lines, seed=2024):
+    """Líneas en formato nativo de Squid con valores variados y algunas irregulares intercaladas."""
+    rng = random.Random(seed)
+    timestamp = 1760000000.0
+    log = []
+    for i in range(lines):
+        if i % 500 == 0:
+            log.append(IRREGULAR_LINES[(i // 500) % len(IRREGULAR_LINES)])
+            continue
+        timestamp += rng.random() * 10
+        method = rng.choice(['GET', 'GET', 'POST', 'HEAD', 'CONNECT'])
+        host = rng.choice(HOSTS)
+        url = f'{host}:443' if method == 'CONNECT' else f'{rng.choice(["http", "https"])}://{host}{rng.choice(PATHS)}'
+        log.append(f'{timestamp:.3f} {rng.randint(0, 99999):6d} 10.0.{rng.randint(0, 9)}.{rng.randint(1, 254)} '
+                   f'{rng.choice(["TCP_MISS", "TCP_HIT", "TCP_TUNNEL", "NONE"])}/{rng.choice([200, 206, 304, 404, 0]):03d} '
+                   f'{rng.randint(0, 10 ** 7)} {method} {url} {rng.choice(["alice", "bob", "-"])} '
+                   f'{rng.choice(["HIER_DIRECT/1.2.3.4", "HIER_NONE/-", "PARENT_HIT/proxy.local"])} {rng.choice(MIME_TYPES)}')
+    return log
+
+
+def test_fast_parser_matches_regex_parser(tmp_path):
+    log_path = tmp_path / 'access.log'
+    log_path.write_text('\n'.join(_generated_log(5000)) + '\n', encoding='utf-8')
+    log = SquidLogAnalyzer(str(log_path), 'squid_native')
+    
+    with open(log_path, encoding='utf-8') as f:
+        lines = [line.strip() for line in f]
+    with open(log_path, 'rb') as f:
+        raw_lines = f.read().splitlines()
+    
+    expected = [log._parse_squid_native_log_line(line) for line in lines]
+    assert [log._parse_squid_native_log_line_fast(line) for line in lines] == expected
+    assert [log._parse_squid_native_log_line_bytes(line) for line in raw_lines] == expected
+    assert sum(record is None for record in expected) > 0
+
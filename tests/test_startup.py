@@ -0,0 +1,50 @@
+"""
+Arranque de la CLI: main (y la GUI) no deben cargar pandas, matplotlib, seaborn ni jinja2 al
+importarse; se importan donde se usan. Cada comprobación corre en un intérprete nuevo, porque en
+el de pytest esos módulos pueden estar ya cargados.
+"""
+import importlib.util
+import json
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('pandas', 'numpy', 'matplotlib', 'seaborn', 'jinja2')
+
+
+def _run_python(*args):
+    return subprocess.run([sys.executable, *args], cwd=REPO_DIR, capture_output=True, text=True, check=True)
+
+
+def _loaded_heavy_modules(module):
+    code = f"import sys, json, {module}; print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    return json.loads(_run_python('-c', code).stdout)
+
+
+def _import_time(module):
+    """Tiempo acumulado (en microsegundos) de importar `module`, según -X importtime."""
+    stderr = _run_python('-X', 'importtime', '-c', f'import {module}').stderr
+    for line in stderr.splitlines():
+        match = re.match(r'import time:\s+\d+ \|\s+(\d+) \| ' + re.escape(module) + r'$', line)
+        if match:
+            return int(match.group(1))
+    raise AssertionError(f"-X importtime no informó de {module}")
+
+
+@pytest.mark.parametrize('module', ['main', 'config', 'report_generator'])
+def test_import_does_not_load_heavy_modules(module):
+    assert _loaded_heavy_modules(module) == []
+
+
+@pytest.mark.skipif(importlib.util.find_spec('tkinter') is None, reason="tkinter no disponible")
+def test_gui_import_does_not_load_heavy_modules():
+    assert _loaded_heavy_modules('gui') == []
+
+
+def test_main_imports_faster_than_pandas():
+    # Referencia relativa en vez de un límite fijo, para que no dependa de la máquina
+    assert _import_time('main') < _import_time('pandas') / 2